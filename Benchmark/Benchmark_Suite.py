@@ -0,0 +1,352 @@
+import pandas as pd
+import numpy as np
+import subprocess
+import platform
+import resource
+import time
+import json
+import os
+import sys
+import argparse
+
+from Synthetic_Data import generate_housing_csv
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.abspath(os.path.join(BENCH_DIR, '..'))
+for _folder in ('Preprocessing', 'Modelling', 'Comparison'):
+    sys.path.append(os.path.join(ROOT_DIR, _folder))
+
+
+# Sentetik veri, işlenmiş setler ve modeller bu klasörde boyut başına ayrı tutulur
+WORKSPACE_DIR = os.path.join(BENCH_DIR, '.bench_workspace')
+HISTORY_FILE = os.path.join(BENCH_DIR, 'history.jsonl')
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baseline.json')
+
+SIZES = [20_000, 200_000, 2_000_000]
+STAGES = ['preprocessing', 'model_lr', 'model_rf', 'model_gbr', 'report']
+WARMUP = 1
+REPEATS = 3
+
+# Regresyon kontrolü: ortanca değer temel değerden hem oransal hem mutlak eşikten fazla kötüleşirse işaretlenir
+REGRESSION_TOLERANCE = 0.10
+MIN_TIME_DELTA = 0.05  # saniye; çok kısa aşamalarda ölçüm gürültüsünü yok saymak için
+MIN_RSS_DELTA = 16.0   # MB
+CHECKED_METRICS = {'wall_median': MIN_TIME_DELTA, 'cpu_median': MIN_TIME_DELTA, 'peak_rss_mb': MIN_RSS_DELTA}
+
+
+# ÖLÇÜM YARDIMCILARI (işçi süreçte)
+
+def _reset_peak_rss():
+    """Linux'ta sürecin tepe RSS değerini sıfırlar; böylece içe aktarma maliyeti aşamaya yazılmaz."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb():
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # Linux'ta ru_maxrss KB, macOS'ta bayt cinsindendir
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 1024 ** 2 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def _cpu_seconds():
+    """Sürecin ve beklenmiş alt süreçlerin (ör. joblib işçileri) toplam kullanıcı + sistem CPU süresi."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def _shutdown_joblib_workers():
+    """joblib/loky işçilerini kapatır; CPU süreleri ancak beklenen (reaped) alt süreçlerde sayılır."""
+    try:
+        from joblib.externals.loky import get_reusable_executor
+        get_reusable_executor().shutdown(wait=True)
+    except Exception:
+        pass
+
+
+def _split_sizes(processed_dir):
+    with open(os.path.join(processed_dir, 'splits_meta.json'), 'r', encoding='utf-8') as f:
+        splits = json.load(f)['splits']
+    return {name: end - start for name, (start, end) in splits.items()}
+
+
+def workspace_paths(n_rows):
+    base = os.path.join(WORKSPACE_DIR, f'n{n_rows}')
+    return {
+        'raw': os.path.join(base, 'housing.csv'),
+        'processed': os.path.join(base, 'processed_data'),
+        'models': os.path.join(base, 'models'),
+        'report': os.path.join(base, 'report')
+    }
+
+
+# AŞAMALAR
+
+def _stage_runner(stage):
+    """Aşamanın modüllerini içe aktarır ve (paths, n_rows, n_jobs) -> işlenen satır sayısı fonksiyonunu döndürür."""
+    if stage == 'preprocessing':
+        from Data_Processing import run_preprocessing
+
+        def run(paths, n_rows, n_jobs):
+            run_preprocessing(file_path=paths['raw'], output_dir=paths['processed'])
+            return n_rows
+        return run
+
+    if stage.startswith('model_'):
+        from Train_All import TRAINERS
+        trainer = TRAINERS[stage[len('model_'):]]
+
+        def run(paths, n_rows, n_jobs):
+            output = trainer(data_path=paths['processed'] + os.sep, n_jobs=n_jobs, model_dir=paths['models'])
+            if output is None:
+                raise RuntimeError(f"'{stage}' aşaması sonuç döndürmedi.")
+            return _split_sizes(paths['processed'])['train']
+        return run
+
+    if stage == 'report':
+        import joblib
+        import matplotlib
+        matplotlib.use('Agg')
+        from Comparison_And_Report import create_report, MODEL_NAMES
+
+        def run(paths, n_rows, n_jobs):
+            results = {key: joblib.load(os.path.join(paths['models'], f'results_{key}.pkl')) for key in MODEL_NAMES}
+            create_report(results, output_dir=paths['report'], data_path=paths['processed'] + os.sep,
+                          model_dir=paths['models'])
+            return _split_sizes(paths['processed'])['test']
+        return run
+
+    raise ValueError(f"Bilinmeyen aşama: {stage}")
+
+
+def _worker(spec_path):
+    """Tek bir denemeyi ayrı bir süreçte çalıştırır; ölçümleri spec['result_path'] dosyasına yazar."""
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+
+    run = _stage_runner(spec['stage'])
+    rss_reset = _reset_peak_rss()
+    baseline_rss = _peak_rss_mb()
+
+    cpu_start = _cpu_seconds()
+    wall_start = time.perf_counter()
+    rows = run(spec['paths'], spec['n_rows'], spec['n_jobs'])
+    wall = time.perf_counter() - wall_start
+    _shutdown_joblib_workers()
+    cpu = _cpu_seconds() - cpu_start
+
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    result = {
+        'wall': wall,
+        'cpu': cpu,
+        'peak_rss_mb': _peak_rss_mb(),
+        'baseline_rss_mb': baseline_rss if rss_reset else None,
+        'children_peak_rss_mb': children_rss,
+        'rows': int(rows)
+    }
+    with open(spec['result_path'], 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def run_trial(stage, n_rows, n_jobs):
+    """Denemeyi yeni bir Python sürecinde çalıştırır (soğuk içe aktarma önbelleği, bağımsız tepe bellek)."""
+    paths = workspace_paths(n_rows)
+    os.makedirs(os.path.join(WORKSPACE_DIR, 'logs'), exist_ok=True)
+    spec_path = os.path.join(WORKSPACE_DIR, f'spec_{os.getpid()}.json')
+    result_path = os.path.join(WORKSPACE_DIR, f'result_{os.getpid()}.json')
+    log_path = os.path.join(WORKSPACE_DIR, 'logs', f'{stage}_n{n_rows}.log')
+
+    with open(spec_path, 'w', encoding='utf-8') as f:
+        json.dump({'stage': stage, 'n_rows': n_rows, 'n_jobs': n_jobs, 'paths': paths, 'result_path': result_path}, f)
+    if os.path.exists(result_path):
+        os.remove(result_path)
+
+    with open(log_path, 'w', encoding='utf-8') as log:
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', spec_path],
+                                   cwd=BENCH_DIR, stdout=log, stderr=subprocess.STDOUT)
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        raise RuntimeError(f"'{stage}' (n={n_rows}) denemesi başarısız oldu. Ayrıntılar: {log_path}")
+
+    with open(result_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def summarize_trials(stage, n_rows, trials):
+    walls = np.array([t['wall'] for t in trials])
+    cpus = np.array([t['cpu'] for t in trials])
+    rows = trials[0]['rows']
+    wall_median = float(np.median(walls))
+    return {
+        'stage': stage,
+        'n_rows': n_rows,
+        'rows': rows,
+        'repeats': len(trials),
+        'wall_median': wall_median,
+        'wall_min': float(walls.min()),
+        'wall_max': float(walls.max()),
+        'cpu_median': float(np.median(cpus)),
+        'peak_rss_mb': float(max(t['peak_rss_mb'] for t in trials)),
+        'children_peak_rss_mb': float(max(t['children_peak_rss_mb'] for t in trials)),
+        'rows_per_sec': rows / wall_median if wall_median > 0 else float('nan'),
+        'trials': trials
+    }
+
+
+# ORTAM, GEÇMİŞ VE TEMEL DEĞER
+
+def environment_info():
+    info = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+    for module in ('numpy', 'pandas', 'sklearn'):
+        try:
+            info[module] = __import__(module).__version__
+        except ImportError:
+            info[module] = None
+    try:
+        info['git_commit'] = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT_DIR, capture_output=True,
+                                            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        info['git_commit'] = None
+    return info
+
+
+def append_history(record, path=HISTORY_FILE):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+
+def save_baseline(record, path=BASELINE_FILE):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def check_regressions(record, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Her (aşama, boyut) için ortanca süreleri ve tepe belleği temel değerle karşılaştırır."""
+    reference = {(r['stage'], r['n_rows']): r for r in baseline['results']}
+    rows = []
+    for result in record['results']:
+        base = reference.get((result['stage'], result['n_rows']))
+        if base is None:
+            continue
+        for metric, min_delta in CHECKED_METRICS.items():
+            current, previous = result[metric], base[metric]
+            delta = current - previous
+            rows.append({
+                'Aşama': result['stage'],
+                'Satır': result['n_rows'],
+                'Metrik': metric,
+                'Temel': previous,
+                'Güncel': current,
+                'Oran': current / previous if previous else float('nan'),
+                'Regresyon': bool(delta > max(tolerance * previous, min_delta))
+            })
+    return pd.DataFrame(rows)
+
+
+# ANA AKIŞ
+
+def run_suite(sizes=SIZES, stages=STAGES, warmup=WARMUP, repeats=REPEATS, n_jobs=-1):
+    """Her boyut ve aşama için ısınma + tekrarlı denemeler çalıştırır ve özet kaydını döndürür."""
+    print(f"--- Performans Test Paketi Başlatılıyor (Boyutlar: {sizes}, Aşamalar: {stages}) ---")
+    results = []
+    for n_rows in sizes:
+        paths = workspace_paths(n_rows)
+        gen_start = time.time()
+        generate_housing_csv(paths['raw'], n_rows)
+        print(f"\n[n={n_rows:,}] Sentetik veri hazır ({time.time() - gen_start:.2f} saniye).")
+
+        # Model aşamaları seçilip ön işleme seçilmediyse işlenmiş setler ölçülmeden bir kez hazırlanır
+        needs_data = any(s != 'preprocessing' for s in stages)
+        if needs_data and 'preprocessing' not in stages and \
+                not os.path.exists(os.path.join(paths['processed'], 'splits_meta.json')):
+            run_trial('preprocessing', n_rows, n_jobs)
+
+        for stage in stages:
+            for _ in range(warmup):
+                run_trial(stage, n_rows, n_jobs)
+            trials = [run_trial(stage, n_rows, n_jobs) for _ in range(repeats)]
+            summary = summarize_trials(stage, n_rows, trials)
+            results.append(summary)
+            print(f"  {stage:<14} duvar {summary['wall_median']:9.3f} s | CPU {summary['cpu_median']:9.3f} s | "
+                  f"tepe RSS {summary['peak_rss_mb']:8.1f} MB | {summary['rows_per_sec']:,.0f} satır/s")
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'config': {'sizes': list(sizes), 'stages': list(stages), 'warmup': warmup, 'repeats': repeats, 'n_jobs': n_jobs},
+        'results': results
+    }
+
+
+def print_summary(record):
+    table = pd.DataFrame(record['results']).drop(columns=['trials'])
+    table = table.set_index(['stage', 'n_rows'])[
+        ['wall_median', 'wall_min', 'wall_max', 'cpu_median', 'peak_rss_mb', 'rows_per_sec']]
+    print("\n--- Performans Özeti (ortanca değerler) ---")
+    print(table.to_string(float_format=lambda v: f'{v:,.3f}'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ön işleme → eğitim → rapor hattı için tekrarlanabilir performans testi")
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--warmup', type=int, default=WARMUP, help="Ölçülmeyen ısınma denemesi sayısı")
+    parser.add_argument('--repeats', type=int, default=REPEATS, help="Ölçülen deneme sayısı")
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Model aşamalarının çekirdek sayısı")
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE,
+                        help="Regresyon eşiği (ör. 0.10 = %%10 yavaşlama)")
+    parser.add_argument('--save-baseline', action='store_true', help="Bu çalıştırmayı temel değer olarak kaydet")
+    parser.add_argument('--no-history', action='store_true', help="Sonuçları geçmiş dosyasına ekleme")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker(args.worker)
+        sys.exit(0)
+
+    record = run_suite(sizes=args.sizes, stages=args.stages, warmup=args.warmup,
+                       repeats=args.repeats, n_jobs=args.n_jobs)
+    print_summary(record)
+
+    if not args.no_history:
+        append_history(record)
+        print(f"\n[INFO] Sonuçlar '{HISTORY_FILE}' dosyasına eklendi.")
+
+    exit_code = 0
+    if os.path.exists(BASELINE_FILE) and not args.save_baseline:
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['environment'].get('cpu_count') != record['environment']['cpu_count']:
+            print("UYARI: Temel değer farklı çekirdek sayısına sahip bir makinede ölçülmüş.")
+        comparison = check_regressions(record, baseline, args.tolerance)
+        if not comparison.empty:
+            print("\n--- Temel Değer Karşılaştırması ---")
+            print(comparison.to_string(index=False, float_format=lambda v: f'{v:,.3f}'))
+            regressions = comparison[comparison['Regresyon']]
+            if not regressions.empty:
+                print(f"\nUYARI: {len(regressions)} metrikte regresyon tespit edildi (eşik: %{args.tolerance * 100:.0f}).")
+                exit_code = 1
+
+    if args.save_baseline:
+        save_baseline(record)
+        print(f"[INFO] Temel değer '{BASELINE_FILE}' olarak kaydedildi.")
+    sys.exit(exit_code)
@@ -0,0 +1,72 @@
+import pandas as pd
+import numpy as np
+import os
+
+
+# Ham housing.csv ile aynı sütun isimleri ve sırası
+RAW_COLUMNS = [
+    'longitude', 'latitude', 'housing_median_age', 'total_rooms', 'total_bedrooms',
+    'population', 'households', 'median_income', 'median_house_value', 'ocean_proximity'
+]
+OCEAN_CATEGORIES = ['<1H OCEAN', 'INLAND', 'NEAR OCEAN', 'NEAR BAY', 'ISLAND']
+OCEAN_PROBABILITIES = [0.443, 0.317, 0.129, 0.111, 0.0002]
+
+# Üretim sabit boyutlu parçalar halinde yapılır; her parçanın tohumu (seed, parça no) olduğu için
+# aynı satır sayısı her zaman aynı dosyayı üretir
+CHUNK_ROWS = 200_000
+MISSING_BEDROOM_RATE = 0.01
+
+
+def synthetic_housing_chunk(rng, n_rows):
+    """California housing verisinin dağılımlarına benzeyen sentetik ham satırlar üretir."""
+    probabilities = np.asarray(OCEAN_PROBABILITIES) / np.sum(OCEAN_PROBABILITIES)
+    ocean = rng.choice(len(OCEAN_CATEGORIES), size=n_rows, p=probabilities)
+
+    longitude = rng.uniform(-124.35, -114.31, n_rows)
+    latitude = np.clip(39.0 - 0.7 * (longitude + 121.0) + rng.normal(0, 1.2, n_rows), 32.54, 41.95)
+    housing_median_age = rng.integers(1, 53, n_rows).astype(np.float64)
+
+    households = np.round(rng.lognormal(6.0, 0.7, n_rows)) + 1
+    total_rooms = np.round(households * rng.lognormal(1.6, 0.25, n_rows))
+    total_bedrooms = np.round(total_rooms * rng.uniform(0.15, 0.28, n_rows))
+    total_bedrooms[rng.random(n_rows) < MISSING_BEDROOM_RATE] = np.nan
+    population = np.round(households * rng.lognormal(1.0, 0.3, n_rows))
+    median_income = np.clip(rng.lognormal(1.29, 0.45, n_rows), 0.5, 15.0)
+
+    # Hedef: gelir, kıyıya yakınlık ve konumla artar; orijinal veri gibi 500001'de kırpılır
+    ocean_effect = np.array([60_000, -40_000, 70_000, 80_000, 150_000])[ocean]
+    value = (40_000 * median_income + ocean_effect + 900 * housing_median_age
+             - 8_000 * (latitude - 34.0) + rng.normal(0, 45_000, n_rows))
+    median_house_value = np.clip(np.round(value), 14_999, 500_001)
+
+    return pd.DataFrame({
+        'longitude': np.round(longitude, 2),
+        'latitude': np.round(latitude, 2),
+        'housing_median_age': housing_median_age,
+        'total_rooms': total_rooms,
+        'total_bedrooms': total_bedrooms,
+        'population': population,
+        'households': households,
+        'median_income': np.round(median_income, 4),
+        'median_house_value': median_house_value,
+        'ocean_proximity': np.asarray(OCEAN_CATEGORIES, dtype=object)[ocean]
+    }, columns=RAW_COLUMNS)
+
+
+def generate_housing_csv(path, n_rows, seed=42):
+    """n_rows satırlık sentetik ham veri dosyasını parça parça yazar; dosya zaten varsa yeniden üretmez."""
+    if os.path.exists(path):
+        return path
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    written = 0
+    chunk_id = 0
+    while written < n_rows:
+        size = min(CHUNK_ROWS, n_rows - written)
+        chunk = synthetic_housing_chunk(np.random.default_rng([seed, chunk_id]), size)
+        chunk.to_csv(tmp_path, mode='w' if chunk_id == 0 else 'a', header=(chunk_id == 0), index=False)
+        written += size
+        chunk_id += 1
+    os.replace(tmp_path, path)
+    return path
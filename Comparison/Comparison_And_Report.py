@@ -1,110 +1,283 @@
 import pandas as pd
+import numpy as np
 import joblib
+import json
 import os
+import sys
 import matplotlib.pyplot as plt
 
+# Ortak veri yükleyici Preprocessing, model sınıfları (ör. FoldEnsembleRegressor) Modelling klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelling'))
+from Split_Store import load_splits
+from Metrics import bootstrap_metrics, CONFIDENCE
+from Tracing import span, traced
+from Model_Artifacts import load_model, model_path, artifact_stats
+
 
 # Modellerin ve sonuçların bulunduğu klasör yolu
 MODEL_DIR = '../Modelling/models'
 
 # Grafiklerin kaydedileceği klasör yolu
 OUTPUT_DIR = 'outputs'
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
 
-# VERİ VE SONUÇLARI YÜKLEME
+# Test seti (bootstrap güven aralıkları için gerçek değerler)
+DATA_PATH = "../data/processed_data/"
+
+# Permutation_Importance.py'nin models klasörüne yazdığı özet
+IMPORTANCE_FILE = 'permutation_importance.json'
+
+# Model kısaltmaları ve rapordaki isimleri
+MODEL_NAMES = {
+    'lr': 'Lineer Regresyon (LR)',
+    'rf': 'Random Forest (RF)',
+    'gbr': 'Gradient Boosting (GBR)'
+}
+
+# Varsa rapora eklenen isteğe bağlı modeller (ör. GradientBoosting.py --engine hist, Cascade.py)
+OPTIONAL_MODEL_NAMES = {
+    'gbr_hist': 'Gradient Boosting Hist (GBR-H)',
+    'cascade': 'Kaskad (LR → Ağaç)'
+}
+
 
-try:
-    # X_test ve y_test'i processed_data klasöründen yükle
-    X_test = pd.read_pickle("../data/processed_data/X_test.pkl")
-    y_test = pd.read_pickle("../data/processed_data/y_test.pkl")
+# VERİ VE SONUÇLARI YÜKLEME
 
-    results_lr = joblib.load(os.path.join(MODEL_DIR, 'results_lr.pkl'))
-    results_rf = joblib.load(os.path.join(MODEL_DIR, 'results_rf.pkl'))
-    results_gbr = joblib.load(os.path.join(MODEL_DIR, 'results_gbr.pkl'))
+def load_artifacts(model_dir=MODEL_DIR, data_path=DATA_PATH):
+    """
+    Test setini, kaydedilmiş modelleri ve sonuç sözlüklerini diskten yükler.
+    Güncel artefaktı olan modeller tembel yüklenir (yalnızca meta dosyası okunur, diziler ilk predict'te açılır).
+    """
+    # X_test ve y_test'i processed_data klasöründen yükle (memmap, kopyasız)
+    _, _, X_test, _, _, y_test = load_splits(data_path)
 
-    model_lr = joblib.load(os.path.join(MODEL_DIR, 'model_lr.pkl'))
-    model_rf = joblib.load(os.path.join(MODEL_DIR, 'model_rf.pkl'))
-    model_gbr = joblib.load(os.path.join(MODEL_DIR, 'model_gbr.pkl'))
+    keys = list(MODEL_NAMES) + [key for key in OPTIONAL_MODEL_NAMES
+                                if os.path.exists(os.path.join(model_dir, f'results_{key}.pkl'))]
+    results = {key: joblib.load(os.path.join(model_dir, f'results_{key}.pkl')) for key in keys}
+    # Kaskadın kendi model dosyası yoktur; alt modelleri (lr, rf/gbr) zaten yüklenir
+    models = {key: load_model(model_dir, key) for key in keys if os.path.exists(model_path(model_dir, key))}
+    return X_test, y_test, results, models
 
-except FileNotFoundError as e:
-    print(f"HATA: Dosya yüklenemedi. Lütfen 'models' ve 'processed_data' klasör yollarını kontrol edin. Hata: {e}")
-    exit()
 
 # SONUÇLARI BİRLEŞTİRME VE KARŞILAŞTIRMA
 
-# Metrikleri ve Süreleri Toplama
-comparison_data = {
-    'Lineer Regresyon (LR)': {
-        'R²': results_lr['test']['R2'],
-        'RMSE': results_lr['test']['RMSE'],
-        'MAE': results_lr['test']['MAE'],
-        'Eğitim Süresi (s)': results_lr['training_time']
-    },
-    'Random Forest (RF)': {
-        'R²': results_rf['test']['R2'],
-        'RMSE': results_rf['test']['RMSE'],
-        'MAE': results_rf['test']['MAE'],
-        'Eğitim Süresi (s)': results_rf['training_time']
-    },
-    'Gradient Boosting (GBR)': {
-        'R²': results_gbr['test']['R2'],
-        'RMSE': results_gbr['test']['RMSE'],
-        'MAE': results_gbr['test']['MAE'],
-        'Eğitim Süresi (s)': results_gbr['training_time']
-    }
-}
+def compute_intervals(results, data_path=DATA_PATH):
+    """
+    Test tahminleri saklanmış tüm modeller için eşleştirilmiş bootstrap güven aralıklarını tek seferde hesaplar.
+    Test seti veya tahminler yoksa boş sözlük döner.
+    """
+    predictions = {key: res['test_predictions'] for key, res in results.items() if 'test_predictions' in res}
+    if not predictions:
+        return {}
+    try:
+        _, _, _, _, _, y_test = load_splits(data_path)
+    except FileNotFoundError:
+        print(f"UYARI: Test seti '{data_path}' yolunda bulunamadı; güven aralıkları hesaplanmadı.")
+        return {}
+    return bootstrap_metrics(y_test.to_numpy(), predictions)
+
+
+def build_comparison_table(results, intervals=None, artifacts=None):
+    """
+    Model sonuç sözlüklerinden test metrikleri ve sürelerini içeren karşılaştırma tablosunu oluşturur.
+    intervals verilirse (compute_intervals) R² ve RMSE için güven aralığı sınırları eklenir.
+    artifacts verilirse (artifact_stats) model dosya boyutları ve yükleme süresi eklenir.
+    Kaskad sonucu varsa tüm modeller için Test setinde ölçülen satır başı tahmin maliyeti ve
+    kaskadın ağaç modeline yükselttiği satır oranı eklenir.
+    """
+    intervals = intervals or {}
+    artifacts = artifacts or {}
+    level = f'%{CONFIDENCE * 100:.0f}'
+    row_costs = results.get('cascade', {}).get('model_costs_us', {})
+
+    # Metrikleri ve Süreleri Toplama
+    names = {**MODEL_NAMES, **OPTIONAL_MODEL_NAMES}
+    comparison_data = {}
+    for key, res in results.items():
+        row = {
+            'R²': res['test']['R2'],
+            'RMSE': res['test']['RMSE'],
+            'MAE': res['test']['MAE'],
+            'MAPE': res['test'].get('MAPE', float('nan')),
+            'Eğitim Süresi (s)': res['training_time']
+        }
+        if key in intervals:
+            ci = intervals[key]
+            row.update({
+                f'R² {level} Alt': ci['R2'][0], f'R² {level} Üst': ci['R2'][1],
+                f'RMSE {level} Alt': ci['RMSE'][0], f'RMSE {level} Üst': ci['RMSE'][1],
+                'En İyi Olasılığı': ci['P_Best']
+            })
+        if key in artifacts:
+            art = artifacts[key]
+            row.update({
+                'Artefakt Boyutu (MB)': art['size_mb'],
+                'Pickle Boyutu (MB)': art['pickle_mb'],
+                'Yükleme Süresi (ms)': art['load_ms']
+            })
+        if 'cost_per_row_us' in res or key in row_costs:
+            row['Satır Başı Maliyet (µs)'] = res.get('cost_per_row_us', row_costs.get(key))
+            row['Yükseltilen Oran'] = res.get('escalated_fraction', float('nan'))
+        comparison_data[names[key]] = row
+
+    comparison_df = pd.DataFrame(comparison_data).T
+    return comparison_df.sort_values(by='R²', ascending=False)
+
+
+@traced('report')
+def create_report(results, output_dir=OUTPUT_DIR, data_path=DATA_PATH, model_dir=MODEL_DIR):
+    """
+    Karşılaştırma tablosunu yazdırır ve grafikleri kaydeder.
+    Sonuçlar doğrudan bellekten (ör. Train_All.py) veya diskten verilebilir.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    with span('report.intervals'):
+        intervals = compute_intervals(results, data_path)
+    with span('report.artifacts'):
+        artifacts = artifact_stats(model_dir, list(results))
+    comparison_df = build_comparison_table(results, intervals, artifacts)
+
+    print("--- MODELLERİN PERFORMANS KARŞILAŞTIRMASI ---")
+    print(comparison_df.applymap(lambda x: f'{x:,.4f}' if isinstance(x, (int, float)) else x))
+    names = {**MODEL_NAMES, **OPTIONAL_MODEL_NAMES}
+    optimistic = [names[key] for key, res in results.items() if res.get('validation_optimistic')]
+    if optimistic:
+        print(f"Not: {', '.join(optimistic)} için erken durdurma Validation setiyle seçildi; bu modellerin "
+              f"Validation metrikleri iyimserdir (tablodaki metrikler Test setine aittir).")
+
+
+    # GRAFİK OLUŞTURMA VE KAYDETME
+
+    plt.style.use('seaborn-v0_8-whitegrid')
+
+    # 1. Metriklerin Görsel Karşılaştırması (R², RMSE, MAE)
+    fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+    fig.suptitle('Regresyon Modelleri Performans Metrikleri Karşılaştırması (Test Seti)', fontsize=16)
+
+    metrics_to_plot = ['R²', 'RMSE', 'MAE']
+    metric_keys = {'R²': 'R2', 'RMSE': 'RMSE', 'MAE': 'MAE'}
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c']
+    keys_by_name = {name: key for key, name in {**MODEL_NAMES, **OPTIONAL_MODEL_NAMES}.items()}
+
+    for i, metric in enumerate(metrics_to_plot):
+        data = comparison_df[metric]
+
+        # Bootstrap güven aralıkları hata çubuğu olarak gösterilir
+        yerr = None
+        if intervals and all(keys_by_name[name] in intervals for name in data.index):
+            bounds = [intervals[keys_by_name[name]][metric_keys[metric]] for name in data.index]
+            yerr = [[v - lo for v, (lo, _) in zip(data.values, bounds)],
+                    [hi - v for v, (_, hi) in zip(data.values, bounds)]]
+        bars = axes[i].bar(data.index, data.values, color=colors[i], yerr=yerr, capsize=6)
+
+        if metric == 'R²':
+            axes[i].set_ylim(0.55, 0.70)
+            axes[i].set_title(f'{metric} (Yüksek İyidir)')
+        else:
+            axes[i].set_title(f'{metric} (Düşük İyidir)')
+
+        axes[i].tick_params(axis='x', rotation=45)
+        axes[i].bar_label(bars, fmt='%.4f')
+
+    plt.tight_layout(rect=[0, 0, 1, 0.96])
+    plt.savefig(os.path.join(output_dir, 'metrics_comparison_bar.png'))
+    plt.close(fig)  # Hafızayı temizle
+    print(f"\n[INFO] Metrik karşılaştırma grafiği '{output_dir}/metrics_comparison_bar.png' olarak kaydedildi.")
+
+
+
+    # 2. Eğitim Süresi Karşılaştırması
+    fig, ax = plt.subplots(figsize=(8, 6))
+    data = comparison_df['Eğitim Süresi (s)']
+    bars = ax.bar(data.index, data.values, color='#9467bd')
+    ax.set_title('Modellerin Eğitim Süresi Karşılaştırması (Saniye)')
+    ax.set_ylabel('Eğitim Süresi (s)')
+    ax.tick_params(axis='x', rotation=45)
+    ax.bar_label(bars, fmt='%.4f')
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'training_time_bar.png'))
+    plt.close(fig)  # Hafızayı temizle
+    print(f"[INFO] Eğitim süresi grafiği '{output_dir}/training_time_bar.png' olarak kaydedildi.")
+
+    # 3. Gradient Boosting Motor Karşılaştırması (Exact vs Histogram)
+    if 'gbr' in results and 'gbr_hist' in results:
+        plot_gbr_engine_speedup(results['gbr'], results['gbr_hist'], output_dir)
 
-comparison_df = pd.DataFrame(comparison_data).T
-comparison_df = comparison_df.sort_values(by='R²', ascending=False)
+    # 4. Permütasyon Önemi (tüm modeller için aynı ölçüt: R² düşüşü)
+    importance_path = os.path.join(model_dir, IMPORTANCE_FILE)
+    if os.path.exists(importance_path):
+        with open(importance_path, 'r', encoding='utf-8') as f:
+            plot_permutation_importance(json.load(f), output_dir)
 
-print("--- MODELLERİN PERFORMANS KARŞILAŞTIRMASI ---")
-print(comparison_df.applymap(lambda x: f'{x:,.4f}' if isinstance(x, (int, float)) else x))
 
+    print("\nKarşılaştırma ve raporlama tamamlandı.")
+    return comparison_df
 
-# GRAFİK OLUŞTURMA VE KAYDETME
 
-plt.style.use('seaborn-v0_8-whitegrid')
+def plot_gbr_engine_speedup(results_exact, results_hist, output_dir=OUTPUT_DIR):
+    """Exact ve histogram GBR motorlarının binleme/eğitim sürelerini ve R² değerlerini karşılaştırır."""
+    exact_time = results_exact.get('fit_time', results_exact['training_time'])
+    hist_total = results_hist['binning_time'] + results_hist['fit_time']
+    speedup = exact_time / hist_total if hist_total > 0 else float('nan')
 
-# 1. Metriklerin Görsel Karşılaştırması (R², RMSE, MAE)
-fig, axes = plt.subplots(1, 3, figsize=(18, 6))
-fig.suptitle('Regresyon Modelleri Performans Metrikleri Karşılaştırması (Test Seti)', fontsize=16)
+    fig, axes = plt.subplots(1, 2, figsize=(12, 6))
+    fig.suptitle(f'GBR Motor Karşılaştırması (Hızlanma: {speedup:.2f}x)', fontsize=14)
 
-metrics_to_plot = ['R²', 'RMSE', 'MAE']
-colors = ['#1f77b4', '#ff7f0e', '#2ca02c']
+    labels = ['Exact', f"Hist ({results_hist.get('best_iteration') or results_hist['n_iter']} iter.)"]
+    axes[0].bar(labels, [exact_time, 0], color='#9467bd', label='Eğitim')
+    axes[0].bar(labels, [0, results_hist['fit_time']], color='#9467bd')
+    bars = axes[0].bar(labels, [0, results_hist['binning_time']], bottom=[0, results_hist['fit_time']],
+                       color='#c5b0d5', label='Binleme')
+    axes[0].bar_label(bars, labels=[f'{exact_time:.4f}', f'{hist_total:.4f}'])
+    axes[0].set_title('Eğitim Süresi (s)')
+    axes[0].legend()
 
-for i, metric in enumerate(metrics_to_plot):
-    data = comparison_df[metric]
-    bars = axes[i].bar(data.index, data.values, color=colors[i])
+    bars = axes[1].bar(labels, [results_exact['test']['R2'], results_hist['test']['R2']], color='#1f77b4')
+    axes[1].bar_label(bars, fmt='%.4f')
+    axes[1].set_title('Test R²')
 
-    if metric == 'R²':
-        axes[i].set_ylim(0.55, 0.70)
-        axes[i].set_title(f'{metric} (Yüksek İyidir)')
-    else:
-        axes[i].set_title(f'{metric} (Düşük İyidir)')
+    plt.tight_layout(rect=[0, 0, 1, 0.94])
+    plt.savefig(os.path.join(output_dir, 'gbr_engine_speedup.png'))
+    plt.close(fig)  # Hafızayı temizle
+    print(f"[INFO] GBR motor karşılaştırma grafiği '{output_dir}/gbr_engine_speedup.png' olarak kaydedildi.")
 
-    axes[i].tick_params(axis='x', rotation=45)
-    axes[i].bar_label(bars, fmt='%.4f')
 
-plt.tight_layout(rect=[0, 0, 1, 0.96])
-plt.savefig(os.path.join(OUTPUT_DIR, 'metrics_comparison_bar.png'))
-plt.close(fig)  # Hafızayı temizle
-print(f"\n[INFO] Metrik karşılaştırma grafiği '{OUTPUT_DIR}/metrics_comparison_bar.png' olarak kaydedildi.")
+def plot_permutation_importance(importances, output_dir=OUTPUT_DIR, split='test'):
+    """Modellerin permütasyon önemlerini (R² düşüşü, tekrarlar arası std ile) yan yana çizer."""
+    names = {**MODEL_NAMES, **OPTIONAL_MODEL_NAMES}
+    entries = {key: res[split] for key, res in importances.items() if split in res}
+    if not entries:
+        return
 
+    features = next(iter(entries.values()))['features']
+    means = pd.DataFrame({names.get(k, k): e['importances_mean'] for k, e in entries.items()}, index=features)
+    stds = pd.DataFrame({names.get(k, k): e['importances_std'] for k, e in entries.items()}, index=features)
+    order = means.max(axis=1).sort_values().index
+    means, stds = means.loc[order], stds.loc[order]
 
+    fig, ax = plt.subplots(figsize=(10, max(6, 0.5 * len(features) * len(entries) / 2)))
+    height = 0.8 / len(means.columns)
+    positions = np.arange(len(means))
+    for i, column in enumerate(means.columns):
+        ax.barh(positions + i * height, means[column], height=height, xerr=stds[column], capsize=3, label=column)
+    ax.set_yticks(positions + height * (len(means.columns) - 1) / 2)
+    ax.set_yticklabels(means.index)
+    ax.set_xlabel('R² Düşüşü')
+    ax.set_title(f'Permütasyon Önemi ({split.capitalize()} Seti)')
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig(os.path.join(output_dir, 'permutation_importance.png'))
+    plt.close(fig)  # Hafızayı temizle
+    print(f"[INFO] Permütasyon önemi grafiği '{output_dir}/permutation_importance.png' olarak kaydedildi.")
 
-# 2. Eğitim Süresi Karşılaştırması
-fig, ax = plt.subplots(figsize=(8, 6))
-data = comparison_df['Eğitim Süresi (s)']
-bars = ax.bar(data.index, data.values, color='#9467bd')
-ax.set_title('Modellerin Eğitim Süresi Karşılaştırması (Saniye)')
-ax.set_ylabel('Eğitim Süresi (s)')
-ax.tick_params(axis='x', rotation=45)
-ax.bar_label(bars, fmt='%.4f')
-plt.tight_layout()
-plt.savefig(os.path.join(OUTPUT_DIR, 'training_time_bar.png'))
-plt.close(fig)  # Hafızayı temizle
-print(f"[INFO] Eğitim süresi grafiği '{OUTPUT_DIR}/training_time_bar.png' olarak kaydedildi.")
 
+if __name__ == "__main__":
+    try:
+        X_test, y_test, results, models = load_artifacts()
+    except FileNotFoundError as e:
+        print(f"HATA: Dosya yüklenemedi. Lütfen 'models' ve 'processed_data' klasör yollarını kontrol edin. Hata: {e}")
+        exit()
 
-print("\nKarşılaştırma ve raporlama tamamlandı.")
\ No newline at end of file
+    create_report(results)
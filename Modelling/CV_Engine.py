@@ -0,0 +1,132 @@
+import numpy as np
+import time
+import os
+import sys
+from joblib import Parallel, delayed
+from sklearn.base import BaseEstimator, RegressorMixin, clone
+from sklearn.model_selection import KFold
+from sklearn.metrics import r2_score
+
+# İzleme yardımcıları Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Tracing import span, worker_spans, absorb
+
+
+# Fold bölünmeleri (n_samples, n_splits, shuffle, random_state) anahtarıyla süreç başına bir kez hesaplanır.
+# KFold deterministik ve ucuz olduğu için diske yazılmaz.
+_FOLD_CACHE = {}
+
+
+def get_folds(n_samples, n_splits=5, shuffle=False, random_state=None):
+    """
+    (train_idx, test_idx) çiftlerini döndürür. Varsayılan ayarlar cross_val_score(cv=5)
+    ile aynı KFold bölünmesini üretir.
+    """
+    key = (n_samples, n_splits, shuffle, random_state if shuffle else None)
+    if key in _FOLD_CACHE:
+        return _FOLD_CACHE[key]
+
+    # Her satırın hangi fold'un test kısmında olduğunu tek bir dizide tut
+    fold_ids = np.empty(n_samples, dtype=np.int8)
+    kfold = KFold(n_splits=n_splits, shuffle=shuffle, random_state=random_state if shuffle else None)
+    for k, (_, test_idx) in enumerate(kfold.split(np.empty((n_samples, 1)))):
+        fold_ids[test_idx] = k
+
+    folds = [(np.flatnonzero(fold_ids != k), np.flatnonzero(fold_ids == k)) for k in range(n_splits)]
+    _FOLD_CACHE[key] = folds
+    return folds
+
+
+def _take_rows(X, idx):
+    return X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
+
+
+def _fit_fold(model, X, y, train_idx, test_idx):
+    """
+    Tek bir fold için modeli eğitir ve dışarıda kalan (out-of-fold) kısmı tahmin eder.
+    İşçi süreçte toplanan izleme aralıkları da sonuçla birlikte döndürülür.
+    """
+    fold_model = clone(model)
+
+    with span('cv.fold_fit', rows=len(train_idx)):
+        start_time = time.time()
+        fold_model.fit(_take_rows(X, train_idx), _take_rows(y, train_idx))
+        fit_time = time.time() - start_time
+
+    with span('cv.fold_predict', rows=len(test_idx)):
+        start_time = time.time()
+        y_pred = fold_model.predict(_take_rows(X, test_idx))
+        predict_time = time.time() - start_time
+
+    return fold_model, y_pred, fit_time, predict_time, worker_spans()
+
+
+def cross_validate_model(model, X, y, folds, n_jobs=1, keep_models=False):
+    """
+    Verilen fold'lar üzerinde çapraz doğrulama yapar.
+    Skorların yanında out-of-fold tahminlerini ve fold bazında süreleri döndürür;
+    keep_models=True ise fold modelleri de döndürülür (FoldEnsembleRegressor için).
+    """
+    with span('cv', folds=len(folds), rows=len(y)):
+        outputs = Parallel(n_jobs=n_jobs)(
+            delayed(_fit_fold)(model, X, y, train_idx, test_idx) for train_idx, test_idx in folds
+        )
+        for out in outputs:
+            absorb(out[4])
+
+    y_true = np.asarray(y)
+    oof_predictions = np.empty(len(y_true), dtype=np.float64)
+    scores = []
+    for (_, test_idx), (_, y_pred, _, _, _) in zip(folds, outputs):
+        oof_predictions[test_idx] = y_pred
+        scores.append(r2_score(y_true[test_idx], y_pred))
+
+    cv_results = {
+        'scores': np.array(scores),
+        'oof_predictions': oof_predictions,
+        'fold_fit_times': [out[2] for out in outputs],
+        'fold_predict_times': [out[3] for out in outputs]
+    }
+    if keep_models:
+        cv_results['models'] = [out[0] for out in outputs]
+    return cv_results
+
+
+class FoldEnsembleRegressor(BaseEstimator, RegressorMixin):
+    """
+    Çapraz doğrulamada eğitilmiş fold modellerinin tahminlerinin ortalamasını alan model.
+    Tüm veri üzerinde ayrıca (altıncı) bir eğitim yapılmasına gerek bırakmaz.
+    Genellikle cross_validate_model(keep_models=True) çıktısından oluşturulur; fit() ise her modeli
+    klonlayıp kendi fold'unun Train kısmında yeniden eğitir (clone(...).fit ve sklearn araçları için).
+    """
+
+    def __init__(self, estimators=None, folds=None):
+        self.estimators = estimators
+        self.folds = folds
+
+    def fit(self, X, y):
+        """
+        k. model k. fold'un Train kısmında eğitilir. folds verilmemişse get_folds ile model sayısı kadar
+        KFold bölünmesi kullanılır (eğitim betiklerinin cross_validate_model çağrısıyla aynı bölünme).
+        """
+        folds = self.folds if self.folds is not None else get_folds(len(y), n_splits=len(self.estimators))
+        if len(folds) != len(self.estimators):
+            raise ValueError(f"Fold sayısı ({len(folds)}) model sayısıyla ({len(self.estimators)}) aynı olmalı.")
+        self.estimators = [clone(est).fit(_take_rows(X, train_idx), _take_rows(y, train_idx))
+                           for est, (train_idx, _) in zip(self.estimators, folds)]
+        return self
+
+    def predict(self, X):
+        return np.mean([est.predict(X) for est in self.estimators], axis=0)
+
+    @property
+    def feature_importances_(self):
+        return np.mean([est.feature_importances_ for est in self.estimators], axis=0)
+
+    @property
+    def coef_(self):
+        return np.mean([est.coef_ for est in self.estimators], axis=0)
+
+    @property
+    def intercept_(self):
+        return np.mean([est.intercept_ for est in self.estimators], axis=0)
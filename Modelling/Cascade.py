@@ -0,0 +1,241 @@
+import numpy as np
+import json
+import time
+import os
+import sys
+import argparse
+import joblib
+
+# Ortak veri yükleyici ve zamanlama yardımcısı Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Transform_Benchmark import time_call
+from Metrics import calculate_metrics
+from Model_Artifacts import load_model, model_path
+from Tracing import span, traced
+
+
+# Gecikme duyarlı model kaskadı: her satır önce ucuz Lineer Regresyon ile tahmin edilir; küçük bir doğrusal
+# kapı LR'nin mutlak hatasını (özellikler + LR tahmini ve karesi üzerinden) tahmin eder. Tahmini hata eşiği
+# aşan satırlar uzman ağaç modeline (RF veya GBR) yükseltilir. Kapı ve eşik Validation setinde öğrenilir:
+#   - doğruluk hedefi: hedef R²'ye ulaşan en küçük yükseltme oranı (varsayılan: uzman R²'sinin MAX_R2_LOSS altı)
+#   - gecikme bütçesi: satır başı maliyet bütçesini aşmayan oranlar içinde en yüksek R²
+# Satır başı maliyetler (LR, kapı, uzman) Validation setinde ölçülür.
+
+DATA_PATH = "../data/processed_data/"
+MODEL_DIR = 'models'
+CASCADE_FILE = 'cascade.json'
+EXPERTS = ('rf', 'gbr')
+MAX_R2_LOSS = 0.005
+
+# Eşik araması: Validation satırlarının yükseltilme oranı bu adımlarla taranır
+FRACTION_STEPS = 201
+
+
+class CascadeRegressor:
+    """LR tahmini + doğrusal hata kapısı; kapı skoru eşiği aşan satırlar uzman modele gönderilir."""
+
+    def __init__(self, base, expert, gate_coef, gate_intercept, pred_scale, threshold, feature_names,
+                 expert_key='gbr'):
+        self.base = base
+        self.expert = expert
+        self.gate_coef = np.asarray(gate_coef, dtype=np.float64)
+        self.gate_intercept = float(gate_intercept)
+        self.pred_scale = float(pred_scale)
+        self.threshold = float(threshold)
+        self.feature_names = [str(c) for c in feature_names]
+        self.expert_key = expert_key
+
+    def _values(self, X):
+        if hasattr(X, 'iloc'):
+            X = X[self.feature_names]
+        return np.asarray(X, dtype=np.float64)
+
+    def gate_score(self, X, base_pred):
+        """Satır başına tahmini |y - ŷ_LR|."""
+        z = base_pred / self.pred_scale
+        return self._values(X) @ self.gate_coef[:-2] + z * self.gate_coef[-2] + z ** 2 * self.gate_coef[-1] \
+            + self.gate_intercept
+
+    def predict(self, X, return_mask=False):
+        predictions = np.asarray(self.base.predict(X), dtype=np.float64)
+        mask = self.gate_score(X, predictions) >= self.threshold
+        if mask.any():
+            rows = X.iloc[mask] if hasattr(X, 'iloc') else X[mask]
+            predictions[mask] = self.expert.predict(rows)
+        return (predictions, mask) if return_mask else predictions
+
+    # KAYIT VE YÜKLEME (alt modeller kopyalanmaz; model_<key> dosyalarından yüklenir)
+
+    def config(self):
+        return {
+            'expert': self.expert_key,
+            'gate_coef': self.gate_coef.tolist(),
+            'gate_intercept': self.gate_intercept,
+            'pred_scale': self.pred_scale,
+            'threshold': self.threshold,
+            'feature_names': self.feature_names
+        }
+
+    def save(self, model_dir=MODEL_DIR, extra=None):
+        with open(os.path.join(model_dir, CASCADE_FILE), 'w', encoding='utf-8') as f:
+            json.dump({**self.config(), **(extra or {})}, f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, model_dir=MODEL_DIR):
+        with open(os.path.join(model_dir, CASCADE_FILE), 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(load_model(model_dir, 'lr'), load_model(model_dir, config['expert']), config['gate_coef'],
+                   config['gate_intercept'], config['pred_scale'], config['threshold'], config['feature_names'],
+                   expert_key=config['expert'])
+
+
+def fit_gate(X, base_pred, y):
+    """LR'nin mutlak hatasını özellikler, ölçeklenmiş LR tahmini ve karesi üzerinden en küçük kareler ile tahmin eder."""
+    pred_scale = float(np.std(base_pred)) or 1.0
+    z = base_pred / pred_scale
+    Z = np.column_stack([np.asarray(X, dtype=np.float64), z, z ** 2, np.ones(len(z))])
+    solution, *_ = np.linalg.lstsq(Z, np.abs(y - base_pred), rcond=None)
+    return solution[:-1], solution[-1], pred_scale
+
+
+def escalation_curve(y, base_pred, expert_pred, scores):
+    """
+    En yüksek kapı skorlu k satır yükseltildiğinde (k = 0..n) R² eğrisi.
+    Hata kareleri toplamı kümülatif toplamlarla tüm k değerleri için tek geçişte hesaplanır.
+    """
+    order = np.argsort(-scores, kind='stable')
+    base_sq = ((y - base_pred) ** 2)[order]
+    expert_sq = ((y - expert_pred) ** 2)[order]
+    sse = base_sq.sum() - np.concatenate([[0.0], np.cumsum(base_sq)]) + np.concatenate([[0.0], np.cumsum(expert_sq)])
+    sst = float(((y - y.mean()) ** 2).sum())
+    return order, 1.0 - sse / sst
+
+
+def choose_threshold(scores, order, r2_curve, costs, target_r2=None, budget_us=None):
+    """
+    Hedefe göre yükseltilecek satır sayısını (k) seçer ve kapı eşiğine çevirir.
+    costs: {'base': µs, 'gate': µs, 'expert': µs} satır başı maliyetler.
+    """
+    n = len(scores)
+    ks = np.linspace(0, n, min(FRACTION_STEPS, n + 1)).round().astype(int)
+    cost_curve = costs['base'] + costs['gate'] + ks / max(n, 1) * costs['expert']
+
+    if budget_us is not None:
+        feasible = cost_curve <= budget_us
+        k = int(ks[feasible][np.argmax(r2_curve[ks][feasible])]) if feasible.any() else 0
+    else:
+        reached = r2_curve[ks] >= target_r2
+        k = int(ks[np.argmax(reached)]) if reached.any() else n
+
+    threshold = np.inf if k == 0 else float(scores[order[k - 1]])
+    return threshold, k
+
+
+def per_row_cost_us(fn, n_rows, min_time):
+    seconds, _ = time_call(fn, min_time)
+    return seconds / max(n_rows, 1) * 1e6
+
+
+@traced('cascade')
+def run_cascade(data_path=DATA_PATH, model_dir=MODEL_DIR, experts=EXPERTS, target_r2=None, max_r2_loss=MAX_R2_LOSS,
+                budget_us=None, min_time=0.2):
+    """
+    Kaydedilmiş LR ve ağaç modellerinden kaskadı Validation setinde kurar, Test setinde değerlendirir,
+    cascade.json ve results_cascade.pkl dosyalarını kaydeder.
+    target_r2 / max_r2_loss: doğruluk hedefi; budget_us: satır başı gecikme bütçesi (verilirse öncelikli).
+    """
+    print("--- Model Kaskadı (LR -> Ağaç Modeli) Başlatılıyor ---")
+    try:
+        _, X_val, X_test, _, y_val, y_test = load_splits(data_path)
+    except FileNotFoundError:
+        print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
+        return
+
+    available = [key for key in ('lr',) + tuple(experts) if os.path.exists(model_path(model_dir, key))]
+    if 'lr' not in available or len(available) < 2:
+        print(f"HATA: '{model_dir}' klasöründe model_lr ve en az bir ağaç modeli bulunmalı.")
+        return
+    models = {key: load_model(model_dir, key) for key in available}
+    y_val_true = np.asarray(y_val, dtype=np.float64)
+
+    # 1. VALIDATION TAHMİNLERİ VE SATIR BAŞI MALİYETLER
+    start_time = time.time()
+    with span('cascade.validation_predict', rows=len(X_val)):
+        val_preds = {key: np.asarray(model.predict(X_val), dtype=np.float64) for key, model in models.items()}
+        val_costs = {key: per_row_cost_us(lambda m=model: m.predict(X_val), len(X_val), min_time)
+                     for key, model in models.items()}
+
+    # 2. KAPI (LR hata tahmincisi)
+    gate_coef, gate_intercept, pred_scale = fit_gate(X_val, val_preds['lr'], y_val_true)
+    probe = CascadeRegressor(models['lr'], None, gate_coef, gate_intercept, pred_scale, np.inf, X_val.columns)
+    scores = probe.gate_score(X_val, val_preds['lr'])
+    gate_cost = per_row_cost_us(lambda: probe.gate_score(X_val, val_preds['lr']), len(X_val), min_time)
+
+    # 3. UZMAN VE EŞİK SEÇİMİ
+    candidates = []
+    for key in available[1:]:
+        order, r2_curve = escalation_curve(y_val_true, val_preds['lr'], val_preds[key], scores)
+        target = target_r2 if target_r2 is not None else r2_curve[-1] - max_r2_loss
+        costs = {'base': val_costs['lr'], 'gate': gate_cost, 'expert': val_costs[key]}
+        threshold, k = choose_threshold(scores, order, r2_curve, costs, target_r2=target, budget_us=budget_us)
+        cost = costs['base'] + costs['gate'] + k / len(scores) * costs['expert']
+        candidates.append({'expert': key, 'threshold': threshold, 'val_r2': float(r2_curve[k]),
+                           'val_fraction': k / len(scores), 'val_cost_us': cost, 'target_r2': float(target)})
+        print(f"[{key}] Validation R²: {r2_curve[k]:.4f} | Yükseltilen Oran: {k / len(scores):.2%} | "
+              f"Satır Başı Maliyet: {cost:.3f} µs")
+
+    # Bütçe modunda en yüksek R², doğruluk modunda hedefe ulaşanlar içinde en düşük maliyet
+    if budget_us is not None:
+        best = max(candidates, key=lambda c: c['val_r2'])
+    else:
+        reached = [c for c in candidates if c['val_r2'] >= c['target_r2']] or candidates
+        best = min(reached, key=lambda c: c['val_cost_us'])
+    cascade = CascadeRegressor(models['lr'], models[best['expert']], gate_coef, gate_intercept, pred_scale,
+                               best['threshold'], X_val.columns, expert_key=best['expert'])
+    training_time = time.time() - start_time
+
+    # 4. TEST DEĞERLENDİRMESİ (maliyetler Test setinde yeniden ölçülür)
+    with span('cascade.test_predict', rows=len(X_test)):
+        y_test_pred, mask = cascade.predict(X_test, return_mask=True)
+    test_metrics = calculate_metrics(y_test, y_test_pred)
+    cost_us = per_row_cost_us(lambda: cascade.predict(X_test), len(X_test), min_time)
+    model_costs = {key: per_row_cost_us(lambda m=model: m.predict(X_test), len(X_test), min_time)
+                   for key, model in models.items()}
+
+    print(f"\nSeçilen Uzman: {best['expert']} | Kapı Eşiği (tahmini |hata|): {best['threshold']:,.2f}")
+    print("\n--- Test Metrikleri ---")
+    print(f"R²: {test_metrics['R2']:.4f}")
+    print(f"RMSE: {test_metrics['RMSE']:,.2f}")
+    print(f"Yükseltilen Oran: {mask.mean():.2%} | Satır Başı Maliyet: {cost_us:.3f} µs "
+          f"(LR: {model_costs['lr']:.3f} µs, {best['expert']}: {model_costs[best['expert']]:.3f} µs)")
+
+    results_cascade = {
+        'training_time': training_time,
+        'test': test_metrics,
+        'test_predictions': y_test_pred,
+        'expert': best['expert'],
+        'threshold': best['threshold'],
+        'escalated_fraction': float(mask.mean()),
+        'cost_per_row_us': cost_us,
+        'model_costs_us': model_costs,
+        'candidates': candidates
+    }
+    cascade.save(model_dir, extra={'validation': best})
+    joblib.dump(results_cascade, os.path.join(model_dir, 'results_cascade.pkl'))
+
+    print(f"\n[INFO] Kaskad yapılandırması ve sonuçları '{model_dir}' klasörüne kaydedildi.")
+    print("--- Model Kaskadı Tamamlandı ---")
+    return cascade, results_cascade
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LR -> ağaç modeli kaskadını Validation setinde ayarlar")
+    parser.add_argument('--target-r2', type=float, default=None, help="Validation R² hedefi")
+    parser.add_argument('--max-r2-loss', type=float, default=MAX_R2_LOSS,
+                        help="Hedef verilmezse: uzman modelin R²'sinden en fazla bu kadar düşüş")
+    parser.add_argument('--budget-us', type=float, default=None, help="Satır başı gecikme bütçesi (mikrosaniye)")
+    parser.add_argument('--experts', nargs='+', default=list(EXPERTS))
+    args = parser.parse_args()
+
+    run_cascade(experts=args.experts, target_r2=args.target_r2, max_r2_loss=args.max_r2_loss, budget_us=args.budget_us)
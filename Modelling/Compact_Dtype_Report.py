@@ -0,0 +1,137 @@
+import pandas as pd
+import numpy as np
+import time
+import json
+import os
+import sys
+import argparse
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
+# Ortak veri yükleyici Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits, onehot_groups, compact_dtypes, collapse_onehot
+from Data_Processing import CATEGORICAL_FEATURES
+from Metrics import calculate_metrics
+from RandomForest import RF_PARAMS
+from GradientBoosting import GBR_PARAMS
+
+
+DATA_PATH = "../data/processed_data/"
+MODEL_DIR = 'models'
+REPORT_FILE = 'compact_dtype_report.json'
+
+# Modeller, hiperparametreleri eğitim betiklerinden alınarak kurulur
+MODELS = {
+    'lr': lambda n_jobs: LinearRegression(),
+    'rf': lambda n_jobs: RandomForestRegressor(**RF_PARAMS, n_jobs=n_jobs),
+    'gbr': lambda n_jobs: GradientBoostingRegressor(**GBR_PARAMS)
+}
+
+# Tamsayı kod sütunu yalnızca ağaç modellerinde anlamlıdır (LR için sıralı kod yanlış bir doğrusal ilişki kurar)
+TREE_MODELS = ('rf', 'gbr')
+
+
+def build_variants(data):
+    """
+    Aynı setlerin üç temsilini hazırlar:
+      float64: eski yoğun temsil (tüm hücreler 8 bayt)
+      compact: float32 özellikler, uint8 one-hot sütunları, float32 hedef
+      code:    compact + her one-hot bloğu tek bir uint8 kod sütunu (ağaç modelleri)
+    """
+    X_train, X_val, X_test, y_train, y_val, y_test = data
+    groups = onehot_groups(X_train.columns, CATEGORICAL_FEATURES)
+    dtypes = compact_dtypes(X_train.columns, groups)
+
+    def wide(X, y):
+        return X.astype(np.float64), y.astype(np.float64)
+
+    def compact(X, y):
+        return X.astype(dtypes), y.astype(np.float32)
+
+    def code(X, y):
+        X_c, y_c = compact(X, y)
+        return collapse_onehot(X_c, groups), y_c
+
+    variants = {}
+    for name, convert in (('float64', wide), ('compact', compact), ('code', code)):
+        variants[name] = {split: convert(X, y) for split, (X, y) in
+                          (('train', (X_train, y_train)), ('val', (X_val, y_val)), ('test', (X_test, y_test)))}
+    return variants
+
+
+def frame_bytes(X, y):
+    return int(X.memory_usage(index=False, deep=True).sum() + y.to_numpy().nbytes)
+
+
+def time_fit(key, X, y, n_jobs, repeats):
+    """Modeli `repeats` kez eğitir; en kısa süre ve son modeli döndürür."""
+    best, model = np.inf, None
+    for _ in range(repeats):
+        model = MODELS[key](n_jobs)
+        start = time.perf_counter()
+        model.fit(X, y)
+        best = min(best, time.perf_counter() - start)
+    return model, best
+
+
+def run_compact_dtype_report(data_path=DATA_PATH, model_dir=MODEL_DIR, models=tuple(MODELS), n_jobs=-1, repeats=1):
+    """Her model için kompakt temsilin bellek, eğitim süresi ve R² üzerindeki etkisini ölçer."""
+    print("--- Kompakt Veri Tipi Karşılaştırması Başlatılıyor ---")
+    try:
+        data = load_splits(data_path)
+    except FileNotFoundError:
+        print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
+        return
+
+    variants = build_variants(data)
+    memory = {name: frame_bytes(*splits['train']) for name, splits in variants.items()}
+    print("\n--- Train Seti Bellek Kullanımı ---")
+    for name, size in memory.items():
+        saved = 1 - size / memory['float64']
+        print(f"{name:>8}: {size / 1024 ** 2:8.2f} MB | Tasarruf: {saved:.1%}")
+
+    rows = []
+    for key in models:
+        for name in ('float64', 'compact', 'code'):
+            if name == 'code' and key not in TREE_MODELS:
+                continue
+            splits = variants[name]
+            model, fit_time = time_fit(key, *splits['train'], n_jobs, repeats)
+            val_metrics = calculate_metrics(splits['val'][1], model.predict(splits['val'][0]))
+            test_metrics = calculate_metrics(splits['test'][1], model.predict(splits['test'][0]))
+            rows.append({
+                'model': key, 'representation': name,
+                'train_bytes': memory[name], 'fit_time': fit_time,
+                'val_r2': val_metrics['R2'], 'test_r2': test_metrics['R2'], 'test_rmse': test_metrics['RMSE']
+            })
+            print(f"[{key}/{name}] Eğitim: {fit_time:.4f} s | Val R²: {val_metrics['R2']:.4f} | "
+                  f"Test R²: {test_metrics['R2']:.4f}")
+
+    # Her satır, aynı modelin float64 sonucuna göre fark olarak da raporlanır
+    report = pd.DataFrame(rows)
+    baseline = report[report['representation'] == 'float64'].set_index('model')
+    report['memory_saved'] = 1 - report['train_bytes'] / report['model'].map(baseline['train_bytes'])
+    report['fit_speedup'] = report['model'].map(baseline['fit_time']) / report['fit_time']
+    report['delta_test_r2'] = report['test_r2'] - report['model'].map(baseline['test_r2'])
+
+    print("\n--- Özet (float64 temsiline göre) ---")
+    print(report[['model', 'representation', 'memory_saved', 'fit_time', 'fit_speedup',
+                  'test_r2', 'delta_test_r2']].to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    if not os.path.exists(model_dir):
+        os.makedirs(model_dir)
+    with open(os.path.join(model_dir, REPORT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(report.to_dict(orient='records'), f, ensure_ascii=False, indent=2)
+    print(f"\n[INFO] Karşılaştırma '{model_dir}/{REPORT_FILE}' olarak kaydedildi.")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="float64 ve kompakt (float32/uint8/kod) temsillerin karşılaştırması")
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=list(MODELS))
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--repeats', type=int, default=1, help="Her eğitim bu kadar tekrarlanır, en kısa süre alınır")
+    args = parser.parse_args()
+
+    run_compact_dtype_report(models=args.models, n_jobs=args.n_jobs, repeats=args.repeats)
@@ -0,0 +1,225 @@
+import pandas as pd
+import numpy as np
+import joblib
+import os
+import argparse
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.dummy import DummyRegressor
+
+from CV_Engine import FoldEnsembleRegressor
+
+
+# Derlenmiş ağaç topluluğu: tüm ağaçların düğümleri tek bir ardışık dizi kümesinde paketlenir
+#   feature, threshold, left, right : iç düğümler (yapraklar kendilerine döner, ek adımlar etkisizdir)
+#   value                           : yaprak katkısı (RF için 1/n_trees, GBR için learning_rate ile ölçeklenmiş)
+#   roots                           : her ağacın kök düğümünün paket içindeki konumu
+# Tahmin = base + Σ_ağaçlar value[yaprak]; bir partideki tüm (satır, ağaç) çiftleri aynı anda ilerletilir.
+
+MODEL_DIR = 'models'
+COMPILED_FILE_PATTERN = 'compiled_{key}.npz'
+
+# Bir adımda ilerletilen en fazla (satır x ağaç) çifti; büyük partiler satır parçalarına bölünür
+CHUNK_ELEMENTS = 1 << 20
+
+# Yaprak kontrolü (tüm çiftler yaprağa ulaştı mı) her bu kadar adımda bir yapılır
+LEAF_CHECK_EVERY = 4
+
+
+def _round_down_float32(threshold):
+    """
+    Eşikleri float32'ye aşağı yuvarlar. sklearn X'i float32'ye çevirip float64 eşikle karşılaştırır;
+    float32 bir x için x <= t ile x <= (t'den küçük/eşit en büyük float32) aynı sonucu verir.
+    """
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _tree_arrays(tree):
+    """Tek bir sklearn ağacının (tree_) düğüm dizileri; yapraklar kendilerine döner."""
+    left = tree.children_left.astype(np.int32)
+    right = tree.children_right.astype(np.int32)
+    feature = tree.feature.astype(np.int32)
+    threshold = tree.threshold.astype(np.float64)
+    value = tree.value[:, 0, 0].astype(np.float64)
+
+    nodes = np.arange(tree.node_count, dtype=np.int32)
+    leaf = left == -1
+    left[leaf] = nodes[leaf]
+    right[leaf] = nodes[leaf]
+    feature[leaf] = 0
+    threshold[leaf] = 0.0
+    return feature, threshold, left, right, value, int(tree.max_depth)
+
+
+def _collect_trees(model, weight=1.0):
+    """(ağaç, ağırlık) çiftleri ve sabit terim; fold topluluğunda her modelin katkısı ortalanır."""
+    if isinstance(model, RandomForestRegressor):
+        trees = [est.tree_ for est in model.estimators_]
+        return [(tree, weight / len(trees)) for tree in trees], 0.0
+
+    if isinstance(model, GradientBoostingRegressor):
+        if isinstance(model.init_, str) and model.init_ == 'zero':
+            base = 0.0
+        elif isinstance(model.init_, DummyRegressor):
+            base = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise TypeError("Yalnızca sabit başlangıç tahminli (init=None/'zero') GradientBoostingRegressor derlenebilir.")
+        trees = [est.tree_ for est in model.estimators_[:, 0]]
+        return [(tree, weight * model.learning_rate) for tree in trees], weight * base
+
+    if isinstance(model, FoldEnsembleRegressor):
+        collected, base = [], 0.0
+        for est in model.estimators:
+            trees, est_base = _collect_trees(est, weight / len(model.estimators))
+            collected.extend(trees)
+            base += est_base
+        return collected, base
+
+    raise TypeError(f"Derlenemeyen model tipi: {type(model).__name__} (RandomForest/GradientBoosting beklenir).")
+
+
+class CompiledForest:
+    """Paketlenmiş düğüm dizileri üzerinde vektörize tahmin yapan ağaç topluluğu."""
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, base, feature_names):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        # Yaprak değerleri float64 veya (kompakt artefaktlarda) float32 olabilir; toplam her zaman float64'tür
+        self.value = np.ascontiguousarray(value)
+        if self.value.dtype not in (np.float32, np.float64):
+            self.value = self.value.astype(np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.max_depth = int(max_depth)
+        self.base = float(base)
+        self.feature_names = [str(c) for c in feature_names]
+        self._is_leaf = self.left == np.arange(len(self.left), dtype=np.int32)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_model(cls, model, feature_names=None, float32_thresholds=False):
+        """Eğitilmiş RF/GBR modelini (veya bunların fold topluluğunu) tek paket halinde derler."""
+        trees, base = _collect_trees(model)
+        if feature_names is None:
+            feature_names = getattr(model, 'feature_names_in_', None)
+            if feature_names is None and isinstance(model, FoldEnsembleRegressor):
+                feature_names = getattr(model.estimators[0], 'feature_names_in_', None)
+        if feature_names is None:
+            feature_names = [f'x{j}' for j in range(trees[0][0].n_features)]
+
+        parts = {name: [] for name in ('feature', 'threshold', 'left', 'right', 'value')}
+        roots, offset, max_depth = [], 0, 0
+        for tree, weight in trees:
+            feature, threshold, left, right, value, depth = _tree_arrays(tree)
+            parts['feature'].append(feature)
+            parts['threshold'].append(threshold)
+            parts['left'].append(left + offset)
+            parts['right'].append(right + offset)
+            parts['value'].append(value * weight)
+            roots.append(offset)
+            offset += len(feature)
+            max_depth = max(max_depth, depth)
+
+        threshold = np.concatenate(parts['threshold'])
+        if float32_thresholds:
+            threshold = _round_down_float32(threshold)
+
+        return cls(
+            np.concatenate(parts['feature']), threshold, np.concatenate(parts['left']),
+            np.concatenate(parts['right']), np.concatenate(parts['value']), np.array(roots, dtype=np.int32),
+            max_depth, base, feature_names
+        )
+
+    def _leaves(self, X):
+        """Bir satır parçası için (satır x ağaç) yaprak indeksleri."""
+        n_rows, n_features = X.shape
+        flat = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.int64) * n_features)[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+
+        for depth in range(self.max_depth):
+            go_left = flat[row_offsets + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+            if (depth + 1) % LEAF_CHECK_EVERY == 0 and self._is_leaf[node].all():
+                break
+        return node
+
+    def _as_array(self, X):
+        # sklearn ağaçları da girdiyi float32'ye çevirerek karşılaştırır
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names].to_numpy(dtype=np.float32)
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def apply(self, X):
+        X = self._as_array(X)
+        step = max(1, CHUNK_ELEMENTS // self.n_trees)
+        if len(X) == 0:
+            return np.empty((0, self.n_trees), dtype=np.int32)
+        return np.vstack([self._leaves(X[start:start + step]) for start in range(0, len(X), step)])
+
+    def predict(self, X):
+        X = self._as_array(X)
+        step = max(1, CHUNK_ELEMENTS // self.n_trees)
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), step):
+            leaves = self._leaves(X[start:start + step])
+            predictions[start:start + step] = self.base + self.value[leaves].sum(axis=1, dtype=np.float64)
+        return predictions
+
+    # KAYIT VE YÜKLEME
+
+    def save(self, path):
+        """Dizileri pickle kullanmadan tek bir .npz dosyasına yazar."""
+        np.savez(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            value=self.value, roots=self.roots, max_depth=np.array(self.max_depth),
+            base=np.array(self.base), feature_names=np.array(self.feature_names, dtype=str)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            arrays = {name: f[name] for name in f.files}
+        arrays['max_depth'] = int(arrays['max_depth'])
+        arrays['base'] = float(arrays['base'])
+        return cls(**arrays)
+
+
+def compile_saved_models(model_dir=MODEL_DIR, keys=('rf', 'gbr'), float32_thresholds=False):
+    """models klasöründeki RF/GBR modellerini derleyip compiled_<key>.npz olarak kaydeder."""
+    compiled = {}
+    for key in keys:
+        model_path = os.path.join(model_dir, f'model_{key}.pkl')
+        if not os.path.exists(model_path):
+            print(f"[UYARI] '{model_path}' bulunamadı, atlanıyor.")
+            continue
+        try:
+            forest = CompiledForest.from_model(joblib.load(model_path), float32_thresholds=float32_thresholds)
+        except TypeError as e:
+            print(f"[UYARI] {key}: {e}")
+            continue
+        forest.save(os.path.join(model_dir, COMPILED_FILE_PATTERN.format(key=key)))
+        compiled[key] = forest
+        print(f"[{key}] {forest.n_trees} ağaç, {forest.n_nodes} düğüm, en büyük derinlik {forest.max_depth} "
+              f"-> '{COMPILED_FILE_PATTERN.format(key=key)}'")
+    return compiled
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RF/GBR modellerini paketlenmiş düğüm dizilerine derler")
+    parser.add_argument('--models', nargs='+', default=['rf', 'gbr'])
+    parser.add_argument('--float32-thresholds', action='store_true', help="Eşikleri float32 olarak sakla")
+    args = parser.parse_args()
+
+    compile_saved_models(keys=args.models, float32_thresholds=args.float32_thresholds)
@@ -0,0 +1,267 @@
+import pandas as pd
+import numpy as np
+import time
+import os
+import sys
+import argparse
+import multiprocessing as mp
+from collections import deque
+from multiprocessing.connection import wait
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+# Ortak veri yükleyici ve izleme yardımcıları Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Tracing import span, traced, worker_spans, absorb
+
+
+# Ağaç seviyesinde parçalanmış (sharded) dağıtık Random Forest eğitimi.
+# Koordinatör ağaç tohumlarını sklearn'in kendi sırasıyla üretir (RandomState(random_state).randint(MAX_INT)
+# her ağaç için bir kez) ve ağaç indekslerini parçalara böler. Her işçi süreç işlenmiş setleri kendisi
+# (memmap ile) açar, kendisine gönderilen parçanın ağaçlarını aynı bootstrap örneklemesi ve tohumlarla
+# kurar ve eğitilmiş ağaçları koordinatöre geri gönderir. Koordinatör ağaçları indeks sırasıyla tek bir
+# RandomForestRegressor'da birleştirir; sonuç aynı tohumlarla tek düğümde yapılan fit ile aynıdır.
+# İletişim işçi başına bir multiprocessing.Pipe (yerel soket) üzerindendir; çöken veya hata veren işçinin
+# parçası başka bir işçiye yeniden verilir.
+
+DATA_PATH = "../data/processed_data/"
+N_ESTIMATORS = 100
+RANDOM_STATE = 42
+SHARDS_PER_WORKER = 2
+MAX_RETRIES = 5
+POLL_SECONDS = 1.0
+
+MAX_INT = np.iinfo(np.int32).max
+
+# Ormandan ağaçlara aktarılan parametreler (RandomForestRegressor.estimator_params ile aynı)
+TREE_PARAMS = ('criterion', 'max_depth', 'min_samples_split', 'min_samples_leaf', 'min_weight_fraction_leaf',
+               'max_features', 'max_leaf_nodes', 'min_impurity_decrease', 'ccp_alpha')
+
+
+def tree_seeds(random_state, n_estimators):
+    """RandomForestRegressor.fit'in her ağaca verdiği tohumlar (aynı sırayla, tek tek çekilir)."""
+    rng = np.random.RandomState(random_state)
+    return np.array([rng.randint(MAX_INT) for _ in range(n_estimators)], dtype=np.int64)
+
+
+def bootstrap_counts(seed, n_samples):
+    """Ağacın bootstrap örneğindeki satır tekrar sayıları (sklearn bunları örnek ağırlığı olarak kullanır)."""
+    indices = np.random.RandomState(seed).randint(0, n_samples, n_samples, dtype=np.int32)
+    return np.bincount(indices, minlength=n_samples).astype(np.float64)
+
+
+def build_tree(X, y, seed, tree_params):
+    tree = DecisionTreeRegressor(random_state=int(seed), **tree_params)
+    tree.fit(X, y, sample_weight=bootstrap_counts(seed, len(y)))
+    return tree
+
+
+def make_shards(n_estimators, n_shards, seeds):
+    """Ağaç indekslerini ardışık parçalara böler: (parça no, ağaç indeksleri, tohumlar)."""
+    shards = []
+    for shard_id, tree_ids in enumerate(np.array_split(np.arange(n_estimators), n_shards)):
+        if len(tree_ids):
+            shards.append((shard_id, tree_ids.tolist(), seeds[tree_ids].tolist()))
+    return shards
+
+
+def aggregate_importances(trees, n_features):
+    """Ağaç önemlerinin ortalaması ve normalizasyonu (RandomForestRegressor.feature_importances_ ile aynı)."""
+    importances = [tree.feature_importances_ for tree in trees if tree.tree_.node_count > 1]
+    if not importances:
+        return np.zeros(n_features, dtype=np.float64)
+    importances = np.mean(importances, axis=0, dtype=np.float64)
+    return importances / np.sum(importances)
+
+
+def merge_forest(trees, forest_params, n_samples, feature_names=None):
+    """İndeks sırasına dizilmiş ağaçlardan eğitilmiş bir RandomForestRegressor oluşturur."""
+    forest = RandomForestRegressor(**{**forest_params, 'n_estimators': len(trees)})
+    forest.estimator_ = DecisionTreeRegressor()
+    forest.estimators_ = list(trees)
+    forest.n_features_in_ = trees[0].n_features_in_
+    if feature_names is not None:
+        forest.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    forest.n_outputs_ = 1
+    forest._n_samples = n_samples
+    forest._n_samples_bootstrap = n_samples
+    return forest
+
+
+# İŞÇİ SÜREÇ
+
+def _worker_main(conn, data_path, tree_params, failure_rate):
+    """Setleri bir kez açar, ardından gelen parçaları None gelene kadar eğitir."""
+    X_train, _, _, y_train, _, _ = load_splits(data_path)
+    # RandomForestRegressor.fit de X'i float32, y'yi float64'e çevirir
+    X = np.ascontiguousarray(X_train.to_numpy(dtype=np.float32))
+    y = np.ascontiguousarray(y_train.to_numpy(dtype=np.float64))
+
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+        shard_id, tree_ids, seeds, attempt = task
+
+        # Hata toleransını denemek için: her denemede verilen olasılıkla süreç düşürülür
+        if failure_rate > 0 and np.random.default_rng([shard_id, attempt]).random() < failure_rate:
+            os._exit(1)
+
+        try:
+            with span('distributed_rf.shard', trees=len(seeds), rows=len(y), attempt=attempt):
+                trees = [build_tree(X, y, seed, tree_params) for seed in seeds]
+            conn.send(('done', shard_id, trees, worker_spans()))
+        except Exception as e:
+            conn.send(('error', shard_id, f'{type(e).__name__}: {e}', worker_spans()))
+    conn.close()
+
+
+class _WorkerHandle:
+    def __init__(self, ctx, worker_id, data_path, tree_params, failure_rate):
+        self.worker_id = worker_id
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, data_path, tree_params, failure_rate),
+                                   daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+# KOORDİNATÖR
+
+@traced('distributed_rf')
+def fit_distributed(data_path=DATA_PATH, n_workers=4, n_estimators=N_ESTIMATORS, random_state=RANDOM_STATE,
+                    forest_params=None, shards_per_worker=SHARDS_PER_WORKER, max_retries=MAX_RETRIES,
+                    failure_rate=0.0, n_jobs=-1):
+    """
+    Ormanı n_workers süreç arasında ağaç seviyesinde paylaştırarak eğitir ve birleştirir.
+    Dönen orman, aynı parametre ve random_state ile RandomForestRegressor.fit sonucuyla aynıdır.
+    Başarısız olan (hata veren veya çöken) parçalar en fazla max_retries kez yeniden denenir.
+    """
+    forest_params = {**(forest_params or {}), 'random_state': random_state, 'n_jobs': n_jobs}
+    template = RandomForestRegressor(n_estimators=n_estimators, **forest_params)
+    if not template.bootstrap or template.max_samples is not None:
+        raise ValueError("Dağıtık eğitim yalnızca bootstrap=True ve max_samples=None ile desteklenir.")
+    tree_params = {name: getattr(template, name) for name in TREE_PARAMS}
+
+    # Koordinatör yalnızca satır sayısını ve özellik isimlerini okur; veriyi işçiler açar
+    X_train, _, _, y_train, _, _ = load_splits(data_path)
+    n_samples, feature_names = len(y_train), X_train.columns
+
+    seeds = tree_seeds(random_state, n_estimators)
+    shards = make_shards(n_estimators, max(1, n_workers * shards_per_worker), seeds)
+    pending = deque((shard_id, tree_ids, shard_seeds, 0) for shard_id, tree_ids, shard_seeds in shards)
+    attempts = {shard_id: 0 for shard_id, _, _ in shards}
+    trees, failures = {}, []
+
+    ctx = mp.get_context()
+    next_id = 0
+    workers = []
+    for _ in range(min(n_workers, len(shards))):
+        workers.append(_WorkerHandle(ctx, next_id, data_path, tree_params, failure_rate))
+        next_id += 1
+
+    def retry(task, reason):
+        shard_id = task[0]
+        failures.append({'shard': shard_id, 'attempt': task[3], 'reason': reason})
+        print(f"[UYARI] Parça {shard_id} başarısız ({reason}); yeniden deneniyor.")
+        attempts[shard_id] += 1
+        if attempts[shard_id] > max_retries:
+            raise RuntimeError(f"Parça {shard_id} {max_retries} yeniden denemeden sonra da başarısız oldu: {reason}")
+        pending.append((task[0], task[1], task[2], attempts[shard_id]))
+
+    start_time = time.time()
+    try:
+        while len(trees) < len(shards):
+            for worker in workers:
+                if worker.task is None and pending:
+                    worker.task = pending.popleft()
+                    worker.conn.send(worker.task)
+
+            ready = wait([w.conn for w in workers] + [w.process.sentinel for w in workers], timeout=POLL_SECONDS)
+            for worker in list(workers):
+                message = None
+                if worker.conn in ready or worker.conn.poll():
+                    try:
+                        message = worker.conn.recv()
+                    except (EOFError, OSError):
+                        message = None
+                if message is not None:
+                    kind, shard_id, payload, spans = message
+                    absorb(spans)
+                    task, worker.task = worker.task, None
+                    if kind == 'done':
+                        for tree_id, tree in zip(task[1], payload):
+                            trees.setdefault(shard_id, {})[tree_id] = tree
+                    else:
+                        retry(task, payload)
+                elif not worker.process.is_alive():
+                    # Süreç çöktü: üzerindeki parça yeniden kuyruğa alınır ve yerine yeni bir işçi başlatılır
+                    if worker.task is not None:
+                        retry(worker.task, f"işçi {worker.worker_id} çıkış kodu {worker.process.exitcode}")
+                    worker.conn.close()
+                    workers.remove(worker)
+                    workers.append(_WorkerHandle(ctx, next_id, data_path, tree_params, failure_rate))
+                    next_id += 1
+    finally:
+        for worker in workers:
+            worker.stop()
+
+    ordered = [trees[shard_id][tree_id] for shard_id, tree_ids, _ in shards for tree_id in tree_ids]
+    forest = merge_forest(ordered, forest_params, n_samples, feature_names)
+    info = {
+        'n_workers': n_workers,
+        'n_shards': len(shards),
+        'n_trees': len(ordered),
+        'retries': len(failures),
+        'failures': failures,
+        'wall_time': time.time() - start_time,
+        'feature_importances': dict(zip(map(str, feature_names), aggregate_importances(ordered, len(feature_names))))
+    }
+    return forest, info
+
+
+def verify_against_single_node(forest, data_path=DATA_PATH, forest_params=None, n_jobs=-1):
+    """Aynı tohumlarla tek düğümde eğitilen ormanla tahmin ve özellik önemi farklarını döndürür."""
+    X_train, X_val, _, y_train, _, _ = load_splits(data_path)
+    params = {**(forest_params or {}), 'n_estimators': len(forest.estimators_),
+              'random_state': forest.random_state, 'n_jobs': n_jobs}
+    reference = RandomForestRegressor(**params).fit(X_train, y_train)
+    return {
+        'max_prediction_diff': float(np.max(np.abs(forest.predict(X_val) - reference.predict(X_val)))),
+        'max_importance_diff': float(np.max(np.abs(forest.feature_importances_ - reference.feature_importances_)))
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Random Forest'ı ağaç seviyesinde süreçlere dağıtarak eğitir")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--trees', type=int, default=N_ESTIMATORS)
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help="Hata toleransı denemesi: parça başına işçi sürecinin çökme olasılığı")
+    parser.add_argument('--max-retries', type=int, default=MAX_RETRIES,
+                        help="Bir parçanın çalıştırma iptal edilmeden önce yeniden denenebileceği en fazla sayı")
+    parser.add_argument('--verify', action='store_true', help="Tek düğümlü fit ile karşılaştır")
+    args = parser.parse_args()
+
+    forest, info = fit_distributed(n_workers=args.workers, n_estimators=args.trees, max_retries=args.max_retries,
+                                   failure_rate=args.failure_rate)
+    print(f"{info['n_trees']} ağaç, {info['n_shards']} parça, {info['n_workers']} işçi, "
+          f"{info['retries']} yeniden deneme: {info['wall_time']:.4f} saniye")
+    print("\n--- Özellik Önemleri (Birleştirilmiş) ---")
+    print(pd.Series(info['feature_importances']).sort_values(ascending=False).head(5).to_string())
+    if args.verify:
+        diff = verify_against_single_node(forest)
+        print(f"\nTek düğüm ile en büyük tahmin farkı: {diff['max_prediction_diff']:.3e} | "
+              f"özellik önemi farkı: {diff['max_importance_diff']:.3e}")
@@ -3,48 +3,115 @@ import numpy as np
 import time
 import joblib
 import os
+import sys
+import argparse
 from sklearn.ensemble import GradientBoostingRegressor
-from sklearn.model_selection import cross_val_score
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
 
+# Ortak veri yükleyici Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Metrics import calculate_metrics
+from CV_Engine import get_folds, cross_validate_model, FoldEnsembleRegressor
+from Tracing import span, traced
+from Model_Artifacts import save_artifact, serving_lock
+from Hist_Binning import compute_bin_edges, apply_bins, make_hist_regressor, fit_with_early_stopping, BinnedRegressor
 
-# Metrik Hesaplama Fonksiyonu
-def calculate_metrics(y_true, y_pred):
-    """Verilen gerçek ve tahmin edilen değerler için metrikleri hesaplar."""
-    r2 = r2_score(y_true, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-    mae = mean_absolute_error(y_true, y_pred)
-    return {'R2': r2, 'RMSE': rmse, 'MAE': mae}
+# Kesin (exact) motorun hiperparametreleri varsayılan olarak seçilmiştir (Compact_Dtype_Report.py de bunları kullanır)
+GBR_PARAMS = {'n_estimators': 100, 'learning_rate': 0.1, 'max_depth': 3, 'random_state': 42}
 
 
-def run_gradient_boosting(data_path="../data/processed_data/"):
+@traced('model.gbr')
+def run_gradient_boosting(data_path="../data/processed_data/", data=None, n_jobs=-1, model_dir='models', final_model='full', engine='exact'):
     """
     Gradient Boosting Regressor modelini eğitir, değerlendirir ve sonuçları kaydeder.
+    engine='hist': özellikler önceden hesaplanan bin sınırlarıyla kodlanır ve iterasyon
+    sayısı Validation seti üzerinde erken durdurma ile belirlenir.
     """
     print("--- Gradient Boosting Regressor Modeli Başlatılıyor ---")
 
     # VERİ YÜKLEME
     try:
-        X_train = pd.read_pickle(os.path.join(data_path, "X_train.pkl"))
-        X_val = pd.read_pickle(os.path.join(data_path, "X_val.pkl"))
-        X_test = pd.read_pickle(os.path.join(data_path, "X_test.pkl"))
-        y_train = pd.read_pickle(os.path.join(data_path, "y_train.pkl"))
-        y_val = pd.read_pickle(os.path.join(data_path, "y_val.pkl"))
-        y_test = pd.read_pickle(os.path.join(data_path, "y_test.pkl"))
+        # Önceden yüklenmiş setler verilmişse (ör. Train_All.py) tekrar okunmaz
+        if data is None:
+            data = load_splits(data_path)
+        X_train, X_val, X_test, y_train, y_val, y_test = data
         print("Veriler başarıyla yüklendi.")
     except FileNotFoundError:
         print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
         return
 
+    # HİSTOGRAM MOTORU: BİNLEME VE ERKEN DURDURMA
+    # Bin sınırları bir kez hesaplanır; CV fold'ları aynı kodlanmış Train setini kullanır.
+    binning_time = 0.0
+    fit_time = None
+    n_iter = 100
+    best_iteration = None
+    val_history = []
+    X_train_fit = X_train
+    cv_estimator = GradientBoostingRegressor(**GBR_PARAMS)
+
+    if engine == 'hist':
+        bin_start = time.time()
+        bin_edges = compute_bin_edges(X_train)
+        X_train_fit = apply_bins(X_train, bin_edges)
+        X_val_bin = apply_bins(X_val, bin_edges)
+        binning_time = time.time() - bin_start
+        print(f"\nBinleme Süresi: {binning_time:.4f} saniye")
+
+        fit_start = time.time()
+        fit_cpu_start = time.process_time()
+        hist_model, n_iter, best_iteration, val_history = fit_with_early_stopping(
+            X_train_fit, y_train, X_val_bin, y_val, learning_rate=0.1, max_depth=3, random_state=42
+        )
+        fit_time = time.time() - fit_start
+        fit_cpu_time = time.process_time() - fit_cpu_start
+        print(f"Erken Durdurma: {n_iter} iterasyon büyütüldü, model en iyi iterasyonda ({best_iteration}) kesildi "
+              f"| Eğitim Süresi: {fit_time:.4f} saniye")
+
+        # CV modelleri erken durdurmanın seçtiği (en iyi) iterasyon sayısıyla eğitilir
+        cv_estimator = make_hist_regressor(max_iter=best_iteration, learning_rate=0.1, max_depth=3, random_state=42)
+
+    # CROSS-VALIDATION (Train seti üzerinde)
+    # Fold'lar bir kez hesaplanır ve üç model arasında paylaşılır; out-of-fold tahminleri de saklanır.
+    cv_start = time.time()
+    cv_cpu_start = time.process_time()
+    folds = get_folds(len(X_train), n_splits=5)
+    cv_results = cross_validate_model(
+        cv_estimator, X_train_fit, y_train, folds, n_jobs=n_jobs, keep_models=(final_model == 'ensemble')
+    )
+    cv_scores = cv_results['scores']
+    cv_r2_mean = np.mean(cv_scores)
+    cv_time = time.time() - cv_start
+    cv_cpu_time = time.process_time() - cv_cpu_start
+    print(f"\n5-Fold Cross-Validation R² Ortalaması: {cv_r2_mean:.4f}")
+
     # MODEL EĞİTİMİ VE SÜRE ÖLÇÜMÜ
     start_time = time.time()
-
-    # Not: Parametreler (n_estimators=100, learning_rate=0.1, max_depth=3) varsayılan olarak seçilmiştir.
-    model_gbr = GradientBoostingRegressor(n_estimators=100, learning_rate=0.1, max_depth=3, random_state=42)
-    model_gbr.fit(X_train, y_train)
+    cpu_start = time.process_time()
+
+    if final_model == 'ensemble':
+        # Fold modellerinin ortalaması nihai model olur; tüm Train seti üzerinde altıncı bir eğitim yapılmaz
+        model_gbr = FoldEnsembleRegressor(cv_results['models'])
+        if engine == 'hist':
+            model_gbr = BinnedRegressor(bin_edges, model_gbr)
+    elif engine == 'hist':
+        # Erken durdurmanın en iyi iterasyonda kestiği model nihai modeldir
+        model_gbr = BinnedRegressor(bin_edges, hist_model)
+    else:
+        model_gbr = GradientBoostingRegressor(**GBR_PARAMS)
+        with span('model.gbr.fit', rows=len(X_train)):
+            model_gbr.fit(X_train, y_train)
 
     end_time = time.time()
     training_time = end_time - start_time
+    training_cpu_time = time.process_time() - cpu_start
+    if final_model == 'ensemble':
+        # Nihai modelin eğitim maliyeti fold eğitimlerinin kendisidir
+        training_time, training_cpu_time = cv_time, cv_cpu_time
+    elif engine == 'hist':
+        training_time, training_cpu_time = fit_time, fit_cpu_time
+    if fit_time is None:
+        fit_time = training_time
     print(f"\nEğitim Süresi: {training_time:.4f} saniye")
 
 
@@ -54,10 +121,16 @@ def run_gradient_boosting(data_path="../data/processed_data/"):
     y_val_pred = model_gbr.predict(X_val)
     val_metrics = calculate_metrics(y_val, y_val_pred)
 
+    # Histogram motorunda durma noktası bu setle seçildiği için Validation metrikleri iyimserdir
+    validation_optimistic = engine == 'hist'
+
     print("\n--- Doğrulama (Validation) Metrikleri ---")
+    if validation_optimistic:
+        print("Not: Erken durdurma bu setle seçildi; metrikler iyimserdir, genelleme için Test metriklerine bakın.")
     print(f"R²: {val_metrics['R2']:.4f}")
     print(f"RMSE: {val_metrics['RMSE']:,.2f}")  # Okunabilir format
     print(f"MAE: {val_metrics['MAE']:,.2f}")  # MAE
+    print(f"MAPE: {val_metrics['MAPE']:.2%}")
 
     # 2. Test Seti Performansı
     y_test_pred = model_gbr.predict(X_test)
@@ -67,41 +140,71 @@ def run_gradient_boosting(data_path="../data/processed_data/"):
     print(f"R²: {test_metrics['R2']:.4f}")
     print(f"RMSE: {test_metrics['RMSE']:,.2f}")  # Okunabilir format
     print(f"MAE: {test_metrics['MAE']:,.2f}")  # MAE
-
-    # Cross-Validation Sonuçları (Train seti üzerinde)
-    cv_scores = cross_val_score(model_gbr, X_train, y_train, cv=5, scoring='r2', n_jobs=-1)
-    cv_r2_mean = np.mean(cv_scores)
-    print(f"\n5-Fold Cross-Validation R² Ortalaması: {cv_r2_mean:.4f}")
+    print(f"MAPE: {test_metrics['MAPE']:.2%}")
 
 
     # ÖZELLİK ÖNEMİ YORUMLANMASI (Feature Importance)
 
     print("\n--- Özellik Önemleri (Feature Importance) ---")
-    feature_importances = pd.Series(model_gbr.feature_importances_, index=X_train.columns)
-    print(feature_importances.sort_values(ascending=False).head(5).to_string())
+    if engine == 'hist':
+        # HistGradientBoostingRegressor yerleşik (impurity tabanlı) özellik önemi sunmaz
+        feature_importances = pd.Series(dtype=np.float64)
+        print("Histogram motorunda yerleşik özellik önemi bulunmuyor.")
+    else:
+        feature_importances = pd.Series(model_gbr.feature_importances_, index=X_train.columns)
+        print(feature_importances.sort_values(ascending=False).head(5).to_string())
 
 
     # MODEL VE SONUÇLARI KAYDETME
 
-    MODEL_DIR = 'models'
+    MODEL_DIR = model_dir
     if not os.path.exists(MODEL_DIR):
         os.makedirs(MODEL_DIR)
 
     results_gbr = {
         'training_time': training_time,
+        'training_cpu_time': training_cpu_time,
+        'cv_time': cv_time,
+        'cv_cpu_time': cv_cpu_time,
         'validation': val_metrics,
+        'validation_optimistic': validation_optimistic,
         'test': test_metrics,
+        'test_predictions': np.asarray(y_test_pred, dtype=np.float64),
         'cv_r2_mean': cv_r2_mean,
+        'cv_scores': cv_scores.tolist(),
+        'cv_fold_fit_times': cv_results['fold_fit_times'],
+        'cv_fold_predict_times': cv_results['fold_predict_times'],
+        'oof_predictions': cv_results['oof_predictions'],
+        'final_model': final_model,
+        'engine': engine,
+        'n_iter': n_iter,
+        'best_iteration': best_iteration,
+        'val_loss_history': val_history,
+        'binning_time': binning_time,
+        'fit_time': fit_time,
         'feature_importances': feature_importances.sort_values(ascending=False).to_dict()
     }
 
     # Modeli ve sonuçları modelling/models klasörüne kaydet
-    joblib.dump(model_gbr, os.path.join(MODEL_DIR, 'model_gbr.pkl'))
-    joblib.dump(results_gbr, os.path.join(MODEL_DIR, 'results_gbr.pkl'))
+    # Histogram motoru ayrı dosyalara yazılır; böylece rapor iki motoru karşılaştırabilir
+    suffix = '_hist' if engine == 'hist' else ''
+    # Hızlı yüklenen artefakt (meta + memmap dizi yükü); rapor ve servis tam pickle'ı açmadan kullanır.
+    # Pickle ve artefakt kilit altında birlikte yazılır (çıkarım servisi yarım güncellemeyi yüklemez)
+    with serving_lock(MODEL_DIR):
+        joblib.dump(model_gbr, os.path.join(MODEL_DIR, f'model_gbr{suffix}.pkl'))
+        save_artifact(model_gbr, MODEL_DIR, f'gbr{suffix}')
+    joblib.dump(results_gbr, os.path.join(MODEL_DIR, f'results_gbr{suffix}.pkl'))
 
     print(f"\n[INFO] Gradient Boosting modeli ve sonuçları '{MODEL_DIR}' klasörüne başarıyla kaydedildi.")
     print("--- Gradient Boosting Regressor Modeli Tamamlandı ---")
 
+    return model_gbr, results_gbr
+
 
 if __name__ == "__main__":
-    run_gradient_boosting()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gradient Boosting Regressor eğitimi")
+    parser.add_argument('--engine', choices=['exact', 'hist'], default='exact',
+                        help="hist: önceden binlenmiş özellikler ve Validation seti ile erken durdurma")
+    args = parser.parse_args()
+
+    run_gradient_boosting(engine=args.engine)
@@ -0,0 +1,102 @@
+import numpy as np
+from sklearn.base import BaseEstimator, RegressorMixin
+from sklearn.ensemble import HistGradientBoostingRegressor
+from sklearn.metrics import mean_squared_error
+
+
+# Histogram motoru: özellikler Train seti üzerinde bir kez hesaplanan bin sınırlarıyla
+# uint8 kodlara dönüştürülür. Aynı sınırlar CV fold'larında ve Validation/Test setlerinde
+# tekrar kullanılır, böylece her fit'te yeniden sıralama/bölme noktası araması yapılmaz.
+
+MAX_BINS = 255
+
+
+def compute_bin_edges(X, max_bins=MAX_BINS, subsample=200_000, random_state=42):
+    """Her özellik için en fazla max_bins - 1 adet bin sınırı (kantil tabanlı) hesaplar."""
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) > subsample:
+        rng = np.random.default_rng(random_state)
+        X = X[rng.choice(len(X), subsample, replace=False)]
+
+    edges = []
+    for j in range(X.shape[1]):
+        col = X[:, j]
+        col = col[~np.isnan(col)]
+        unique_values = np.unique(col)
+        if len(unique_values) <= max_bins:
+            # Az sayıda farklı değer (ör. one-hot): her değer kendi bininde kalır
+            col_edges = (unique_values[:-1] + unique_values[1:]) / 2
+        else:
+            percentiles = np.linspace(0, 100, max_bins + 1)[1:-1]
+            col_edges = np.unique(np.percentile(col, percentiles, method='midpoint'))
+        edges.append(col_edges)
+    return edges
+
+
+def apply_bins(X, edges):
+    """Özellikleri önceden hesaplanmış sınırlarla uint8 bin kodlarına dönüştürür."""
+    X = np.asarray(X, dtype=np.float64)
+    binned = np.empty(X.shape, dtype=np.uint8)
+    for j, col_edges in enumerate(edges):
+        binned[:, j] = np.searchsorted(col_edges, X[:, j], side='left')
+    return binned
+
+
+def make_hist_regressor(max_iter=100, learning_rate=0.1, max_depth=3, random_state=42, warm_start=False):
+    """Önceden binlenmiş veriye uygun HistGradientBoostingRegressor (dahili erken durdurma kapalı)."""
+    return HistGradientBoostingRegressor(
+        max_iter=max_iter, learning_rate=learning_rate, max_depth=max_depth,
+        max_bins=MAX_BINS, early_stopping=False, warm_start=warm_start, random_state=random_state
+    )
+
+
+def fit_with_early_stopping(X_train_bin, y_train, X_val_bin, y_val, max_iter=1000, step=10,
+                            patience=3, tol=1e-7, **params):
+    """
+    Modeli warm_start ile `step` iterasyonluk adımlarla büyütür ve her adımda
+    Validation MSE değerine bakar; `patience` adım boyunca iyileşme olmazsa durur.
+    Dönen model en iyi iterasyonda kesilmiştir (aynı parametrelerle best_iteration kadar yeniden eğitilir;
+    boosting sıralı ve deterministik olduğu için ilk best_iteration ağacı büyütülen modelinkilerle aynıdır).
+    Döndürür: (model, büyütülen toplam iterasyon, en iyi iterasyon, validation MSE geçmişi)
+    """
+    model = make_hist_regressor(max_iter=step, warm_start=True, **params)
+    best_loss = np.inf
+    best_iteration = 0
+    rounds_without_improvement = 0
+    val_history = []
+
+    while True:
+        model.fit(X_train_bin, y_train)
+        val_loss = mean_squared_error(y_val, model.predict(X_val_bin))
+        val_history.append((int(model.n_iter_), float(val_loss)))
+
+        if val_loss < best_loss * (1 - tol):
+            best_loss = val_loss
+            best_iteration = int(model.n_iter_)
+            rounds_without_improvement = 0
+        else:
+            rounds_without_improvement += 1
+
+        if rounds_without_improvement >= patience or model.max_iter >= max_iter:
+            break
+        model.set_params(max_iter=min(model.max_iter + step, max_iter))
+
+    n_iter = int(model.n_iter_)
+    if best_iteration < n_iter:
+        model = make_hist_regressor(max_iter=best_iteration, **params).fit(X_train_bin, y_train)
+    return model, n_iter, best_iteration, val_history
+
+
+class BinnedRegressor(BaseEstimator, RegressorMixin):
+    """Ham özellikleri kayıtlı bin sınırlarıyla kodlayıp içteki modele veren sarmalayıcı."""
+
+    def __init__(self, bin_edges=None, estimator=None):
+        self.bin_edges = bin_edges
+        self.estimator = estimator
+
+    def fit(self, X, y):
+        self.estimator.fit(apply_bins(X, self.bin_edges), y)
+        return self
+
+    def predict(self, X):
+        return self.estimator.predict(apply_bins(X, self.bin_edges))
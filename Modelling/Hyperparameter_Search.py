@@ -0,0 +1,257 @@
+import pandas as pd
+import numpy as np
+import time
+import json
+import hashlib
+import itertools
+import joblib
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import sklearn
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
+# Ortak veri yükleyici Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from CV_Engine import get_folds, cross_validate_model
+from Tracing import traced
+
+
+DATA_PATH = "../data/processed_data/"
+MODEL_DIR = 'models'
+# Deneme önbelleği çalışma dizininden bağımsız olarak bu klasörün models/ altındadır
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'search_cache')
+
+# Arama uzayları: sabit parametreler + ızgara. 'max_estimators' ağaç modellerinde en yüksek kademedeki ağaç sayısıdır.
+SEARCH_SPACES = {
+    'lr': {
+        'fixed': {},
+        'grid': {'fit_intercept': [True, False], 'positive': [False, True]},
+        'max_estimators': None
+    },
+    'rf': {
+        'fixed': {'random_state': 42, 'n_jobs': 1},
+        'grid': {'max_depth': [None, 12, 20], 'max_features': [1.0, 0.5, 'sqrt'], 'min_samples_leaf': [1, 3, 5]},
+        'max_estimators': 100
+    },
+    'gbr': {
+        'fixed': {'random_state': 42},
+        'grid': {'learning_rate': [0.05, 0.1, 0.2], 'max_depth': [3, 4, 5], 'subsample': [1.0, 0.8]},
+        'max_estimators': 200
+    }
+}
+
+ESTIMATORS = {
+    'lr': LinearRegression,
+    'rf': RandomForestRegressor,
+    'gbr': GradientBoostingRegressor
+}
+
+# İşçi süreçteki veri (süreç başına bir kez, memmap ile açılır)
+_DATA = None
+
+
+def _init_worker(data_path):
+    global _DATA
+    X_train, _, _, y_train, _, _ = load_splits(data_path)
+    _DATA = (X_train, y_train)
+
+
+# ÖNBELLEK ANAHTARLARI
+
+def data_fingerprint(X, y):
+    """Train setinin içeriğinden (sütun isimleri, değerler, hedef) SHA-256 parmak izi üretir."""
+    h = hashlib.sha256()
+    h.update(json.dumps(list(map(str, X.columns))).encode('utf-8'))
+    for col in X.columns:
+        h.update(np.ascontiguousarray(X[col].to_numpy()).data)
+    h.update(np.ascontiguousarray(np.asarray(y)).data)
+    return h.hexdigest()
+
+
+def trial_key(model_key, params, budget):
+    """
+    Deneme anahtarı: model + kestiricinin tam sınıf adı ve birleştirilmiş argümanları (sabit + ızgara + ağaç sayısı)
+    + sklearn sürümü + kaynak bütçesi (satır, ağaç, fold sayısı). Sabit parametreler, kestirici sınıfı veya
+    sklearn sürümü değişince eski denemeler yeniden kullanılmaz.
+    """
+    estimator_class = ESTIMATORS[model_key]
+    payload = json.dumps({
+        'model': model_key,
+        'estimator': f'{estimator_class.__module__}.{estimator_class.__qualname__}',
+        'kwargs': estimator_kwargs(model_key, params, budget['n_estimators']),
+        'sklearn': sklearn.__version__,
+        'budget': budget
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _cache_path(cache_dir, fingerprint, key):
+    return os.path.join(cache_dir, fingerprint[:16], f"{key}.json")
+
+
+def load_trial(cache_dir, fingerprint, key):
+    path = _cache_path(cache_dir, fingerprint, key)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_trial(cache_dir, fingerprint, key, trial):
+    """Denemeyi atomik olarak yazar (önce geçici dosya, sonra yeniden adlandırma); çökme yarım kayıt bırakmaz."""
+    path = _cache_path(cache_dir, fingerprint, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(trial, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+# DENEME ÇALIŞTIRMA
+
+def estimator_kwargs(model_key, params, n_estimators=None):
+    """Kestiriciye verilen argümanlar: sabit parametreler + ızgara noktası (+ kademedeki ağaç sayısı)."""
+    kwargs = {**SEARCH_SPACES[model_key]['fixed'], **params}
+    if n_estimators is not None:
+        kwargs['n_estimators'] = n_estimators
+    return kwargs
+
+
+def build_estimator(model_key, params, n_estimators=None):
+    return ESTIMATORS[model_key](**estimator_kwargs(model_key, params, n_estimators))
+
+
+def _run_trial(model_key, params, budget):
+    """Bir parametre setini verilen bütçede (satır alt kümesi, ağaç sayısı) çapraz doğrulama ile değerlendirir."""
+    X_train, y_train = _DATA
+
+    # Satır alt kümesi her kademede aynı sabit permütasyonun ilk n satırıdır
+    rows = np.sort(np.random.default_rng(42).permutation(len(X_train))[:budget['n_rows']])
+    X_sub, y_sub = X_train.iloc[rows], y_train.iloc[rows]
+
+    start_time = time.time()
+    cpu_start = time.process_time()
+    folds = get_folds(len(rows), n_splits=budget['cv'])
+    cv_results = cross_validate_model(build_estimator(model_key, params, budget['n_estimators']),
+                                      X_sub, y_sub, folds, n_jobs=1)
+
+    return {
+        'model': model_key,
+        'params': params,
+        'budget': budget,
+        'fold_scores': cv_results['scores'].tolist(),
+        'mean_score': float(np.mean(cv_results['scores'])),
+        'fold_fit_times': cv_results['fold_fit_times'],
+        'wall_time': time.time() - start_time,
+        'cpu_time': time.process_time() - cpu_start
+    }
+
+
+def expand_grid(grid):
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+
+
+def successive_halving(model_key, executor, fingerprint, n_train, eta=3, min_fraction=1 / 9,
+                       cv=3, cache_dir=CACHE_DIR):
+    """
+    Successive halving: tüm adaylar küçük bütçede (satır ve ağaç sayısının min_fraction kadarı)
+    denenir, her kademede en iyi 1/eta kısmı eta kat büyük bütçeye terfi eder.
+    Önbellekte bulunan denemeler yeniden hesaplanmaz.
+    """
+    space = SEARCH_SPACES[model_key]
+    candidates = expand_grid(space['grid'])
+    fraction = min_fraction
+    history = []
+    rung = 0
+
+    while True:
+        budget = {
+            'n_rows': max(cv * 10, int(round(n_train * min(fraction, 1.0)))),
+            'n_estimators': (max(10, int(round(space['max_estimators'] * min(fraction, 1.0))))
+                             if space['max_estimators'] else None),
+            'cv': cv
+        }
+        budget['n_rows'] = min(budget['n_rows'], n_train)
+
+        # Önbellekte olmayan denemeleri paralel çalıştır
+        trials = {}
+        pending = {}
+        for params in candidates:
+            key = trial_key(model_key, params, budget)
+            cached = load_trial(cache_dir, fingerprint, key)
+            if cached is not None:
+                trials[key] = cached
+            else:
+                pending[executor.submit(_run_trial, model_key, params, budget)] = key
+
+        # Her deneme biter bitmez kaydedilir; arama yarıda kesilse bile tamamlananlar kaybolmaz
+        for future in as_completed(pending):
+            key = pending[future]
+            trial = future.result()
+            save_trial(cache_dir, fingerprint, key, trial)
+            trials[key] = trial
+
+        ranked = sorted(trials.values(), key=lambda t: t['mean_score'], reverse=True)
+        print(f"[{model_key}] Kademe {rung}: {len(candidates)} aday | {budget} | "
+              f"önbellekten {len(trials) - len(pending)}, yeni {len(pending)} | en iyi R² {ranked[0]['mean_score']:.4f}")
+        history.extend({**t, 'rung': rung} for t in ranked)
+
+        if len(candidates) <= 1 or fraction >= 1.0:
+            break
+        n_keep = max(1, int(np.ceil(len(candidates) / eta)))
+        candidates = [t['params'] for t in ranked[:n_keep]]
+        fraction *= eta
+        rung += 1
+
+    return ranked[0], history
+
+
+@traced('hyperparameter_search')
+def run_search(models=('lr', 'rf', 'gbr'), n_jobs=None, data_path=DATA_PATH, eta=3, cv=3):
+    """Seçilen modeller için hiperparametre araması yapar ve sonuçları kaydeder."""
+    print("--- Hiperparametre Araması Başlatılıyor ---")
+    try:
+        X_train, _, _, y_train, _, _ = load_splits(data_path)
+    except FileNotFoundError:
+        print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
+        return
+
+    fingerprint = data_fingerprint(X_train, y_train)
+    print(f"Veri Parmak İzi: {fingerprint[:16]}")
+
+    if not os.path.exists(MODEL_DIR):
+        os.makedirs(MODEL_DIR)
+
+    best = {}
+    n_jobs = n_jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(data_path,)) as executor:
+        for model_key in models:
+            start_time = time.time()
+            best_trial, history = successive_halving(model_key, executor, fingerprint, len(X_train), eta=eta, cv=cv)
+            best[model_key] = best_trial
+            print(f"[{model_key}] En İyi Parametreler: {best_trial['params']} | "
+                  f"R²: {best_trial['mean_score']:.4f} | Süre: {time.time() - start_time:.2f} saniye")
+
+            joblib.dump({'best': best_trial, 'history': history, 'fingerprint': fingerprint},
+                        os.path.join(MODEL_DIR, f'search_results_{model_key}.pkl'))
+
+    summary = pd.DataFrame({k: {'R²': v['mean_score'], 'Parametreler': v['params']} for k, v in best.items()}).T
+    print("\n--- Arama Sonuçları ---")
+    print(summary.to_string())
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Successive halving ile hiperparametre araması")
+    parser.add_argument('--models', nargs='+', choices=list(SEARCH_SPACES), default=list(SEARCH_SPACES))
+    parser.add_argument('--n-jobs', type=int, default=None, help="Paralel deneme sayısı")
+    parser.add_argument('--eta', type=int, default=3, help="Her kademede tutulan aday oranı (1/eta)")
+    parser.add_argument('--cv', type=int, default=3, help="Denemelerdeki fold sayısı")
+    args = parser.parse_args()
+
+    run_search(models=args.models, n_jobs=args.n_jobs, eta=args.eta, cv=args.cv)
@@ -0,0 +1,350 @@
+import pandas as pd
+import numpy as np
+import time
+import json
+import joblib
+import shutil
+import os
+import sys
+import argparse
+from sklearn.linear_model import LinearRegression
+from sklearn.ensemble import RandomForestRegressor
+
+# Ortak veri yükleyici, birleştirilebilir istatistikler ve derlenmiş dönüşüm Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Streaming_Processing import QuantileSketch, RunningMoments, iter_chunks
+from Compiled_Transform import CompiledTransform, COMPILED_TRANSFORM_FILE
+from Data_Processing import COLUMN_NAMES, TARGET_COLUMN, load_preprocessing_meta
+from Metrics import calculate_metrics
+from Tracing import traced
+from Model_Artifacts import save_artifact, serving_lock
+
+
+DATA_PATH = "../data/processed_data/"
+RAW_PATH = "../data/housing.csv"
+MODEL_DIR = 'models'
+STATE_FILE = 'incremental_state.pkl'
+HISTORY_FILE = 'incremental_history.json'
+
+# Her güncellemede yeni veriyle eğitilip ormana eklenen ağaç sayısı
+RF_NEW_TREES = 10
+RF_MIN_ROWS = 50
+SKETCH_SIZE = 2048
+
+
+# DÖNÜŞÜMLER ARASI AFİN EŞLEME
+# Her seçili özellik için x_model = (x_ham - c) / a. Ölçek istatistikleri güncellendiğinde eski
+# dönüşümdeki değerler yenisine x_yeni = x_eski * oran + kayma ile taşınır (one-hot sütunları değişmez).
+
+def _affine(transform):
+    n_features = len(transform.selected_features)
+    offset, scale = np.zeros(n_features), np.ones(n_features)
+    offset[transform.num_out_idx] = transform.num_means
+    scale[transform.num_out_idx] = transform.num_scales
+    return offset, scale
+
+
+def affine_map(t_from, t_to):
+    """t_from uzayındaki özellikleri t_to uzayına taşıyan (oran, kayma) dizilerini döndürür."""
+    c_from, a_from = _affine(t_from)
+    c_to, a_to = _affine(t_to)
+    return a_from / a_to, (c_from - c_to) / a_to
+
+
+def reexpress(X, t_from, t_to):
+    """t_from ile dönüştürülmüş özellik matrisini t_to dönüşümüne göre yeniden ifade eder."""
+    ratio, shift = affine_map(t_from, t_to)
+    return X * ratio + shift
+
+
+def with_stats(transform, medians, means, scales):
+    """Aynı özellik seçimine sahip, sayısal istatistikleri güncellenmiş yeni bir derlenmiş dönüşüm üretir."""
+    medians, means, scales = (np.asarray(a, dtype=np.float64) for a in (medians, means, scales))
+    return CompiledTransform(
+        num_columns=transform.num_columns,
+        num_means=means,
+        num_scales=scales,
+        num_fill=(medians - means) / scales,
+        num_out_idx=transform.num_out_idx,
+        cat_column=transform.cat_column,
+        categories=transform.categories,
+        onehot_table=transform.onehot_table,
+        cat_out_idx=transform.cat_out_idx,
+        selected_features=transform.selected_features
+    )
+
+
+# LİNEER REGRESYON: YETERLİ İSTATİSTİKLER
+
+class LinearSufficientStats:
+    """
+    [1, X] tasarım matrisi için XᵀX ve Xᵀy toplamları. Yeni satırlar O(satır · özellik²) ile eklenir;
+    yeniden çözüm satır sayısından bağımsız olarak O(özellik³) maliyetlidir.
+    """
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.xtx = np.zeros((n_features + 1, n_features + 1))
+        self.xty = np.zeros(n_features + 1)
+
+    def update(self, X, y):
+        A = np.hstack([np.ones((len(X), 1)), np.asarray(X, dtype=np.float64)])
+        y = np.asarray(y, dtype=np.float64)
+        self.xtx += A.T @ A
+        self.xty += A.T @ y
+        self.n += len(y)
+
+    def merge(self, other):
+        self.xtx += other.xtx
+        self.xty += other.xty
+        self.n += other.n
+
+    def solve(self):
+        """Normal denklemlerin en küçük normlu çözümü (one-hot + sabit terim eşdoğrusallığına dayanıklı)."""
+        beta = np.linalg.lstsq(self.xtx, self.xty, rcond=None)[0]
+        return beta[0], beta[1:]
+
+
+def linear_model_from_stats(stats, ref_transform, transform):
+    """Referans uzayda çözülen katsayıları güncel dönüşüme taşır ve sklearn LinearRegression olarak döndürür."""
+    intercept, coef = stats.solve()
+    ratio, shift = affine_map(ref_transform, transform)
+
+    model = LinearRegression()
+    model.coef_ = coef / ratio
+    model.intercept_ = float(intercept - np.sum(coef * shift / ratio))
+    model.n_features_in_ = len(coef)
+    model.feature_names_in_ = np.asarray(transform.selected_features, dtype=object)
+    return model
+
+
+# RANDOM FOREST: REFERANS UZAY VE WARM START
+# Ağaç eşikleri ölçeklenmiş veri değerlerinin tam üzerine düşebilir (ör. tamsayı değerli Housing_Median_Age);
+# eşikleri afin eşlemeyle taşımak float32 karşılaştırmasında bu eşitlikleri bozar. Bu yüzden orman, Lineer
+# Regresyon toplamları gibi referans (sürüm 0) uzayında tutulur ve yeni ağaçlar referans dönüşümüyle eğitilir.
+# Servis edilen dönüşüm (compiled_transform.npz), GBR modelleri ve kayıtlı setler de bu uzaydadır; güncel
+# istatistiklerle üretilen dönüşüm yalnızca sürümlenmiş dosya olarak yazılır.
+
+
+def add_trees(forest, X, y, n_new_trees, n_jobs=-1):
+    """Mevcut ağaçları koruyarak yalnızca yeni veriyle eğitilen n_new_trees ağacı ormana ekler."""
+    forest.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_new_trees, n_jobs=n_jobs)
+    forest.fit(X, y)
+    forest.set_params(warm_start=False)
+    return forest
+
+
+# DURUM (STATE) OLUŞTURMA VE GÜNCELLEME
+
+def _update_raw_stats(state, batch):
+    """Seçili sayısal sütunların kantil özetlerini ve (medyanla doldurulmuş) momentlerini günceller."""
+    num = batch[state['transform'].num_columns].to_numpy(dtype=np.float64)
+    for j, sketch in enumerate(state['sketches']):
+        sketch.update(num[:, j])
+    medians = np.array([s.quantile(0.5) for s in state['sketches']])
+
+    missing = np.isnan(num).sum(axis=0).astype(np.float64)
+    state['moments'].update(num)
+    state['moments'].merge_arrays(missing, medians, np.zeros_like(medians))
+    return medians
+
+
+@traced('incremental_update.bootstrap')
+def bootstrap_state(data_path=DATA_PATH, raw_path=RAW_PATH, model_dir=MODEL_DIR, chunksize=100_000):
+    """
+    Tam eğitimin çıktılarından sürüm 0 durumunu oluşturur: dönüşüm, ham verinin birleştirilebilir
+    istatistikleri, Train setinin XᵀX/Xᵀy toplamları ve kaydedilmiş Random Forest modeli.
+    """
+    transform = CompiledTransform.load(os.path.join(data_path, COMPILED_TRANSFORM_FILE))
+    X_train, _, _, y_train, _, _ = load_splits(data_path)
+
+    # Ölçek momentleri ve medyan özetleri ham veri üzerinden (tam eğitimdeki gibi tüm satırlarla) kurulur
+    state = {
+        'version': 0,
+        'ref_transform': transform,
+        'transform': transform,
+        'moments': RunningMoments(len(transform.num_columns)),
+        'sketches': [QuantileSketch(SKETCH_SIZE) for _ in transform.num_columns],
+        'upper_bound': load_preprocessing_meta(data_path)['upper_bound'],
+        'lr_stats': LinearSufficientStats(len(transform.selected_features)),
+        'rf_path': os.path.join(model_dir, 'model_rf.pkl'),
+        'n_raw_rows': 0,
+        'n_kept_rows': 0
+    }
+    exact_medians = transform.num_fill * transform.num_scales + transform.num_means
+    for chunk in iter_chunks(raw_path, chunksize):
+        num = chunk[transform.num_columns].to_numpy(dtype=np.float64)
+        for j, sketch in enumerate(state['sketches']):
+            sketch.update(num[:, j])
+        state['moments'].update(num)
+        state['moments'].merge_arrays(np.isnan(num).sum(axis=0).astype(np.float64), exact_medians,
+                                      np.zeros_like(exact_medians))
+        state['n_raw_rows'] += len(chunk)
+        state['n_kept_rows'] += int(np.sum(~(chunk[TARGET_COLUMN].to_numpy(dtype=np.float64) > state['upper_bound'])))
+
+    # Referans uzay sürüm 0 dönüşümüdür; Train seti zaten bu uzayda saklanır
+    state['lr_stats'].update(X_train[transform.selected_features].to_numpy(), y_train.to_numpy())
+    return state
+
+
+@traced('incremental_update.update')
+def update_state(state, batch, n_new_trees=RF_NEW_TREES, n_jobs=-1):
+    """
+    Yeni ham satırlarla durumu bir sürüm ilerletir ve (lr, rf, kalan satır sayısı) döndürür.
+    Medyanlar yaklaşık (birleştirilebilir kantil özeti), ölçek momentleri kesindir.
+    lr güncel dönüşümün uzayında, rf referans (sürüm 0) uzayındadır.
+    """
+    # 1. Ön işleme istatistikleri (imputer medyanları, scaler ortalama/ölçek); tam eğitimdeki gibi
+    # aykırı değerler çıkarılmadan önce tüm satırlarla güncellenir
+    old_transform = state['transform']
+    medians = _update_raw_stats(state, batch)
+    scales = np.sqrt(state['moments'].var)
+    scales[scales == 0] = 1.0
+    transform = with_stats(old_transform, medians, state['moments'].mean, scales)
+
+    n_raw = len(batch)
+    y = batch[TARGET_COLUMN].to_numpy(dtype=np.float64)
+    batch = batch[~(y > state['upper_bound'])]
+    y = y[~(y > state['upper_bound'])]
+
+    # 2. Lineer regresyon: satırlar referans uzayda toplamlara eklenir, katsayılar güncel uzaya taşınır
+    state['lr_stats'].update(state['ref_transform'].transform(batch), y)
+    model_lr = linear_model_from_stats(state['lr_stats'], state['ref_transform'], transform)
+
+    # 3. Random Forest: eski ağaçlar referans uzayda kalır, yeni veriyle referans uzayda ağaç eklenir
+    model_rf = joblib.load(state['rf_path'])
+    if not isinstance(model_rf, RandomForestRegressor):
+        raise TypeError("Artımlı güncelleme yalnızca tam Train setiyle eğitilmiş RandomForestRegressor destekler "
+                        "(final_model='ensemble' desteklenmez).")
+    if model_rf.n_features_in_ != len(transform.selected_features):
+        raise ValueError("Artımlı güncelleme uzamsal özelliklerle (Data_Processing.py --spatial) eğitilmiş "
+                         "modelleri desteklemez; model ve dönüşüm sütunları uyuşmuyor.")
+    if len(y) >= RF_MIN_ROWS and n_new_trees > 0:
+        add_trees(model_rf, state['ref_transform'].transform_frame(batch), y, n_new_trees, n_jobs)
+
+    state['transform'] = transform
+    state['n_raw_rows'] += n_raw
+    state['n_kept_rows'] += len(batch)
+    state['version'] += 1
+    return model_lr, model_rf, len(batch)
+
+
+def evaluate(model, state, X, y, reference=False):
+    """
+    Sürüm 0 uzayında saklanan Validation/Test setini değerlendirir. reference=False ise set önce
+    güncel dönüşüme taşınır; referans uzaydaki orman (reference=True) setle doğrudan beslenir.
+    """
+    X_ref = X[state['ref_transform'].selected_features]
+    if reference:
+        return calculate_metrics(y, model.predict(X_ref))
+    return calculate_metrics(y, model.predict(reexpress(X_ref, state['ref_transform'], state['transform'])))
+
+
+@traced('incremental_update')
+def run_incremental_update(batch_path, data_path=DATA_PATH, raw_path=RAW_PATH, model_dir=MODEL_DIR,
+                           n_new_trees=RF_NEW_TREES, promote=False, n_jobs=-1):
+    """
+    Yeni ham satırları (housing.csv formatında) mevcut dönüşüme ve modellere ekler.
+    Sürümlenmiş çıktılar models klasörüne yazılır; promote=True ise LR ve RF referans uzayda güncel
+    model dosyalarının yerine geçer (servis edilen dönüşüm değişmez).
+    """
+    print("--- Artımlı Güncelleme Başlatılıyor ---")
+    start_time = time.time()
+    state_path = os.path.join(model_dir, STATE_FILE)
+
+    try:
+        if os.path.exists(state_path):
+            state = joblib.load(state_path)
+        else:
+            print("Durum dosyası bulunamadı; tam eğitim çıktılarından sürüm 0 oluşturuluyor...")
+            state = bootstrap_state(data_path, raw_path, model_dir)
+        batch = pd.read_csv(batch_path)
+        _, X_val, X_test, _, y_val, y_test = load_splits(data_path)
+    except FileNotFoundError as e:
+        print(f"HATA: Gerekli dosya bulunamadı. Önce ön işleme ve model eğitimi çalıştırılmalı. Hata: {e}")
+        return
+    batch.columns = COLUMN_NAMES
+
+    model_lr, model_rf, n_kept = update_state(state, batch, n_new_trees, n_jobs)
+    version = state['version']
+    update_time = time.time() - start_time
+    print(f"Yeni Satır: {len(batch)} | Aykırı Değer Sonrası: {n_kept} | "
+          f"Toplam Satır: {state['n_raw_rows']} (aykırı değer sonrası {state['n_kept_rows']})")
+    print(f"Güncelleme Süresi: {update_time:.4f} saniye | Sürüm: {version}")
+
+    metrics = {
+        'lr': {'validation': evaluate(model_lr, state, X_val, y_val), 'test': evaluate(model_lr, state, X_test, y_test)},
+        'rf': {'validation': evaluate(model_rf, state, X_val, y_val, reference=True),
+               'test': evaluate(model_rf, state, X_test, y_test, reference=True)}
+    }
+    for key, m in metrics.items():
+        print(f"[{key}] Validation R²: {m['validation']['R2']:.4f} | Test R²: {m['test']['R2']:.4f}")
+
+    # SÜRÜMLENMİŞ ÇIKTILARI KAYDETME
+    if not os.path.exists(model_dir):
+        os.makedirs(model_dir)
+
+    paths = {
+        'lr': os.path.join(model_dir, f'model_lr_v{version}.pkl'),
+        'rf': os.path.join(model_dir, f'model_rf_v{version}.pkl'),
+        'transform': os.path.join(model_dir, f'compiled_transform_v{version}.npz')
+    }
+    joblib.dump(model_lr, paths['lr'])
+    joblib.dump(model_rf, paths['rf'])
+    state['transform'].save(paths['transform'])
+    state['rf_path'] = paths['rf']
+    joblib.dump(state, state_path)
+
+    history_path = os.path.join(model_dir, HISTORY_FILE)
+    history = []
+    if os.path.exists(history_path):
+        with open(history_path, 'r', encoding='utf-8') as f:
+            history = json.load(f)
+    history.append({
+        'version': version,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'batch_rows': len(batch),
+        'kept_rows': n_kept,
+        'total_raw_rows': state['n_raw_rows'],
+        'total_kept_rows': state['n_kept_rows'],
+        'rf_n_estimators': len(model_rf.estimators_),
+        'update_time': update_time,
+        'metrics': metrics,
+        'artifacts': paths
+    })
+    with open(history_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2, default=float)
+
+    # Güncel dosyaların yerine geçirme (çıkarım servisi bu dosyaları izler)
+    if promote:
+        # Servis edilen dönüşüm, GBR modelleri ve kayıtlı setler referans uzayda kalır; LR katsayıları bu
+        # uzayda yeniden çözülür, orman zaten bu uzaydadır
+        served_lr = linear_model_from_stats(state['lr_stats'], state['ref_transform'], state['ref_transform'])
+        lr_tmp = os.path.join(model_dir, f'model_lr.{os.getpid()}.tmp')
+        joblib.dump(served_lr, lr_tmp)
+        rf_tmp = os.path.join(model_dir, f'model_rf.{os.getpid()}.tmp')
+        shutil.copy2(paths['rf'], rf_tmp)
+        # Pickle'lar ve hızlı yüklenen artefaktlar kilit altında birlikte değiştirilir (servis meta dosyasını izler)
+        with serving_lock(model_dir):
+            os.replace(lr_tmp, os.path.join(model_dir, 'model_lr.pkl'))
+            os.replace(rf_tmp, os.path.join(model_dir, 'model_rf.pkl'))
+            save_artifact(served_lr, model_dir, 'lr')
+            save_artifact(model_rf, model_dir, 'rf')
+        print("[INFO] LR ve RF güncel model dosyalarının yerine geçirildi (dönüşüm sürüm 0'da kalır).")
+
+    print(f"\n[INFO] Sürüm {version} çıktıları '{model_dir}' klasörüne kaydedildi.")
+    print("--- Artımlı Güncelleme Tamamlandı ---")
+    return state, metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yeni konut satırlarıyla dönüşüm ve modellerin artımlı güncellenmesi")
+    parser.add_argument('batch', help="Yeni satırları içeren CSV (housing.csv formatında)")
+    parser.add_argument('--new-trees', type=int, default=RF_NEW_TREES, help="Ormana eklenecek ağaç sayısı")
+    parser.add_argument('--promote', action='store_true',
+                        help="Yeni sürümün LR ve RF modellerini model_lr.pkl ve model_rf.pkl yerine geçir")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    args = parser.parse_args()
+
+    run_incremental_update(args.batch, n_new_trees=args.new_trees, promote=args.promote, n_jobs=args.n_jobs)
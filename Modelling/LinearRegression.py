@@ -3,22 +3,20 @@ import numpy as np
 import time
 import joblib
 import os
-from sklearn.linear_model import LinearRegression
-from sklearn.model_selection import cross_val_score
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
+import sys
 
+# Ortak veri yükleyici Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Metrics import calculate_metrics
+from CV_Engine import get_folds, FoldEnsembleRegressor
+from Tracing import traced
+from Model_Artifacts import save_artifact, serving_lock
+from Linear_Engine import cross_validate_linear, LinearFactorization, linear_regression_from, ridge_path, ALPHAS
 
-# Metrik Hesaplama Fonksiyonu
-def calculate_metrics(y_true, y_pred):
-    """Verilen gerçek ve tahmin edilen değerler için metrikleri hesaplar."""
-    r2 = r2_score(y_true, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-    mae = mean_absolute_error(y_true, y_pred)
-    # MAE de artık return ediliyor
-    return {'R2': r2, 'RMSE': rmse, 'MAE': mae}
 
-
-def run_linear_regression(data_path="../data/processed_data/"):
+@traced('model.lr')
+def run_linear_regression(data_path="../data/processed_data/", data=None, n_jobs=-1, model_dir='models', final_model='full'):
     """
     Lineer Regresyon modelini eğitir, Doğrulama/Test setlerinde değerlendirir
     ve sonuçları kaydeder.
@@ -27,27 +25,57 @@ def run_linear_regression(data_path="../data/processed_data/"):
 
     # VERİ YÜKLEME
     try:
-        X_train = pd.read_pickle(os.path.join(data_path, "X_train.pkl"))
-        X_val = pd.read_pickle(os.path.join(data_path, "X_val.pkl"))
-        X_test = pd.read_pickle(os.path.join(data_path, "X_test.pkl"))
-        y_train = pd.read_pickle(os.path.join(data_path, "y_train.pkl"))
-        y_val = pd.read_pickle(os.path.join(data_path, "y_val.pkl"))
-        y_test = pd.read_pickle(os.path.join(data_path, "y_test.pkl"))
+        # Önceden yüklenmiş setler verilmişse (ör. Train_All.py) tekrar okunmaz
+        if data is None:
+            data = load_splits(data_path)
+        X_train, X_val, X_test, y_train, y_val, y_test = data
         print("Veriler başarıyla yüklendi.")
     except FileNotFoundError:
         print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
         return  # Fonksiyondan çık
 
+    # CROSS-VALIDATION (Train seti üzerinde)
+    # Fold'lar bir kez hesaplanır ve üç model arasında paylaşılır; out-of-fold tahminleri de saklanır.
+    # Train seti tek taramada fold başına XᵀX/Xᵀy toplamlarına indirgenir; fold modelleri yeniden fit edilmez.
+    cv_start = time.time()
+    cv_cpu_start = time.process_time()
+    folds = get_folds(len(X_train), n_splits=5)
+    cv_results = cross_validate_linear(X_train, y_train, folds, keep_models=(final_model == 'ensemble'))
+    cv_scores = cv_results['scores']
+    cv_r2_mean = np.mean(cv_scores)
+    cv_time = time.time() - cv_start
+    cv_cpu_time = time.process_time() - cv_cpu_start
+    print(f"\n5-Fold Cross-Validation R² Ortalaması: {cv_r2_mean:.4f}")
+
     # MODEL EĞİTİMİ VE SÜRE ÖLÇÜMÜ
     start_time = time.time()
+    cpu_start = time.process_time()
 
-    model_lr = LinearRegression()
-    model_lr.fit(X_train, y_train)
+    # Nihai model, ridge yolu ve LOO hataları aynı (tek) ayrıştırmadan türetilir
+    factorization = LinearFactorization(cv_results['gram'])
+    if final_model == 'ensemble':
+        # Fold modellerinin ortalaması nihai model olur; tüm Train seti üzerinde altıncı bir eğitim yapılmaz
+        model_lr = FoldEnsembleRegressor(cv_results['models'])
+    else:
+        coefs, intercepts = factorization.coefficients([0.0])
+        model_lr = linear_regression_from(coefs[0], intercepts[0], X_train.columns)
 
     end_time = time.time()
     training_time = end_time - start_time
+    training_cpu_time = time.process_time() - cpu_start
+    if final_model == 'ensemble':
+        # Nihai modelin eğitim maliyeti fold eğitimlerinin kendisidir
+        training_time, training_cpu_time = cv_time, cv_cpu_time
     print(f"\nEğitim Süresi: {training_time:.4f} saniye")
 
+    # LEAVE-ONE-OUT VE RIDGE YOLU (tek ek tarama, tüm α değerleri birlikte)
+    path_start = time.time()
+    path = ridge_path(factorization, X_train, y_train, X_val, y_val, alphas=ALPHAS)
+    path_time = time.time() - path_start
+    print(f"\nLeave-One-Out R² (α = 0): {path['loo_r2'][0]:.4f} | Ayrıştırma Rankı: {factorization.rank}")
+    print(f"LOO Hatasına Göre En İyi Ridge α: {path['best_alpha_loo']:g} "
+          f"({len(path['alphas'])} α değeri, {path_time:.4f} saniye)")
+
     # PERFORMANS DEĞERLENDİRMESİ
 
     # 1. Doğrulama Seti (Validation) Performansı
@@ -59,6 +87,7 @@ def run_linear_regression(data_path="../data/processed_data/"):
     # RMSE ve MAE okunaklı formatta
     print(f"RMSE: {val_metrics['RMSE']:,.2f}") 
     print(f"MAE: {val_metrics['MAE']:,.2f}")
+    print(f"MAPE: {val_metrics['MAPE']:.2%}")
 
     # 2. Test Seti Performansı
     y_test_pred = model_lr.predict(X_test)
@@ -69,11 +98,7 @@ def run_linear_regression(data_path="../data/processed_data/"):
     # RMSE ve MAE okunaklı formatta
     print(f"RMSE: {test_metrics['RMSE']:,.2f}") 
     print(f"MAE: {test_metrics['MAE']:,.2f}")
-
-    # Cross-Validation Sonuçları (Train seti üzerinde)
-    cv_scores = cross_val_score(model_lr, X_train, y_train, cv=5, scoring='r2', n_jobs=-1)
-    cv_r2_mean = np.mean(cv_scores)
-    print(f"\n5-Fold Cross-Validation R² Ortalaması: {cv_r2_mean:.4f}")
+    print(f"MAPE: {test_metrics['MAPE']:.2%}")
 
     # ÖZELLİK ÖNEMİ YORUMLANMASI
     print("\n--- Özellik Önemleri (Katsayıların Mutlak Değeri) ---")
@@ -82,24 +107,42 @@ def run_linear_regression(data_path="../data/processed_data/"):
 
     # MODEL VE SONUÇLARI KAYDETME
 
-    MODEL_DIR = 'models'
+    MODEL_DIR = model_dir
     if not os.path.exists(MODEL_DIR):
         os.makedirs(MODEL_DIR)
 
     results_lr = {
         'training_time': training_time,
+        'training_cpu_time': training_cpu_time,
+        'cv_time': cv_time,
+        'cv_cpu_time': cv_cpu_time,
         'validation': val_metrics,
         'test': test_metrics,
-        'cv_r2_mean': cv_r2_mean
+        'test_predictions': np.asarray(y_test_pred, dtype=np.float64),
+        'cv_r2_mean': cv_r2_mean,
+        'cv_scores': cv_scores.tolist(),
+        'cv_fold_fit_times': cv_results['fold_fit_times'],
+        'cv_fold_predict_times': cv_results['fold_predict_times'],
+        'oof_predictions': cv_results['oof_predictions'],
+        'loo_r2': path['loo_r2'][0],
+        'loo_mse': path['loo_mse'][0],
+        'ridge_path': path,
+        'ridge_path_time': path_time,
+        'final_model': final_model
     }
 
     # Modeli ve sonuçları klasöre kaydet
-    joblib.dump(model_lr, os.path.join(MODEL_DIR, 'model_lr.pkl'))
+    # Pickle ve artefakt kilit altında birlikte yazılır (çıkarım servisi yarım güncellemeyi yüklemez)
+    with serving_lock(MODEL_DIR):
+        joblib.dump(model_lr, os.path.join(MODEL_DIR, 'model_lr.pkl'))
+        save_artifact(model_lr, MODEL_DIR, 'lr')
     joblib.dump(results_lr, os.path.join(MODEL_DIR, 'results_lr.pkl'))  # Tüm metrikler ve süre buraya kaydedildi.
 
     print(f"\n[INFO] Lineer Regresyon modeli ve sonuçları '{MODEL_DIR}' klasörüne başarıyla kaydedildi.")
     print("--- Lineer Regresyon Modeli Tamamlandı ---")
 
+    return model_lr, results_lr
+
 
 if __name__ == "__main__":
     run_linear_regression()
\ No newline at end of file
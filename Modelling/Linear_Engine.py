@@ -0,0 +1,239 @@
+import numpy as np
+import time
+import os
+import sys
+from sklearn.linear_model import LinearRegression
+from sklearn.metrics import r2_score
+
+# İzleme yardımcıları Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Tracing import span, traced
+
+
+# Kapalı formda lineer regresyon motoru.
+# Train seti satır parçaları halinde bir kez taranır ve merkezlenmiş XᵀX, Xᵀy, yᵀy toplamları (fold başına)
+# biriktirilir. Tüm modeller bu toplamlardan çözülür:
+#   - k-fold CV: her fold'un eğitim toplamı = toplam - fold toplamı (yeniden tarama/fit yok)
+#   - nihai model ve ridge yolu: Sxx = V diag(λ) Vᵀ tek bir özdeğer ayrıştırması;
+#     β(α) = V diag(1 / (λ + α)) Vᵀ Sxy (sabit terim cezalandırılmaz)
+#   - tam leave-one-out hatası: h_ii = 1/n + Σ_k z_ik² / (λ_k + α), z = (x - x̄) V;
+#     LOO artığı e_i / (1 - h_ii). Tüm α değerleri için tek bir ek taramada hesaplanır.
+
+CHUNK_ROWS = 100_000
+
+# α = 0 ve ridge ızgarası (logaritmik); α = 0 en küçük normlu (pinv) çözümdür, LinearRegression ile aynıdır
+ALPHAS = np.concatenate([[0.0], np.logspace(-3, 4, 29)])
+
+# En büyük özdeğere göre bu oranın altındaki özdeğerler sıfır kabul edilir (one-hot + sabit terim eşdoğrusallığı)
+RANK_TOL = 1e-10
+
+
+def iter_row_chunks(X, y, chunk_rows=CHUNK_ROWS, rows=None):
+    """
+    (X, y) parçalarını float64 olarak verir. Satırlar dönüştürülmeden önce seçildiği için memmap
+    üzerindeki DataFrame'lerde bellek kullanımı parça boyutuyla sınırlıdır.
+    """
+    n_rows = len(y) if rows is None else len(rows)
+    for start in range(0, n_rows, chunk_rows):
+        idx = slice(start, start + chunk_rows) if rows is None else rows[start:start + chunk_rows]
+        X_part = X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
+        y_part = y.iloc[idx] if hasattr(y, 'iloc') else y[idx]
+        yield np.asarray(X_part, dtype=np.float64), np.asarray(y_part, dtype=np.float64)
+
+
+class CenteredGram:
+    """Merkezlenmiş ortak momentler; parçalar birleştirilebilir ve bir alt küme toplamdan çıkarılabilir."""
+
+    def __init__(self, n_features):
+        self.n = 0.0
+        self.mean_x = np.zeros(n_features)
+        self.mean_y = 0.0
+        self.sxx = np.zeros((n_features, n_features))
+        self.sxy = np.zeros(n_features)
+        self.syy = 0.0
+
+    def update(self, X, y):
+        n_b = float(len(y))
+        if n_b == 0:
+            return
+        mean_x = X.mean(axis=0)
+        mean_y = float(y.mean())
+        Xc = X - mean_x
+        yc = y - mean_y
+        self._merge(n_b, mean_x, mean_y, Xc.T @ Xc, Xc.T @ yc, float(yc @ yc))
+
+    def _merge(self, n_b, mean_x_b, mean_y_b, sxx_b, sxy_b, syy_b):
+        n = self.n + n_b
+        dx = mean_x_b - self.mean_x
+        dy = mean_y_b - self.mean_y
+        w = self.n * n_b / n
+        self.mean_x = self.mean_x + dx * n_b / n
+        self.mean_y = self.mean_y + dy * n_b / n
+        self.sxx = self.sxx + sxx_b + np.outer(dx, dx) * w
+        self.sxy = self.sxy + sxy_b + dx * dy * w
+        self.syy = self.syy + syy_b + dy ** 2 * w
+        self.n = n
+
+    def merge(self, other):
+        if other.n > 0:
+            self._merge(other.n, other.mean_x, other.mean_y, other.sxx, other.sxy, other.syy)
+
+    def subtract(self, part):
+        """Toplamdan `part` satırları çıkarılmış kalan kümenin momentleri (_merge işleminin tersi)."""
+        rest = CenteredGram(len(self.mean_x))
+        rest.n = self.n - part.n
+        rest.mean_x = (self.n * self.mean_x - part.n * part.mean_x) / rest.n
+        rest.mean_y = (self.n * self.mean_y - part.n * part.mean_y) / rest.n
+        dx = part.mean_x - rest.mean_x
+        dy = part.mean_y - rest.mean_y
+        w = rest.n * part.n / self.n
+        rest.sxx = self.sxx - part.sxx - np.outer(dx, dx) * w
+        rest.sxy = self.sxy - part.sxy - dx * dy * w
+        rest.syy = self.syy - part.syy - dy ** 2 * w
+        return rest
+
+
+class LinearFactorization:
+    """Sxx'in tek özdeğer ayrıştırması; α değerleri için katsayılar ve LOO hataları buradan türetilir."""
+
+    def __init__(self, gram, rank_tol=RANK_TOL):
+        eigvals, self.eigvecs = np.linalg.eigh(gram.sxx)
+        self.eigvals = np.clip(eigvals, 0.0, None)
+        self.rank_mask = self.eigvals > rank_tol * max(self.eigvals.max(initial=0.0), np.finfo(float).tiny)
+        self.q = self.eigvecs.T @ gram.sxy
+        self.gram = gram
+
+    @property
+    def rank(self):
+        return int(self.rank_mask.sum())
+
+    def _inverse(self, alphas):
+        """(α sayısı x özellik) 1 / (λ + α); α = 0 için sıfır özdeğerli yönler atlanır (pinv)."""
+        alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+        denom = self.eigvals[None, :] + alphas[:, None]
+        with np.errstate(divide='ignore'):
+            inverse = np.where(denom > 0, 1.0 / denom, 0.0)
+        inverse[(alphas == 0)[:, None] & ~self.rank_mask[None, :]] = 0.0
+        return inverse
+
+    def coefficients(self, alphas=ALPHAS):
+        """Her α için (katsayılar, sabit terimler)."""
+        coefs = (self._inverse(alphas) * self.q) @ self.eigvecs.T
+        intercepts = self.gram.mean_y - coefs @ self.gram.mean_x
+        return coefs, intercepts
+
+    def leave_one_out(self, chunks, alphas=ALPHAS):
+        """
+        Eğitim satırları üzerinde ek bir taramayla tüm α değerleri için tam LOO hata kareleri toplamını
+        (PRESS) hesaplar. chunks: eğitim toplamlarını oluşturan satırların (X, y) parçaları.
+        """
+        inverse = self._inverse(alphas)
+        weights = (inverse * self.q).T  # (özellik x α)
+        press = np.zeros(len(inverse))
+        n_rows = 0
+        for X, y in chunks:
+            Z = (X - self.gram.mean_x) @ self.eigvecs
+            residual = (y - self.gram.mean_y)[:, None] - Z @ weights
+            leverage = 1.0 / self.gram.n + (Z ** 2) @ inverse.T
+            press += ((residual / np.maximum(1.0 - leverage, 1e-12)) ** 2).sum(axis=0)
+            n_rows += len(y)
+        return {
+            'loo_mse': press / n_rows,
+            'loo_r2': 1.0 - press / self.gram.syy
+        }
+
+
+def linear_regression_from(coef, intercept, feature_names=None):
+    """Çözülmüş katsayıları tahmin için sklearn LinearRegression nesnesine yerleştirir."""
+    model = LinearRegression()
+    model.coef_ = np.asarray(coef, dtype=np.float64)
+    model.intercept_ = float(intercept)
+    model.n_features_in_ = len(model.coef_)
+    if feature_names is not None:
+        model.feature_names_in_ = np.asarray(feature_names, dtype=object)
+    return model
+
+
+@traced('linear.accumulate_grams')
+def accumulate_fold_grams(X, y, folds, chunk_rows=CHUNK_ROWS):
+    """Train setini bir kez tarayarak her fold'un test satırları için ayrı moment toplamları biriktirir."""
+    fold_ids = np.empty(len(y), dtype=np.int64)
+    for k, (_, test_idx) in enumerate(folds):
+        fold_ids[test_idx] = k
+
+    grams = [CenteredGram(X.shape[1]) for _ in folds]
+    for start, (X_chunk, y_chunk) in zip(range(0, len(y), chunk_rows), iter_row_chunks(X, y, chunk_rows)):
+        ids = fold_ids[start:start + len(y_chunk)]
+        for k in np.unique(ids):
+            mask = ids == k
+            grams[k].update(X_chunk[mask], y_chunk[mask])
+    return grams
+
+
+@traced('cv.linear')
+def cross_validate_linear(X, y, folds, chunk_rows=CHUNK_ROWS, keep_models=False):
+    """
+    cross_validate_model ile aynı çıktıyı (skorlar, out-of-fold tahminleri, süreler) üretir; fold modelleri
+    toplam momentlerden fold momentleri çıkarılarak çözülür. Toplam momentler de döndürülür.
+    """
+    grams = accumulate_fold_grams(X, y, folds, chunk_rows)
+    total = CenteredGram(X.shape[1])
+    for gram in grams:
+        total.merge(gram)
+
+    feature_names = getattr(X, 'columns', None)
+    y_true = np.asarray(y, dtype=np.float64)
+    oof_predictions = np.empty(len(y_true), dtype=np.float64)
+    scores, fit_times, predict_times, models = [], [], [], []
+    for (_, test_idx), gram in zip(folds, grams):
+        start_time = time.time()
+        with span('cv.fold_fit', rows=int(total.n - gram.n)):
+            coefs, intercepts = LinearFactorization(total.subtract(gram)).coefficients([0.0])
+        fit_times.append(time.time() - start_time)
+
+        start_time = time.time()
+        with span('cv.fold_predict', rows=len(test_idx)):
+            y_pred = np.concatenate([X_chunk @ coefs[0] + intercepts[0]
+                                     for X_chunk, _ in iter_row_chunks(X, y, chunk_rows, rows=test_idx)])
+        predict_times.append(time.time() - start_time)
+
+        oof_predictions[test_idx] = y_pred
+        scores.append(r2_score(y_true[test_idx], y_pred))
+        if keep_models:
+            models.append(linear_regression_from(coefs[0], intercepts[0], feature_names))
+
+    cv_results = {
+        'scores': np.array(scores),
+        'oof_predictions': oof_predictions,
+        'fold_fit_times': fit_times,
+        'fold_predict_times': predict_times,
+        'gram': total
+    }
+    if keep_models:
+        cv_results['models'] = models
+    return cv_results
+
+
+@traced('linear.ridge_path')
+def ridge_path(factorization, X_train, y_train, X_val=None, y_val=None, alphas=ALPHAS, chunk_rows=CHUNK_ROWS):
+    """Tek ayrıştırmadan α ızgarası boyunca katsayılar, tam LOO hataları ve (verilirse) Validation R²."""
+    coefs, intercepts = factorization.coefficients(alphas)
+    path = {
+        'alphas': np.asarray(alphas, dtype=np.float64).tolist(),
+        'coefs': coefs.tolist(),
+        'intercepts': intercepts.tolist()
+    }
+    loo = factorization.leave_one_out(iter_row_chunks(X_train, y_train, chunk_rows), alphas)
+    path['loo_mse'] = loo['loo_mse'].tolist()
+    path['loo_r2'] = loo['loo_r2'].tolist()
+
+    if X_val is not None:
+        y_val = np.asarray(y_val, dtype=np.float64)
+        predictions = np.vstack([X_chunk @ coefs.T + intercepts for X_chunk, _ in
+                                 iter_row_chunks(X_val, y_val, chunk_rows)])
+        residual = predictions - y_val[:, None]
+        y_c = y_val - y_val.mean()
+        path['val_r2'] = (1.0 - (residual ** 2).sum(axis=0) / (y_c @ y_c)).tolist()
+
+    path['best_alpha_loo'] = float(path['alphas'][int(np.argmin(path['loo_mse']))])
+    return path
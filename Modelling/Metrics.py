@@ -0,0 +1,108 @@
+import numpy as np
+
+
+# Artık (tahmin - gerçek) dağılımı için raporlanan kantiller
+RESIDUAL_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Bootstrap ayarları: yeniden örnek sayısı, güven düzeyi ve bellek sınırı (bir parçadaki indeks sayısı)
+N_BOOTSTRAP = 1000
+CONFIDENCE = 0.95
+BOOTSTRAP_CHUNK_ELEMENTS = 4_000_000
+
+# Gerçek değeri sıfıra çok yakın satırlarda MAPE'nin patlamaması için (sklearn ile aynı eşik)
+_EPS = np.finfo(np.float64).eps
+
+
+def calculate_metrics(y_true, y_pred, quantiles=RESIDUAL_QUANTILES):
+    """
+    R², RMSE, MAE, MAPE ve artık kantillerini tek geçişte hesaplar:
+    gerekli toplamlar tek bir (5 x n) matris üzerinde tek bir indirgeme ile alınır.
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    y_pred = np.asarray(y_pred, dtype=np.float64)
+    n = len(y_true)
+
+    # y sabit bir değer etrafında merkezlenir; kareler toplamı farkında sayısal kayıp olmaz
+    shift = y_true[:1024].mean()
+    residual = y_pred - y_true
+    abs_residual = np.abs(residual)
+    y_c = y_true - shift
+    sums = np.stack([
+        residual * residual,
+        abs_residual,
+        abs_residual / np.maximum(np.abs(y_true), _EPS),
+        y_c,
+        y_c * y_c
+    ]).sum(axis=1)
+    sse, sae, sape, sum_y, sum_y2 = sums
+
+    ss_tot = sum_y2 - sum_y * sum_y / n
+    r2 = 1.0 - sse / ss_tot if ss_tot > 0 else np.nan
+    return {
+        'R2': float(r2),
+        'RMSE': float(np.sqrt(sse / n)),
+        'MAE': float(sae / n),
+        'MAPE': float(sape / n),
+        'Residual_Quantiles': dict(zip(quantiles, np.quantile(residual, quantiles).tolist()))
+    }
+
+
+def _resample_counts(rng, n_samples, n_boot):
+    """Yeniden örnekleme indeks matrisini (n_boot x n) satır başına tekrar sayısı matrisine çevirir."""
+    idx = rng.integers(0, n_samples, size=(n_boot, n_samples))
+    idx += (np.arange(n_boot) * n_samples)[:, None]
+    return np.bincount(idx.ravel(), minlength=n_boot * n_samples).reshape(n_boot, n_samples).astype(np.float64)
+
+
+def bootstrap_metrics(y_true, predictions, n_boot=N_BOOTSTRAP, confidence=CONFIDENCE, random_state=42):
+    """
+    Tüm modeller için aynı yeniden örneklerle (eşleştirilmiş) bootstrap güven aralıkları hesaplar.
+    Yeniden örnekler indeks matrisi olarak üretilir ve tekrar sayısı ağırlıklarına çevrilir; böylece
+    her metrik, (yeniden örnek x satır) @ (satır x model) tek bir matris çarpımıdır.
+
+    predictions: {model: y_pred}
+    Döndürülen: {model: {'R2': (alt, üst), 'RMSE': ..., 'MAE': ..., 'MAPE': ..., 'P_Best': olasılık}}
+    """
+    y_true = np.asarray(y_true, dtype=np.float64)
+    keys = list(predictions)
+    n = len(y_true)
+
+    residual = np.stack([np.asarray(predictions[k], dtype=np.float64) for k in keys], axis=1) - y_true[:, None]
+    abs_residual = np.abs(residual)
+    columns = np.hstack([
+        residual * residual,
+        abs_residual,
+        abs_residual / np.maximum(np.abs(y_true), _EPS)[:, None]
+    ])
+    y_c = y_true - y_true.mean()
+    y_columns = np.stack([y_c, y_c * y_c], axis=1)
+
+    rng = np.random.default_rng(random_state)
+    chunk = max(1, BOOTSTRAP_CHUNK_ELEMENTS // max(n, 1))
+    stats = []
+    for start in range(0, n_boot, chunk):
+        counts = _resample_counts(rng, n, min(chunk, n_boot - start))
+        stats.append(np.hstack([counts @ columns, counts @ y_columns]))
+    stats = np.vstack(stats)
+
+    m = len(keys)
+    sse, sae, sape = stats[:, :m], stats[:, m:2 * m], stats[:, 2 * m:3 * m]
+    sum_y, sum_y2 = stats[:, 3 * m], stats[:, 3 * m + 1]
+    ss_tot = (sum_y2 - sum_y * sum_y / n)[:, None]
+
+    boot = {
+        'R2': 1.0 - sse / ss_tot,
+        'RMSE': np.sqrt(sse / n),
+        'MAE': sae / n,
+        'MAPE': sape / n
+    }
+    alpha = (1.0 - confidence) / 2
+    bounds = {name: np.quantile(values, [alpha, 1.0 - alpha], axis=0) for name, values in boot.items()}
+
+    # Eşleştirilmiş yeniden örneklerde her modelin en yüksek R²'ye sahip olma oranı
+    p_best = np.bincount(np.argmax(boot['R2'], axis=1), minlength=m) / len(boot['R2'])
+
+    return {
+        key: {**{name: (float(b[0, i]), float(b[1, i])) for name, b in bounds.items()}, 'P_Best': float(p_best[i])}
+        for i, key in enumerate(keys)
+    }
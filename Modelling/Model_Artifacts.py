@@ -0,0 +1,390 @@
+import pandas as pd
+import numpy as np
+import joblib
+import json
+import time
+import os
+import sys
+import threading
+import argparse
+from contextlib import contextmanager
+from sklearn.linear_model import LinearRegression
+
+try:
+    import fcntl
+except ImportError:  # Windows: servis kilidi uygulanmaz
+    fcntl = None
+
+from CV_Engine import FoldEnsembleRegressor
+from Compiled_Trees import CompiledForest, MODEL_DIR
+from Linear_Engine import linear_regression_from
+
+# Ortak veri yükleyici Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+
+
+# Hızlı yüklenen model artefaktı (model_<key>.pkl'in yanında):
+#   model_<key>.meta.json -> model türü, özellik isimleri, dizi tipleri/boyutları/ofsetleri ve kaynak pickle imzası
+#   model_<key>.bin       -> başlık + tüm dizilerin hizalanmış ardışık yükü; np.memmap ile salt okunur açılır
+#   model_<key>.npz       -> compress=True ise aynı diziler kayıpsız sıkıştırılmış (ilk predict'te belleğe açılır)
+#   model_<key>.joblib    -> derlenemeyen modeller (ör. BinnedRegressor); ilk predict'te mmap_mode='r' ile yüklenir
+# Meta dosyası anında okunur, diziler ilk predict çağrısında eşlenir. Eşleme salt okunur olduğundan aynı
+# dosyayı açan tüm servis süreçleri ağaç dizilerinin sayfa önbelleğindeki tek kopyasını paylaşır.
+# Ağaç modelleri CompiledForest paketine (eşikler float32, tahminler birebir aynı), lineer modeller
+# katsayı dizisine dönüştürülür.
+
+DATA_PATH = "../data/processed_data/"
+META_PATTERN = 'model_{key}.meta.json'
+ARTIFACT_VERSION = 1
+ALIGNMENT = 64
+MAGIC = b'HOUSEART'
+
+PAYLOAD_EXTENSIONS = {'bin': '.bin', 'npz': '.npz', 'joblib': '.joblib'}
+# Birlikte değişmesi gereken servis dosyalarını (model pickle'ı + artefakt) koruyan kilit dosyası
+SERVING_LOCK_FILE = '.serving.lock'
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def meta_path(model_dir, key):
+    return os.path.join(model_dir, META_PATTERN.format(key=key))
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return {'file': os.path.basename(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def serving_lock(model_dir, shared=False, blocking=True):
+    """
+    Model dosyalarını yazanlar özel (exclusive), çıkarım servisi paylaşımlı kilit alır; servis bir
+    güncellemenin yarısını (ör. yeni pickle, eski artefakt) yüklemez. blocking=False iken kilit
+    alınamazsa False verilir.
+    """
+    if fcntl is None:
+        yield True
+        return
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, SERVING_LOCK_FILE), 'a') as f:
+        flags = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | (0 if blocking else fcntl.LOCK_NB)
+        try:
+            fcntl.flock(f, flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _is_linear(model):
+    if isinstance(model, FoldEnsembleRegressor):
+        return all(isinstance(est, LinearRegression) for est in model.estimators)
+    return isinstance(model, LinearRegression)
+
+
+def _feature_names(model):
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None and isinstance(model, FoldEnsembleRegressor):
+        names = getattr(model.estimators[0], 'feature_names_in_', None)
+    return None if names is None else [str(c) for c in names]
+
+
+def _model_arrays(model, float32_values=False):
+    """Modeli (tür, diziler, skalerler, özellik isimleri) olarak ayrıştırır; derlenemiyorsa tür 'pickle' olur."""
+    if _is_linear(model):
+        arrays = {'coef': np.asarray(model.coef_, dtype=np.float64)}
+        return 'linear', arrays, {'intercept': float(np.ravel(model.intercept_)[0])}, _feature_names(model)
+
+    try:
+        # float32 eşikler aşağı yuvarlandığı için tahminler float64 eşiklerle aynıdır (kayıpsız)
+        forest = CompiledForest.from_model(model, float32_thresholds=True)
+    except TypeError:
+        return 'pickle', {}, {}, _feature_names(model)
+
+    arrays = {
+        'feature': forest.feature, 'threshold': forest.threshold, 'left': forest.left, 'right': forest.right,
+        'value': forest.value.astype(np.float32) if float32_values else forest.value, 'roots': forest.roots
+    }
+    return 'forest', arrays, {'max_depth': forest.max_depth, 'base': forest.base}, forest.feature_names
+
+
+def save_artifact(model, model_dir, key, compress=False, float32_values=False):
+    """
+    Modeli meta veri + dizi yükü olarak kaydeder. compress=True: kayıpsız sıkıştırma (mmap yok);
+    float32_values=True: ağaç yaprak değerleri float32 (yük yarıya iner, tahminlerde ~1e-7 göreli fark).
+    """
+    kind, arrays, scalars, feature_names = _model_arrays(model, float32_values)
+    token = f'{time.time_ns():x}-{os.getpid():x}'
+    base_path = os.path.join(model_dir, f'model_{key}')
+
+    specs = {}
+    if kind == 'pickle':
+        payload_format = 'joblib'
+        _write_atomic(base_path + '.joblib', lambda path: joblib.dump({'token': token, 'model': model}, path))
+    elif compress:
+        payload_format = 'npz'
+        for name, array in arrays.items():
+            specs[name] = {'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+        def write_npz(path):
+            with open(path, 'wb') as f:
+                np.savez_compressed(f, token=np.array(token), **arrays)
+        _write_atomic(base_path + '.npz', write_npz)
+    else:
+        payload_format = 'bin'
+        offset = ALIGNMENT  # ilk blok: sihirli bayt + sürüm belirteci
+        for name, array in arrays.items():
+            specs[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+            offset = _align(offset + array.nbytes)
+
+        def write_bin(path):
+            with open(path, 'wb') as f:
+                f.write((MAGIC + token.encode('ascii')).ljust(ALIGNMENT, b'\0'))
+                for name, array in arrays.items():
+                    f.seek(specs[name]['offset'])
+                    f.write(np.ascontiguousarray(array).tobytes())
+                f.truncate(offset)
+        _write_atomic(base_path + '.bin', write_bin)
+
+    payload_file = os.path.basename(base_path + PAYLOAD_EXTENSIONS[payload_format])
+    source_path = base_path + '.pkl'
+    meta = {
+        'version': ARTIFACT_VERSION,
+        'key': key,
+        'kind': kind,
+        'model_type': type(model).__name__,
+        'token': token,
+        'payload': payload_file,
+        'payload_format': payload_format,
+        'arrays': specs,
+        'scalars': scalars,
+        'feature_names': feature_names,
+        'float32_values': bool(float32_values and kind == 'forest'),
+        'payload_size': os.path.getsize(os.path.join(model_dir, payload_file)),
+        'source': _source_signature(source_path) if os.path.exists(source_path) else None
+    }
+
+    # Yük önce, meta en son yazılır; okuyucu belirteç uyuşmazsa meta dosyasını yeniden okur
+    def write_meta(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    _write_atomic(meta_path(model_dir, key), write_meta)
+
+    # Eski biçimdeki yükler (ör. önceki kayıtta compress=True) artık kullanılmaz
+    for extension in PAYLOAD_EXTENSIONS.values():
+        stale = base_path + extension
+        if stale != os.path.join(model_dir, payload_file) and os.path.exists(stale):
+            os.remove(stale)
+    return meta
+
+
+class ModelArtifact:
+    """
+    Meta veriyi hemen, dizi yükünü ilk predict çağrısında açan model.
+    Servisin iş parçacıkları aynı anda ilk kez tahmin isterse yük yalnızca bir kez açılır.
+    """
+
+    def __init__(self, path, retries=3):
+        self.path = path
+        self.directory = os.path.dirname(path)
+        self.retries = retries
+        self._read_meta()
+        self._model = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, model_dir, key):
+        return cls(meta_path(model_dir, key))
+
+    def _read_meta(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.key = self.meta['key']
+        self.kind = self.meta['kind']
+        names = self.meta['feature_names']
+        self.feature_names_in_ = None if names is None else np.asarray(names, dtype=object)
+
+    @property
+    def payload_path(self):
+        return os.path.join(self.directory, self.meta['payload'])
+
+    @property
+    def size_bytes(self):
+        return os.path.getsize(self.path) + os.path.getsize(self.payload_path)
+
+    def _arrays(self):
+        """Dizileri ve yükteki belirteci döndürür; .bin yükünde diziler tek bir eşleme üzerinde görünümlerdir."""
+        if self.meta['payload_format'] == 'npz':
+            with np.load(self.payload_path, allow_pickle=False) as f:
+                arrays = {name: f[name] for name in f.files}
+            return str(arrays.pop('token')), arrays
+
+        raw = np.memmap(self.payload_path, dtype=np.uint8, mode='r')
+        header = bytes(raw[:ALIGNMENT]).rstrip(b'\0')
+        if not header.startswith(MAGIC):
+            raise ValueError(f"'{self.payload_path}' bir model artefaktı değil.")
+        arrays = {}
+        for name, spec in self.meta['arrays'].items():
+            dtype = np.dtype(spec['dtype'])
+            n_bytes = int(np.prod(spec['shape'], dtype=np.int64)) * dtype.itemsize
+            arrays[name] = raw[spec['offset']:spec['offset'] + n_bytes].view(dtype).reshape(spec['shape'])
+        return header[len(MAGIC):].decode('ascii'), arrays
+
+    def _materialize(self):
+        if self.kind == 'pickle':
+            payload = joblib.load(self.payload_path, mmap_mode='r')
+            return payload['token'], payload['model']
+
+        token, arrays = self._arrays()
+        scalars = self.meta['scalars']
+        if self.kind == 'linear':
+            return token, linear_regression_from(arrays['coef'], scalars['intercept'], self.meta['feature_names'])
+        return token, CompiledForest(max_depth=scalars['max_depth'], base=scalars['base'],
+                                     feature_names=self.meta['feature_names'], **arrays)
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # Yük meta dosyasından önce değiştirilmiş olabilir (eşzamanlı yeniden kayıt)
+                    for _ in range(self.retries):
+                        token, model = self._materialize()
+                        if token == self.meta['token']:
+                            break
+                        time.sleep(0.05)
+                        self._read_meta()
+                    else:
+                        raise ValueError(f"'{self.path}' ile yükü eşleşmiyor (kayıt sürüyor olabilir).")
+                    self._model = model
+        return self._model
+
+    def predict(self, X):
+        return self.model.predict(X)
+
+
+def is_fresh(model_dir, key):
+    """Artefakt var ve model_<key>.pkl kaydedildiğinden beri değişmemişse True."""
+    path = meta_path(model_dir, key)
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r', encoding='utf-8') as f:
+        source = json.load(f).get('source')
+    source_path = os.path.join(model_dir, f'model_{key}.pkl')
+    if not os.path.exists(source_path):
+        return True
+    if source is None:
+        return False
+    current = _source_signature(source_path)
+    return current['size'] == source['size'] and current['mtime_ns'] == source['mtime_ns']
+
+
+def model_path(model_dir, key):
+    """Güncel artefaktın meta dosyası, yoksa (veya pickle daha yeniyse) model_<key>.pkl yolu."""
+    if is_fresh(model_dir, key):
+        return meta_path(model_dir, key)
+    return os.path.join(model_dir, f'model_{key}.pkl')
+
+
+def load_model(model_dir, key):
+    """Güncel artefakt varsa tembel (lazy) ModelArtifact, yoksa pickle'dan tam modeli döndürür."""
+    path = model_path(model_dir, key)
+    if path.endswith('.meta.json'):
+        return ModelArtifact(path)
+    return joblib.load(path)
+
+
+def artifact_stats(model_dir, keys):
+    """Model başına artefakt/pickle boyutu ile meta okuma ve dizi açma süreleri (rapor tablosu için)."""
+    stats = {}
+    for key in keys:
+        if not is_fresh(model_dir, key):
+            continue
+        start = time.perf_counter()
+        artifact = ModelArtifact.load(model_dir, key)
+        meta_time = time.perf_counter() - start
+        start = time.perf_counter()
+        artifact.model
+        open_time = time.perf_counter() - start
+
+        pickle_path = os.path.join(model_dir, f'model_{key}.pkl')
+        stats[key] = {
+            'size_mb': artifact.size_bytes / 2 ** 20,
+            'pickle_mb': os.path.getsize(pickle_path) / 2 ** 20 if os.path.exists(pickle_path) else float('nan'),
+            'load_ms': (meta_time + open_time) * 1000,
+            'format': artifact.meta['payload_format']
+        }
+    return stats
+
+
+def convert_saved_models(model_dir=MODEL_DIR, keys=('lr', 'rf', 'gbr'), compress=False, float32_values=False,
+                         data_path=DATA_PATH):
+    """
+    Kaydedilmiş pickle modellerini artefakt biçimine dönüştürür ve pickle ile boyut/yükleme süresini karşılaştırır.
+    Test seti bulunursa iki yolun tahminleri arasındaki en büyük fark da raporlanır.
+    """
+    try:
+        _, _, X_test, _, _, _ = load_splits(data_path)
+    except FileNotFoundError:
+        X_test = None
+
+    rows = []
+    for key in keys:
+        pickle_path = os.path.join(model_dir, f'model_{key}.pkl')
+        if not os.path.exists(pickle_path):
+            print(f"[UYARI] '{pickle_path}' bulunamadı, atlanıyor.")
+            continue
+        start = time.perf_counter()
+        model = joblib.load(pickle_path)
+        pickle_time = time.perf_counter() - start
+
+        with serving_lock(model_dir):
+            meta = save_artifact(model, model_dir, key, compress=compress, float32_values=float32_values)
+
+        start = time.perf_counter()
+        artifact = ModelArtifact.load(model_dir, key)
+        meta_time = time.perf_counter() - start
+        start = time.perf_counter()
+        artifact.model
+        open_time = time.perf_counter() - start
+
+        row = {
+            'Model': key,
+            'Tür': meta['kind'],
+            'Biçim': meta['payload_format'],
+            'Pickle (MB)': os.path.getsize(pickle_path) / 2 ** 20,
+            'Artefakt (MB)': artifact.size_bytes / 2 ** 20,
+            'Pickle Yükleme (ms)': pickle_time * 1000,
+            'Meta Okuma (ms)': meta_time * 1000,
+            'Dizi Açma (ms)': open_time * 1000
+        }
+        if X_test is not None:
+            row['En Büyük Fark'] = float(np.max(np.abs(artifact.predict(X_test) - model.predict(X_test))))
+        rows.append(row)
+
+    summary = pd.DataFrame(rows)
+    print("\n--- Model Artefaktları: Pickle ve Hızlı Yüklenen Biçim ---")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kaydedilmiş modelleri hızlı yüklenen artefakt biçimine dönüştürür")
+    parser.add_argument('--models', nargs='+', default=['lr', 'rf', 'gbr'])
+    parser.add_argument('--compress', action='store_true', help="Dizi yükünü kayıpsız sıkıştır (mmap ile paylaşılamaz)")
+    parser.add_argument('--float32-values', action='store_true', help="Ağaç yaprak değerlerini float32 olarak sakla")
+    args = parser.parse_args()
+
+    convert_saved_models(keys=args.models, compress=args.compress, float32_values=args.float32_values)
@@ -0,0 +1,243 @@
+import pandas as pd
+import numpy as np
+import time
+import json
+import hashlib
+import joblib
+import glob
+import re
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
+
+# Ortak veri yükleyici Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Hyperparameter_Search import data_fingerprint
+from Metrics import calculate_metrics
+from Tracing import traced
+
+
+DATA_PATH = "../data/processed_data/"
+MODEL_DIR = 'models'
+CACHE_DIR = os.path.join(MODEL_DIR, 'importance_cache')
+SUMMARY_FILE = 'permutation_importance.json'
+
+N_REPEATS = 5
+RANDOM_STATE = 42
+SPLITS = ('val', 'test')
+
+# Tek bir predict çağrısındaki en fazla satır sayısı (aynı özelliğin birden fazla permütasyonu yan yana)
+BATCH_ROWS = 200_000
+
+# Sürümlenmiş artımlı güncelleme dosyaları (ör. model_lr_v3.pkl) hariç tutulur
+MODEL_FILE_PATTERN = re.compile(r'^model_([a-z_]+)\.pkl$')
+
+# İşçi süreçteki model, veri ve yeniden kullanılan permütasyon tamponu (süreç başına bir kez kurulur)
+_STATE = None
+
+
+# ÖNBELLEK ANAHTARLARI
+
+def file_hash(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def importance_key(model_hash, data_hash, n_repeats, random_state):
+    payload = json.dumps({'model': model_hash, 'data': data_hash, 'n_repeats': n_repeats,
+                          'random_state': random_state, 'metric': 'r2'}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _split_data(data_path, split):
+    X_train, X_val, X_test, y_train, y_val, y_test = load_splits(data_path)
+    return {'train': (X_train, y_train), 'val': (X_val, y_val), 'test': (X_test, y_test)}[split]
+
+
+def _single_threaded(model):
+    """Süreç havuzu zaten paralel olduğu için modelin (ve alt modellerinin) kendi paralelliğini kapatır."""
+    if hasattr(model, 'get_params') and 'n_jobs' in model.get_params(deep=False):
+        model.set_params(n_jobs=1)
+    for child in list(getattr(model, 'estimators', [])) + [getattr(model, 'estimator', None)]:
+        if child is not None:
+            _single_threaded(child)
+    return model
+
+
+# İŞÇİ SÜREÇ
+
+def _init_worker(model_path, data_path, split, batch_rows):
+    """Modeli ve veriyi bir kez yükler; permütasyonlar için tek bir tampon ayırır."""
+    global _STATE
+    X, y = _split_data(data_path, split)
+    X_values = np.ascontiguousarray(X.to_numpy())
+    n_rows = len(X_values)
+    n_blocks = max(1, batch_rows // max(n_rows, 1))
+
+    _STATE = {
+        'model': _single_threaded(joblib.load(model_path)),
+        'X': X_values,
+        'y': np.asarray(y, dtype=np.float64),
+        'columns': X.columns,
+        # Tampon, X'in n_blocks kopyasının alt alta dizilmiş halidir; her blok bir permütasyonu taşır
+        'buffer': np.tile(X_values, (n_blocks, 1)),
+        'n_blocks': n_blocks
+    }
+
+
+def _block_r2(y, predictions):
+    """(blok x satır) tahmin matrisinde her blok için R²."""
+    y_c = y - y.mean()
+    ss_tot = y_c @ y_c
+    residual = predictions - y
+    return 1.0 - np.einsum('ij,ij->i', residual, residual) / ss_tot
+
+
+def _permuted_scores(feature, repeats, random_state):
+    """
+    Bir özelliğin verilen tekrarlarını tampon üzerinde hesaplar: her blokta yalnızca o sütun
+    permüte edilir, tüm bloklar tek bir predict çağrısıyla tahmin edilir ve sütun geri yüklenir.
+    """
+    state = _STATE
+    X, y, buffer = state['X'], state['y'], state['buffer']
+    n_rows = len(X)
+    scores = []
+    with threadpool_limits(limits=1):
+        for start in range(0, len(repeats), state['n_blocks']):
+            group = repeats[start:start + state['n_blocks']]
+            for b, repeat in enumerate(group):
+                perm = np.random.default_rng([random_state, feature, repeat]).permutation(n_rows)
+                buffer[b * n_rows:(b + 1) * n_rows, feature] = X[perm, feature]
+
+            rows = len(group) * n_rows
+            frame = pd.DataFrame(buffer[:rows], columns=state['columns'], copy=False)
+            predictions = np.asarray(state['model'].predict(frame), dtype=np.float64).reshape(len(group), n_rows)
+            scores.extend(_block_r2(y, predictions).tolist())
+
+            for b in range(len(group)):
+                buffer[b * n_rows:(b + 1) * n_rows, feature] = X[:, feature]
+    return feature, list(repeats), scores
+
+
+# HESAPLAMA VE ÖNBELLEK
+
+@traced('permutation_importance.compute')
+def compute_permutation_importance(model_path, data_path=DATA_PATH, split='val', n_repeats=N_REPEATS,
+                                   random_state=RANDOM_STATE, n_jobs=None, batch_rows=BATCH_ROWS):
+    """Özellik x tekrar işlerini süreç havuzuna dağıtarak R² düşüşüne dayalı permütasyon önemini hesaplar."""
+    X, y = _split_data(data_path, split)
+    baseline = calculate_metrics(y, joblib.load(model_path).predict(X))['R2']
+
+    n_blocks = max(1, batch_rows // max(len(X), 1))
+    tasks = [(j, list(range(n_repeats))[start:start + n_blocks])
+             for j in range(X.shape[1]) for start in range(0, n_repeats, n_blocks)]
+    scores = np.full((X.shape[1], n_repeats), np.nan)
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1:
+        _init_worker(model_path, data_path, split, batch_rows)
+        outputs = [_permuted_scores(j, repeats, random_state) for j, repeats in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(tasks)), initializer=_init_worker,
+                                 initargs=(model_path, data_path, split, batch_rows)) as executor:
+            futures = [executor.submit(_permuted_scores, j, repeats, random_state) for j, repeats in tasks]
+            outputs = [future.result() for future in as_completed(futures)]
+
+    for feature, repeats, feature_scores in outputs:
+        scores[feature, repeats] = feature_scores
+
+    drops = baseline - scores
+    return {
+        'baseline_r2': float(baseline),
+        'features': X.columns.tolist(),
+        'importances_mean': drops.mean(axis=1).tolist(),
+        'importances_std': drops.std(axis=1).tolist(),
+        'importances': drops.tolist(),
+        'n_repeats': n_repeats,
+        'n_rows': len(X)
+    }
+
+
+def get_permutation_importance(model_path, data_path=DATA_PATH, split='val', n_repeats=N_REPEATS,
+                               random_state=RANDOM_STATE, n_jobs=None, cache_dir=CACHE_DIR):
+    """(model hash, veri hash) anahtarıyla önbellekten döndürür; yoksa hesaplayıp önbelleğe yazar."""
+    X, y = _split_data(data_path, split)
+    model_hash = file_hash(model_path)
+    data_hash = data_fingerprint(X, y)
+    key = importance_key(model_hash, data_hash, n_repeats, random_state)
+    cache_path = os.path.join(cache_dir, f'{key}.json')
+
+    if os.path.exists(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f), True
+
+    result = compute_permutation_importance(model_path, data_path, split, n_repeats, random_state, n_jobs)
+    result.update({'model_hash': model_hash, 'data_hash': data_hash, 'split': split})
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, cache_path)
+    return result, False
+
+
+def available_models(model_dir=MODEL_DIR):
+    keys = []
+    for path in sorted(glob.glob(os.path.join(model_dir, 'model_*.pkl'))):
+        match = MODEL_FILE_PATTERN.match(os.path.basename(path))
+        if match:
+            keys.append(match.group(1))
+    return keys
+
+
+@traced('permutation_importance')
+def run_permutation_importance(models=None, splits=SPLITS, n_repeats=N_REPEATS, n_jobs=None,
+                               model_dir=MODEL_DIR, data_path=DATA_PATH):
+    """Kaydedilmiş tüm modeller için permütasyon önemini hesaplar ve rapor için özet dosyası yazar."""
+    print("--- Permütasyon Önemi Hesaplanıyor ---")
+    models = models or available_models(model_dir)
+    if not models:
+        print(f"HATA: '{model_dir}' klasöründe model dosyası bulunamadı. Önce modelleri eğitin.")
+        return
+
+    summary = {}
+    for key in models:
+        summary[key] = {}
+        for split in splits:
+            start_time = time.time()
+            try:
+                result, cached = get_permutation_importance(
+                    os.path.join(model_dir, f'model_{key}.pkl'), data_path, split, n_repeats,
+                    n_jobs=n_jobs, cache_dir=os.path.join(model_dir, 'importance_cache')
+                )
+            except FileNotFoundError as e:
+                print(f"HATA: Model veya veri dosyası bulunamadı: {e}")
+                return
+            summary[key][split] = result
+            source = 'önbellek' if cached else 'hesaplandı'
+            top = pd.Series(result['importances_mean'], index=result['features']).sort_values(ascending=False)
+            print(f"[{key}/{split}] {source} ({time.time() - start_time:.2f} saniye) | "
+                  f"en önemli: {top.index[0]} (R² düşüşü {top.iloc[0]:.4f})")
+
+    with open(os.path.join(model_dir, SUMMARY_FILE), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    print(f"\n[INFO] Permütasyon önemi özeti '{model_dir}/{SUMMARY_FILE}' olarak kaydedildi.")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kaydedilmiş modeller için paralel, önbellekli permütasyon önemi")
+    parser.add_argument('--models', nargs='+', default=None, help="Varsayılan: models klasöründeki tüm modeller")
+    parser.add_argument('--splits', nargs='+', choices=['train', 'val', 'test'], default=list(SPLITS))
+    parser.add_argument('--repeats', type=int, default=N_REPEATS)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    args = parser.parse_args()
+
+    run_permutation_importance(models=args.models, splits=args.splits, n_repeats=args.repeats, n_jobs=args.n_jobs)
@@ -3,47 +3,87 @@ import numpy as np
 import time
 import joblib
 import os
+import sys
+import argparse
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import cross_val_score
-from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
 
+# Ortak veri yükleyici Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Metrics import calculate_metrics
+from CV_Engine import get_folds, cross_validate_model, FoldEnsembleRegressor
+from Tracing import span, traced
+from Model_Artifacts import save_artifact, serving_lock
+from Distributed_Forest import fit_distributed
 
-# Metrik Hesaplama Fonksiyonu
-def calculate_metrics(y_true, y_pred):
-    """Verilen gerçek ve tahmin edilen değerler için metrikleri hesaplar."""
-    r2 = r2_score(y_true, y_pred)
-    rmse = np.sqrt(mean_squared_error(y_true, y_pred))
-    mae = mean_absolute_error(y_true, y_pred)
-    return {'R2': r2, 'RMSE': rmse, 'MAE': mae}
+# Nihai orman ve CV modelleri bu hiperparametrelerle kurulur (Compact_Dtype_Report.py de bunları kullanır)
+RF_PARAMS = {'n_estimators': 100, 'random_state': 42}
 
 
-def run_random_forest(data_path="../data/processed_data/"):
+@traced('model.rf')
+def run_random_forest(data_path="../data/processed_data/", data=None, n_jobs=-1, model_dir='models', final_model='full',
+                      distributed_workers=None):
     """
     Random Forest Regressor modelini eğitir, değerlendirir ve sonuçları kaydeder.
+    distributed_workers verilirse nihai orman ağaç seviyesinde bu kadar işçi sürece dağıtılarak
+    eğitilir (aynı tohumlarla tek süreçli fit ile aynı model; Distributed_Forest.py).
     """
     print("--- Random Forest Regressor Modeli Başlatılıyor ---")
 
     # VERİ YÜKLEME
     try:
-        X_train = pd.read_pickle(os.path.join(data_path, "X_train.pkl"))
-        X_val = pd.read_pickle(os.path.join(data_path, "X_val.pkl"))
-        X_test = pd.read_pickle(os.path.join(data_path, "X_test.pkl"))
-        y_train = pd.read_pickle(os.path.join(data_path, "y_train.pkl"))
-        y_val = pd.read_pickle(os.path.join(data_path, "y_val.pkl"))
-        y_test = pd.read_pickle(os.path.join(data_path, "y_test.pkl"))
+        # Önceden yüklenmiş setler verilmişse (ör. Train_All.py) tekrar okunmaz
+        if data is None:
+            data = load_splits(data_path)
+        X_train, X_val, X_test, y_train, y_val, y_test = data
         print("Veriler başarıyla yüklendi.")
     except FileNotFoundError:
         print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
         return  # Fonksiyondan çık
 
+    # CROSS-VALIDATION (Train seti üzerinde)
+    # Fold'lar bir kez hesaplanır ve üç model arasında paylaşılır; out-of-fold tahminleri de saklanır.
+    cv_start = time.time()
+    cv_cpu_start = time.process_time()
+    folds = get_folds(len(X_train), n_splits=5)
+    # Paralellik fold seviyesinde; her fold içindeki orman tek çekirdek kullanır (n_jobs² iş parçacığı oluşmaz)
+    cv_results = cross_validate_model(
+        RandomForestRegressor(**RF_PARAMS, n_jobs=1),
+        X_train, y_train, folds, n_jobs=n_jobs, keep_models=(final_model == 'ensemble')
+    )
+    cv_scores = cv_results['scores']
+    cv_r2_mean = np.mean(cv_scores)
+    cv_time = time.time() - cv_start
+    cv_cpu_time = time.process_time() - cv_cpu_start
+    print(f"\n5-Fold Cross-Validation R² Ortalaması: {cv_r2_mean:.4f}")
+
     # MODEL EĞİTİMİ VE SÜRE ÖLÇÜMÜ
     start_time = time.time()
-
-    model_rf = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-    model_rf.fit(X_train, y_train)
+    cpu_start = time.process_time()
+
+    if final_model == 'ensemble':
+        # Fold modellerinin ortalaması nihai model olur; tüm Train seti üzerinde altıncı bir eğitim yapılmaz
+        model_rf = FoldEnsembleRegressor(cv_results['models'])
+        for fold_model in model_rf.estimators:
+            fold_model.set_params(n_jobs=n_jobs)
+    elif distributed_workers:
+        # İşçiler işlenmiş setleri data_path üzerinden kendileri (memmap ile) açar
+        model_rf, distributed_info = fit_distributed(data_path, n_workers=distributed_workers,
+                                                     n_estimators=RF_PARAMS['n_estimators'],
+                                                     random_state=RF_PARAMS['random_state'], n_jobs=n_jobs)
+        print(f"Dağıtık Eğitim: {distributed_info['n_workers']} işçi, {distributed_info['n_shards']} parça, "
+              f"{distributed_info['retries']} yeniden deneme")
+    else:
+        model_rf = RandomForestRegressor(**RF_PARAMS, n_jobs=n_jobs)
+        with span('model.rf.fit', rows=len(X_train)):
+            model_rf.fit(X_train, y_train)
 
     end_time = time.time()
     training_time = end_time - start_time
+    training_cpu_time = time.process_time() - cpu_start
+    if final_model == 'ensemble':
+        # Nihai modelin eğitim maliyeti fold eğitimlerinin kendisidir
+        training_time, training_cpu_time = cv_time, cv_cpu_time
     print(f"\nEğitim Süresi: {training_time:.4f} saniye")
 
 
@@ -57,6 +97,7 @@ def run_random_forest(data_path="../data/processed_data/"):
     print(f"R²: {val_metrics['R2']:.4f}")
     print(f"RMSE: {val_metrics['RMSE']:,.2f}")  # Okunabilir format
     print(f"MAE: {val_metrics['MAE']:,.2f}")  # MAE
+    print(f"MAPE: {val_metrics['MAPE']:.2%}")
 
     # 2. Test Seti Performansı
     y_test_pred = model_rf.predict(X_test)
@@ -66,11 +107,7 @@ def run_random_forest(data_path="../data/processed_data/"):
     print(f"R²: {test_metrics['R2']:.4f}")
     print(f"RMSE: {test_metrics['RMSE']:,.2f}")  # Okunabilir format
     print(f"MAE: {test_metrics['MAE']:,.2f}")  # MAE
-
-    # Cross-Validation Sonuçları (Train seti üzerinde)
-    cv_scores = cross_val_score(model_rf, X_train, y_train, cv=5, scoring='r2', n_jobs=-1)
-    cv_r2_mean = np.mean(cv_scores)
-    print(f"\n5-Fold Cross-Validation R² Ortalaması: {cv_r2_mean:.4f}")
+    print(f"MAPE: {test_metrics['MAPE']:.2%}")
 
 
     # ÖZELLİK ÖNEMİ YORUMLANMASI (Feature Importance)
@@ -82,25 +119,46 @@ def run_random_forest(data_path="../data/processed_data/"):
 
     # MODEL VE SONUÇLARI KAYDETME
 
-    MODEL_DIR = 'models'
+    MODEL_DIR = model_dir
     if not os.path.exists(MODEL_DIR):
         os.makedirs(MODEL_DIR)
 
     results_rf = {
         'training_time': training_time,
+        'training_cpu_time': training_cpu_time,
+        'cv_time': cv_time,
+        'cv_cpu_time': cv_cpu_time,
         'validation': val_metrics,
         'test': test_metrics,
+        'test_predictions': np.asarray(y_test_pred, dtype=np.float64),
         'cv_r2_mean': cv_r2_mean,
+        'cv_scores': cv_scores.tolist(),
+        'cv_fold_fit_times': cv_results['fold_fit_times'],
+        'cv_fold_predict_times': cv_results['fold_predict_times'],
+        'oof_predictions': cv_results['oof_predictions'],
+        'final_model': final_model,
+        'distributed_workers': distributed_workers if final_model != 'ensemble' else None,
         'feature_importances': feature_importances.sort_values(ascending=False).to_dict()
     }
 
     # Modeli ve sonuçları modelling/models klasörüne kaydet
-    joblib.dump(model_rf, os.path.join(MODEL_DIR, 'model_rf.pkl'))
+    # Hızlı yüklenen artefakt (meta + memmap dizi yükü); rapor ve servis tam pickle'ı açmadan kullanır.
+    # Pickle ve artefakt kilit altında birlikte yazılır (çıkarım servisi yarım güncellemeyi yüklemez)
+    with serving_lock(MODEL_DIR):
+        joblib.dump(model_rf, os.path.join(MODEL_DIR, 'model_rf.pkl'))
+        save_artifact(model_rf, MODEL_DIR, 'rf')
     joblib.dump(results_rf, os.path.join(MODEL_DIR, 'results_rf.pkl'))
 
     print(f"\n[INFO] Random Forest modeli ve sonuçları '{MODEL_DIR}' klasörüne başarıyla kaydedildi.")
     print("--- Random Forest Regressor Modeli Tamamlandı ---")
 
+    return model_rf, results_rf
+
 
 if __name__ == "__main__":
-    run_random_forest()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Random Forest Regressor eğitimi")
+    parser.add_argument('--distributed', type=int, default=None, metavar='N',
+                        help="Nihai ormanı N işçi sürece ağaç seviyesinde dağıtarak eğit")
+    args = parser.parse_args()
+
+    run_random_forest(distributed_workers=args.distributed)
@@ -0,0 +1,143 @@
+import pandas as pd
+import time
+import os
+import sys
+import argparse
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from threadpoolctl import threadpool_limits
+
+from LinearRegression import run_linear_regression
+from RandomForest import run_random_forest
+from GradientBoosting import run_gradient_boosting
+
+# Ortak veri yükleyici ve raporlama modülleri
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Comparison'))
+from Split_Store import load_splits
+from Comparison_And_Report import create_report
+from Tracing import span, traced, worker_spans, absorb
+
+
+DATA_PATH = "../data/processed_data/"
+MODEL_DIR = 'models'
+REPORT_DIR = '../Comparison/outputs'
+
+TRAINERS = {
+    'lr': run_linear_regression,
+    'rf': run_random_forest,
+    'gbr': run_gradient_boosting,
+    'gbr_hist': partial(run_gradient_boosting, engine='hist')
+}
+
+# Çekirdek bütçesinin modellere dağıtım ağırlıkları (LR hafif, ağaç modelleri ağır)
+CORE_WEIGHTS = {'lr': 1, 'rf': 2, 'gbr': 2, 'gbr_hist': 1}
+
+# İşçi süreçteki veri setleri (süreç başına bir kez, memmap ile açılır)
+_DATA = None
+
+
+def _init_worker(data_path):
+    """İşçi süreç başlarken setleri memmap ile açar; sayfalar süreçler arasında paylaşılır."""
+    global _DATA
+    _DATA = load_splits(data_path)
+
+
+def _run_trainer(key, n_jobs, model_dir, final_model):
+    """
+    Bir modeli verilen çekirdek sayısı ile eğitir; süreç içi duvar ve CPU süresini ölçer.
+    İşçi süreçte toplanan izleme aralıkları ana sürece döndürülür.
+    """
+    wall_start = time.time()
+    cpu_start = time.process_time()
+
+    # BLAS/OpenMP iş parçacıklarını da çekirdek payı ile sınırla
+    with span(f'train_all.{key}', cores=n_jobs), threadpool_limits(limits=n_jobs):
+        output = TRAINERS[key](data=_DATA, n_jobs=n_jobs, model_dir=model_dir, final_model=final_model)
+
+    timing = {'wall': time.time() - wall_start, 'cpu': time.process_time() - cpu_start, 'cores': n_jobs}
+    results = output[1] if output is not None else None
+    return key, results, timing, worker_spans()
+
+
+def allocate_cores(core_budget, models):
+    """Toplam çekirdek bütçesini aynı anda çalışan modeller arasında ağırlıklarına göre paylaştırır."""
+    if core_budget <= len(models):
+        return {m: 1 for m in models}
+
+    total_weight = sum(CORE_WEIGHTS[m] for m in models)
+    cores = {m: max(1, core_budget * CORE_WEIGHTS[m] // total_weight) for m in models}
+
+    # Yuvarlamadan kalan çekirdekleri ağır modellere dağıt
+    remaining = core_budget - sum(cores.values())
+    for m in sorted(models, key=lambda m: -CORE_WEIGHTS[m]):
+        if remaining <= 0:
+            break
+        cores[m] += 1
+        remaining -= 1
+    return cores
+
+
+@traced('train_all')
+def run_all(models=('lr', 'rf', 'gbr'), core_budget=None, data_path=DATA_PATH,
+            model_dir=MODEL_DIR, report_dir=REPORT_DIR, final_model='full'):
+    """
+    Setleri bir kez açar, modelleri küresel bir çekirdek bütçesi ile süreç havuzunda
+    paralel eğitir ve karşılaştırma raporunu sonuçları doğrudan bellekten alarak üretir.
+    """
+    models = list(models)
+    core_budget = core_budget or os.cpu_count() or 1
+    cores = allocate_cores(core_budget, models)
+    stage_times = {}
+
+    print(f"--- Toplu Eğitim Başlatılıyor (Çekirdek Bütçesi: {core_budget}) ---")
+    print(f"Çekirdek Dağılımı: {cores}")
+
+    # 1. VERİ YÜKLEME (ana süreçte bir kez; dosyaların varlığı da burada kontrol edilir)
+    wall_start, cpu_start = time.time(), time.process_time()
+    try:
+        with span('train_all.load_splits'):
+            X_train, _, _, _, _, _ = load_splits(data_path)
+    except FileNotFoundError:
+        print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
+        return
+    stage_times['veri_yükleme'] = {'wall': time.time() - wall_start, 'cpu': time.process_time() - cpu_start}
+    print(f"Eğitim Seti Boyutu: {X_train.shape}")
+
+    # 2. PARALEL EĞİTİM (her model bir süreçte, kendi çekirdek payı ile)
+    results = {}
+    wall_start = time.time()
+    max_workers = min(len(models), core_budget)
+    with span('train_all.training', models=len(models)), \
+            ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(data_path,)) as executor:
+        futures = [executor.submit(_run_trainer, key, cores[key], model_dir, final_model) for key in models]
+        for future in as_completed(futures):
+            key, model_results, timing, spans = future.result()
+            absorb(spans)
+            stage_times[f'eğitim_{key}'] = timing
+            if model_results is not None:
+                results[key] = model_results
+    stage_times['eğitim_toplam'] = {'wall': time.time() - wall_start,
+                                    'cpu': sum(stage_times[f'eğitim_{k}']['cpu'] for k in models)}
+
+    # 3. RAPORLAMA (joblib ile diske yazıp geri okumadan)
+    wall_start, cpu_start = time.time(), time.process_time()
+    with span('train_all.report'):
+        create_report(results, output_dir=report_dir, data_path=data_path, model_dir=model_dir)
+    stage_times['raporlama'] = {'wall': time.time() - wall_start, 'cpu': time.process_time() - cpu_start}
+
+    print("\n--- Aşama Süreleri (Duvar / CPU, saniye) ---")
+    print(pd.DataFrame(stage_times).T.to_string(float_format=lambda x: f'{x:.4f}'))
+
+    return results, stage_times
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üç modeli tek veri yüklemesi ile paralel eğitir")
+    parser.add_argument('--cores', type=int, default=None, help="Toplam çekirdek bütçesi (varsayılan: tüm çekirdekler)")
+    parser.add_argument('--models', nargs='+', choices=list(TRAINERS), default=['lr', 'rf', 'gbr'])
+    parser.add_argument('--final-model', choices=['full', 'ensemble'], default='full',
+                        help="ensemble: nihai model olarak CV fold modellerinin ortalamasını kullan")
+    args = parser.parse_args()
+
+    run_all(models=args.models, core_budget=args.cores, final_model=args.final_model)
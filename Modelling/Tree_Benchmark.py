@@ -0,0 +1,75 @@
+import pandas as pd
+import numpy as np
+import joblib
+import os
+import sys
+import argparse
+
+# Ortak veri yükleyici ve zamanlama yardımcısı Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Split_Store import load_splits
+from Transform_Benchmark import time_call
+from Compiled_Trees import CompiledForest, MODEL_DIR
+
+
+DATA_PATH = "../data/processed_data/"
+BATCH_SIZES = [1, 64, 100_000]
+
+# Karşılaştırılan tahmin yolları: sklearn modeli ve iki derlenmiş eşik hassasiyeti
+VARIANTS = ('float64', 'float32')
+
+
+def run_benchmark(models=('rf', 'gbr'), data_path=DATA_PATH, model_dir=MODEL_DIR, batch_sizes=BATCH_SIZES,
+                  min_time=0.5):
+    """Derlenmiş ağaç topluluklarını sklearn predict ile farklı parti boyutlarında karşılaştırır."""
+    try:
+        _, _, X_test, _, _, _ = load_splits(data_path)
+    except FileNotFoundError:
+        print(f"HATA: Veri dosyaları '{data_path}' yolunda bulunamadı. Lütfen yolu kontrol edin.")
+        return
+
+    rng = np.random.default_rng(42)
+    rows = []
+    for key in models:
+        model_path = os.path.join(model_dir, f'model_{key}.pkl')
+        if not os.path.exists(model_path):
+            print(f"[UYARI] '{model_path}' bulunamadı, atlanıyor.")
+            continue
+        model = joblib.load(model_path)
+        compiled = {variant: CompiledForest.from_model(model, float32_thresholds=(variant == 'float32'))
+                    for variant in VARIANTS}
+
+        for batch_size in batch_sizes:
+            # Büyük partiler için Test satırları tekrarlanır (satır sırası karıştırılır)
+            batch = X_test.iloc[rng.integers(0, len(X_test), size=batch_size)].reset_index(drop=True)
+            X_batch = np.ascontiguousarray(batch.to_numpy(dtype=np.float32))
+            reference = model.predict(batch)
+            sklearn_time, _ = time_call(lambda: model.predict(batch), min_time)
+
+            row = {'Model': key, 'Parti Boyutu': batch_size, 'sklearn (ms)': sklearn_time * 1000}
+            for variant, forest in compiled.items():
+                # Doğruluk kontrolü: derlenmiş tahminler sklearn ile aynı olmalı
+                max_abs_diff = float(np.max(np.abs(forest.predict(X_batch) - reference)))
+                compiled_time, _ = time_call(lambda: forest.predict(X_batch), min_time)
+                row[f'Derlenmiş {variant} (ms)'] = compiled_time * 1000
+                row[f'Hızlanma {variant} (x)'] = sklearn_time / compiled_time
+                row[f'En Büyük Fark {variant}'] = max_abs_diff
+            rows.append(row)
+            print(f"[{key}] Parti Boyutu {batch_size}: sklearn {sklearn_time * 1000:.3f} ms | "
+                  f"derlenmiş {row['Derlenmiş float64 (ms)']:.3f} ms | "
+                  f"fark {row['En Büyük Fark float64']:.2e}")
+
+    summary = pd.DataFrame(rows)
+    print("\n--- Ağaç Tahmini Karşılaştırması (medyan süre) ---")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derlenmiş ağaç tahmini ile sklearn predict karşılaştırması")
+    parser.add_argument('--models', nargs='+', default=['rf', 'gbr'])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--min-time', type=float, default=0.5, help="Her ölçüm için en az tekrar süresi (saniye)")
+    args = parser.parse_args()
+
+    run_benchmark(models=args.models, batch_sizes=args.batch_sizes, min_time=args.min_time)
@@ -0,0 +1,171 @@
+import pandas as pd
+import subprocess
+import time
+import os
+import sys
+import argparse
+
+from Stage_Cache import StageCache, script_params, source_closure, ROOT_DIR, DEFAULT_MAX_SIZE
+
+
+def _p(*parts):
+    return os.path.join(ROOT_DIR, *parts)
+
+
+# Aşama tanımları: betik, çalışma klasörü, ham girdiler, çıktılar (ve isteğe bağlı çıktılar) ve bağımlılıklar.
+# Kaynak kodlar elle listelenmez; betiğin depo içindeki import kapanışından üretilir (stage_sources).
+# Parametreler 'param_sources' betiklerindeki BÜYÜK_HARF sabitlerinden okunur
+# (ör. CORR_THRESHOLD, IQR_MULTIPLIER, RANDOM_STATE).
+STAGES = [
+    {
+        'name': 'preprocessing',
+        'cwd': _p('Preprocessing'),
+        'script': 'Data_Processing.py',
+        'inputs': [_p('data', 'housing.csv')],
+        'param_sources': [_p('Preprocessing', 'Data_Processing.py'), _p('Preprocessing', 'Spatial_Features.py')],
+        'outputs': [_p('data', 'processed_data', 'splits_meta.json'), _p('data', 'processed_data', 'splits_data.bin'),
+                    _p('data', 'processed_data', 'preprocessing.pkl'),
+                    _p('data', 'processed_data', 'preprocessing_meta.json'),
+                    _p('data', 'processed_data', 'compiled_transform.npz'),
+                    _p('data', 'processed_data', 'feature_selection.json')],
+        # Yalnızca uzamsal özellikler açıkken yazılır; kapalıyken geri yüklemede eski dosya silinir
+        'optional_outputs': [_p('data', 'processed_data', 'spatial_index.pkl')],
+        'depends': []
+    },
+    {
+        'name': 'model_lr',
+        'cwd': _p('Modelling'),
+        'script': 'LinearRegression.py',
+        'inputs': [],
+        'param_sources': [],
+        'outputs': [_p('Modelling', 'models', 'model_lr.pkl'), _p('Modelling', 'models', 'results_lr.pkl'),
+                    _p('Modelling', 'models', 'model_lr.meta.json'), _p('Modelling', 'models', 'model_lr.bin')],
+        'depends': ['preprocessing']
+    },
+    {
+        'name': 'model_rf',
+        'cwd': _p('Modelling'),
+        'script': 'RandomForest.py',
+        'inputs': [],
+        'param_sources': [],
+        'outputs': [_p('Modelling', 'models', 'model_rf.pkl'), _p('Modelling', 'models', 'results_rf.pkl'),
+                    _p('Modelling', 'models', 'model_rf.meta.json'), _p('Modelling', 'models', 'model_rf.bin')],
+        'depends': ['preprocessing']
+    },
+    {
+        'name': 'model_gbr',
+        'cwd': _p('Modelling'),
+        'script': 'GradientBoosting.py',
+        'inputs': [],
+        'param_sources': [],
+        'outputs': [_p('Modelling', 'models', 'model_gbr.pkl'), _p('Modelling', 'models', 'results_gbr.pkl'),
+                    _p('Modelling', 'models', 'model_gbr.meta.json'), _p('Modelling', 'models', 'model_gbr.bin')],
+        'depends': ['preprocessing']
+    },
+    {
+        'name': 'importance',
+        'cwd': _p('Modelling'),
+        'script': 'Permutation_Importance.py',
+        'inputs': [],
+        'param_sources': [_p('Modelling', 'Permutation_Importance.py')],
+        'outputs': [_p('Modelling', 'models', 'permutation_importance.json')],
+        'depends': ['preprocessing', 'model_lr', 'model_rf', 'model_gbr']
+    },
+    {
+        'name': 'cascade',
+        'cwd': _p('Modelling'),
+        'script': 'Cascade.py',
+        'inputs': [],
+        'param_sources': [_p('Modelling', 'Cascade.py')],
+        'outputs': [_p('Modelling', 'models', 'cascade.json'), _p('Modelling', 'models', 'results_cascade.pkl')],
+        'depends': ['preprocessing', 'model_lr', 'model_rf', 'model_gbr']
+    },
+    {
+        'name': 'report',
+        'cwd': _p('Comparison'),
+        'script': 'Comparison_And_Report.py',
+        'inputs': [],
+        'param_sources': [],
+        'outputs': [_p('Comparison', 'outputs', 'metrics_comparison_bar.png'),
+                    _p('Comparison', 'outputs', 'training_time_bar.png'),
+                    _p('Comparison', 'outputs', 'permutation_importance.png')],
+        'depends': ['preprocessing', 'model_lr', 'model_rf', 'model_gbr', 'importance', 'cascade']
+    }
+]
+
+
+def stage_sources(stage, upstream_sources):
+    """
+    Aşamanın kaynak kodları: betiğin import kapanışı ile üst aşamaların kaynakları. Üst aşamaların kodu da
+    eklenir, çünkü yüklenen pickle modellerin davranışı sınıflarını tanımlayan modüllere bağlıdır
+    (ör. FoldEnsembleRegressor -> CV_Engine.py, BinnedRegressor -> Hist_Binning.py) ve bu kod değiştiğinde
+    pickle baytları değişmeyebilir.
+    """
+    sources = set(source_closure(os.path.join(stage['cwd'], stage['script'])))
+    for dep in stage['depends']:
+        sources.update(upstream_sources[dep])
+    return sorted(sources)
+
+
+def run_pipeline(force=False, max_size=DEFAULT_MAX_SIZE):
+    """
+    Aşamaları sırayla çalıştırır. Girdileri değişmemiş aşamalar önbellekten geri yüklenir;
+    force=True ise tüm aşamalar yeniden çalıştırılır (sonuçları yine önbelleğe yazılır).
+    """
+    cache = StageCache(max_size=max_size)
+    manifests = {}
+    sources = {}
+    summary = {}
+
+    for stage in STAGES:
+        start_time = time.time()
+        params = {}
+        for path in stage['param_sources']:
+            params.update(script_params(path))
+        upstream = {dep: manifests[dep]['artifacts'] for dep in stage['depends']}
+        sources[stage['name']] = stage_sources(stage, sources)
+
+        try:
+            key = cache.stage_key(stage['name'], sources[stage['name']], stage['inputs'], params, upstream)
+        except FileNotFoundError as e:
+            print(f"HATA: '{stage['name']}' aşamasının girdisi bulunamadı: {e}")
+            return
+
+        manifest = None if force else cache.lookup(key)
+        if manifest is not None:
+            cache.restore(manifest)
+            status = 'önbellek'
+            print(f"[ÖNBELLEK] '{stage['name']}' aşaması atlandı (anahtar: {key[:12]}).")
+        else:
+            print(f"[ÇALIŞTIRILIYOR] '{stage['name']}' aşaması (anahtar: {key[:12]})...")
+            completed = subprocess.run([sys.executable, stage['script']], cwd=stage['cwd'])
+            missing = [p for p in stage['outputs'] if not os.path.exists(p)]
+            if completed.returncode != 0 or missing:
+                print(f"HATA: '{stage['name']}' aşaması başarısız oldu. Eksik çıktılar: {missing}")
+                cache.save_index()
+                return
+            manifest = cache.store(stage['name'], key, stage['outputs'], stage.get('optional_outputs', ()))
+            status = 'çalıştırıldı'
+
+        manifests[stage['name']] = manifest
+        summary[stage['name']] = {'Durum': status, 'Süre (s)': time.time() - start_time}
+
+    evicted, total_size = cache.evict()
+    cache.save_index()
+
+    print("\n--- Hat (Pipeline) Özeti ---")
+    print(pd.DataFrame(summary).T.to_string())
+    if evicted:
+        print(f"[INFO] Boyut sınırı nedeniyle önbellekten silinen aşamalar: {evicted}")
+    print(f"[INFO] Önbellek boyutu: {total_size / 1024 ** 2:.1f} MB")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ön işleme → modeller → rapor hattını önbellekli çalıştırır")
+    parser.add_argument('--force', action='store_true', help="Önbelleği yok sayıp tüm aşamaları yeniden çalıştır")
+    parser.add_argument('--max-size-mb', type=int, default=DEFAULT_MAX_SIZE // 1024 ** 2,
+                        help="Önbellek klasörünün en büyük boyutu (MB, LRU ile tahliye)")
+    args = parser.parse_args()
+
+    run_pipeline(force=args.force, max_size=args.max_size_mb * 1024 ** 2)
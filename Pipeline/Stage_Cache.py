@@ -0,0 +1,216 @@
+import hashlib
+import json
+import ast
+import os
+import shutil
+import time
+
+
+# İçerik adresli aşama önbelleği:
+#   anahtar = SHA-256(aşama adı + kaynak dosya baytları + girdi dosyaları + aşama parametreleri
+#                     + üst aşama çıktılarının hash'leri)
+# Anahtar eşleşirse aşama çalıştırılmaz; önbellekteki çıktılar yerine kopyalanır.
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+CACHE_DIR = os.path.join(ROOT_DIR, 'Pipeline', '.stage_cache')
+DEFAULT_MAX_SIZE = 2 * 1024 ** 3  # 2 GB
+MANIFEST_FILE = 'manifest.json'
+HASH_INDEX_FILE = 'hash_index.json'
+
+
+def _sha256_file(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+# Betiklerin sys.path ile birbirine bağladığı kod klasörleri (import çözümlemesi için)
+CODE_DIRS = ['Preprocessing', 'Modelling', 'Serving', 'Comparison', 'Pipeline']
+
+
+def _imported_modules(path):
+    """Dosyadaki tüm import ifadelerinin (fonksiyon içindeki gecikmeli importlar dahil) üst modül isimleri."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names.add(node.module.split('.')[0])
+    return names
+
+
+def source_closure(script_path, code_dirs=CODE_DIRS):
+    """
+    Betiğin depo içindeki import kapanışı: betikten başlayarak import edilen ve depoda bulunan tüm .py dosyaları.
+    Modül önce import eden dosyanın klasöründe, sonra kod klasörlerinde aranır (betiklerin sys.path sırası);
+    depoda bulunmayan modüller (numpy, sklearn vb.) atlanır.
+    """
+    search_dirs = [os.path.join(ROOT_DIR, d) for d in code_dirs]
+    closure = set()
+    stack = [os.path.abspath(script_path)]
+    while stack:
+        path = stack.pop()
+        if path in closure:
+            continue
+        closure.add(path)
+        for name in _imported_modules(path):
+            for directory in [os.path.dirname(path)] + search_dirs:
+                candidate = os.path.join(directory, f'{name}.py')
+                if os.path.exists(candidate):
+                    stack.append(candidate)
+                    break
+    return sorted(closure)
+
+
+def script_params(path):
+    """
+    Betikteki modül seviyesindeki BÜYÜK_HARF sabitleri (ör. CORR_THRESHOLD = 0.05)
+    aşama parametreleri olarak döndürür. Değerlendirilemeyen ifadeler atlanır.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    params = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            name = node.targets[0].id
+            if name.isupper():
+                try:
+                    params[name] = ast.literal_eval(node.value)
+                except ValueError:
+                    continue
+    return params
+
+
+class StageCache:
+    """Aşama çıktılarını anahtar bazında saklayan, boyut sınırlı (LRU) önbellek."""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.max_size = max_size
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        # Büyük dosyaları her çalıştırmada yeniden okumamak için (boyut, mtime) -> hash eşlemesi
+        self._hash_index_path = os.path.join(cache_dir, HASH_INDEX_FILE)
+        self._hash_index = {}
+        if os.path.exists(self._hash_index_path):
+            with open(self._hash_index_path, 'r', encoding='utf-8') as f:
+                self._hash_index = json.load(f)
+
+    # HASH HESAPLAMA
+
+    def hash_file(self, path):
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self._hash_index.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        digest = _sha256_file(path)
+        self._hash_index[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def stage_key(self, name, sources, inputs, params, upstream):
+        """Aşamanın tüm girdilerinden deterministik önbellek anahtarı üretir."""
+        payload = {
+            'stage': name,
+            'sources': {os.path.relpath(p, ROOT_DIR): self.hash_file(p) for p in sources},
+            'inputs': {os.path.relpath(p, ROOT_DIR): self.hash_file(p) for p in inputs},
+            'params': params,
+            'upstream': upstream
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
+    # ARAMA, GERİ YÜKLEME, SAKLAMA
+
+    def lookup(self, key):
+        path = os.path.join(self.objects_dir, key, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def restore(self, manifest):
+        """
+        Önbellekteki çıktıları yerlerine kopyalar; içerik zaten aynıysa kopyalamaz.
+        Aşama çalıştığında üretilmemiş isteğe bağlı çıktılar (ör. uzamsal özellikler kapalıyken spatial_index.pkl)
+        hedefte varsa silinir; aksi halde başka bir çalıştırmadan kalan eski dosya kullanılırdı.
+        """
+        entry_dir = os.path.join(self.objects_dir, manifest['key'])
+        for rel_path in manifest.get('absent', []):
+            target = os.path.join(ROOT_DIR, rel_path)
+            if os.path.exists(target):
+                os.remove(target)
+        for rel_path, digest in manifest['artifacts'].items():
+            target = os.path.join(ROOT_DIR, rel_path)
+            if os.path.exists(target) and self.hash_file(target) == digest:
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(entry_dir, digest), target)
+            self.hash_file(target)
+
+        manifest['last_access'] = time.time()
+        _write_json_atomic(os.path.join(entry_dir, MANIFEST_FILE), manifest)
+
+    def store(self, name, key, artifacts, optional_artifacts=()):
+        """
+        Aşama çıktılarını önbelleğe kopyalar ve manifest yazar. optional_artifacts içinden var olanlar
+        çıktı olarak saklanır, olmayanlar manifestte 'absent' olarak işaretlenir.
+        """
+        entry_dir = os.path.join(self.objects_dir, key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        manifest = {'stage': name, 'key': key, 'artifacts': {}, 'size': 0,
+                    'created': time.time(), 'last_access': time.time(),
+                    'absent': [os.path.relpath(os.path.abspath(p), ROOT_DIR)
+                               for p in optional_artifacts if not os.path.exists(p)]}
+        artifacts = list(artifacts) + [p for p in optional_artifacts if os.path.exists(p)]
+        for path in artifacts:
+            digest = self.hash_file(path)
+            blob = os.path.join(tmp_dir, digest)
+            if not os.path.exists(blob):
+                shutil.copy2(path, blob)
+                manifest['size'] += os.path.getsize(blob)
+            manifest['artifacts'][os.path.relpath(os.path.abspath(path), ROOT_DIR)] = digest
+
+        _write_json_atomic(os.path.join(tmp_dir, MANIFEST_FILE), manifest)
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir)
+        os.replace(tmp_dir, entry_dir)
+        return manifest
+
+    # LRU TAHLİYE
+
+    def evict(self):
+        """Toplam boyut sınırı aşılırsa en uzun süredir kullanılmayan girdileri siler."""
+        entries = []
+        for key in os.listdir(self.objects_dir):
+            manifest = self.lookup(key)
+            if manifest is not None:
+                entries.append(manifest)
+
+        total_size = sum(m['size'] for m in entries)
+        evicted = []
+        for manifest in sorted(entries, key=lambda m: m['last_access']):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(os.path.join(self.objects_dir, manifest['key']), ignore_errors=True)
+            total_size -= manifest['size']
+            evicted.append(manifest['stage'])
+        return evicted, total_size
+
+    def save_index(self):
+        _write_json_atomic(self._hash_index_path, self._hash_index)
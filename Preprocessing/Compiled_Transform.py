@@ -0,0 +1,153 @@
+import pandas as pd
+import numpy as np
+
+
+# Eğitilmiş ColumnTransformer (imputer + scaler + one-hot) ve özellik seçimi maskesi birkaç
+# NumPy dizisine katlanır; yeni satırların dönüşümü sklearn Pipeline/ColumnTransformer
+# çağrı zinciri olmadan tek bir vektörize geçişle yapılır.
+COMPILED_TRANSFORM_FILE = 'compiled_transform.npz'
+
+
+class CompiledTransform:
+    """
+    Dizi tabanlı ön işleme dönüşümü. Yalnızca seçilen özellikler hesaplanır:
+      sayısal: (x - mean) / scale, eksik değerler için önceden ölçeklenmiş medyan
+      kategorik: kategori kodu -> one-hot satırı (bilinmeyen kategori sıfır satırı)
+    """
+
+    def __init__(self, num_columns, num_means, num_scales, num_fill, num_out_idx,
+                 cat_column, categories, onehot_table, cat_out_idx, selected_features):
+        self.num_columns = [str(c) for c in num_columns]
+        self.num_means = np.asarray(num_means, dtype=np.float64)
+        self.num_scales = np.asarray(num_scales, dtype=np.float64)
+        self.num_fill = np.asarray(num_fill, dtype=np.float64)
+        self.num_out_idx = np.asarray(num_out_idx, dtype=np.intp)
+        self.cat_column = str(cat_column) if cat_column is not None else None
+        self.categories = [str(c) for c in categories]
+        self.onehot_table = np.asarray(onehot_table, dtype=np.float64)
+        self.cat_out_idx = np.asarray(cat_out_idx, dtype=np.intp)
+        self.selected_features = [str(c) for c in selected_features]
+        self._category_index = pd.Index(self.categories)
+
+    @property
+    def input_columns(self):
+        return self.num_columns + ([self.cat_column] if self.cat_column else [])
+
+    # DERLEME
+
+    @classmethod
+    def from_stats(cls, num_columns, medians, means, scales, cat_column, categories,
+                   feature_names, selected_features):
+        """
+        Öğrenilmiş istatistiklerden derler. feature_names dönüşümün tam çıktı sırasıdır
+        (önce sayısal, sonra one-hot sütunları); selected_features bunun alt kümesidir.
+        """
+        medians, means, scales = (np.asarray(a, dtype=np.float64) for a in (medians, means, scales))
+        n_num = len(num_columns)
+        position = {name: i for i, name in enumerate(feature_names)}
+
+        num_keep, num_out_idx, cat_keep, cat_out_idx = [], [], [], []
+        for out_idx, name in enumerate(selected_features):
+            source = position[name]
+            if source < n_num:
+                num_keep.append(source)
+                num_out_idx.append(out_idx)
+            else:
+                cat_keep.append(source - n_num)
+                cat_out_idx.append(out_idx)
+
+        # Son satır bilinmeyen kategoriler içindir (kod -1 -> tüm sütunlar 0, handle_unknown='ignore')
+        onehot_table = np.zeros((len(categories) + 1, len(cat_keep)), dtype=np.float64)
+        onehot_table[cat_keep, np.arange(len(cat_keep))] = 1.0
+
+        num_keep = np.asarray(num_keep, dtype=np.intp)
+        return cls(
+            num_columns=[num_columns[i] for i in num_keep],
+            num_means=means[num_keep],
+            num_scales=scales[num_keep],
+            num_fill=(medians[num_keep] - means[num_keep]) / scales[num_keep],
+            num_out_idx=num_out_idx,
+            cat_column=cat_column,
+            categories=categories,
+            onehot_table=onehot_table,
+            cat_out_idx=cat_out_idx,
+            selected_features=selected_features
+        )
+
+    @classmethod
+    def from_preprocessing(cls, preprocessing):
+        """Data_Processing.py'nin kaydettiği eğitilmiş ColumnTransformer sözlüğünden derler."""
+        preprocessor = preprocessing['preprocessor']
+        columns = {name: cols for name, _, cols in preprocessor.transformers_}
+        if len(columns.get('remainder', [])) > 0:
+            raise ValueError(f"Derlenmiş dönüşüm 'remainder' sütunlarını desteklemiyor: {columns['remainder']}")
+        if len(columns['cat']) != 1:
+            raise ValueError(f"Derlenmiş dönüşüm tek bir kategorik sütun bekliyor: {columns['cat']}")
+
+        num_pipeline = preprocessor.named_transformers_['num']
+        encoder = preprocessor.named_transformers_['cat'].named_steps['encoder']
+        imputer, scaler = num_pipeline.named_steps['imputer'], num_pipeline.named_steps['scaler']
+
+        return cls.from_stats(
+            num_columns=list(columns['num']),
+            medians=imputer.statistics_,
+            means=scaler.mean_,
+            scales=scaler.scale_,
+            cat_column=columns['cat'][0],
+            categories=encoder.categories_[0].tolist(),
+            feature_names=preprocessing['feature_names'],
+            selected_features=preprocessing['selected_features']
+        )
+
+    # DÖNÜŞÜM
+
+    def transform(self, data, dtype=np.float64):
+        """
+        Ham satırları (DataFrame veya sütun adı -> dizi sözlüğü) seçilen özellik matrisine dönüştürür.
+        Çıktı sütun sırası selected_features ile aynıdır.
+        """
+        X_num = np.stack([np.asarray(data[c], dtype=np.float64) for c in self.num_columns], axis=1)
+        n_rows = X_num.shape[0]
+        out = np.empty((n_rows, len(self.selected_features)), dtype=dtype)
+
+        # Ölçekleme yerinde yapılır; eksik değerler ölçeklemeden sonra NaN kalır ve doldurulur
+        np.subtract(X_num, self.num_means, out=X_num)
+        np.divide(X_num, self.num_scales, out=X_num)
+        np.copyto(X_num, self.num_fill, where=np.isnan(X_num))
+        out[:, self.num_out_idx] = X_num
+
+        if len(self.cat_out_idx):
+            codes = self._category_index.get_indexer(np.asarray(data[self.cat_column], dtype=object))
+            out[:, self.cat_out_idx] = self.onehot_table[codes]
+        return out
+
+    def transform_frame(self, data, dtype=np.float64):
+        """transform() sonucunu modellerin eğitimde gördüğü sütun isimleriyle DataFrame olarak döndürür."""
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        return pd.DataFrame(self.transform(data, dtype=dtype), columns=self.selected_features, index=index)
+
+    # KAYIT VE YÜKLEME
+
+    def save(self, path):
+        """Dizileri pickle kullanmadan tek bir .npz dosyasına yazar."""
+        np.savez(
+            path,
+            num_columns=np.array(self.num_columns, dtype=str),
+            num_means=self.num_means,
+            num_scales=self.num_scales,
+            num_fill=self.num_fill,
+            num_out_idx=self.num_out_idx,
+            cat_column=np.array([self.cat_column or ''], dtype=str),
+            categories=np.array(self.categories, dtype=str),
+            onehot_table=self.onehot_table,
+            cat_out_idx=self.cat_out_idx,
+            selected_features=np.array(self.selected_features, dtype=str)
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            arrays = {name: f[name] for name in f.files}
+        arrays['cat_column'] = arrays['cat_column'][0] or None
+        return cls(**arrays)
+
@@ -1,164 +1,302 @@
 import pandas as pd
 import numpy as np
 import time
+import json
 import os
+import argparse
+import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.impute import SimpleImputer
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from Split_Store import write_splits, onehot_groups, compact_dtypes
+from Compiled_Transform import CompiledTransform, COMPILED_TRANSFORM_FILE
+from Feature_Selection import fit_selection, save_selection
+from Spatial_Features import run_spatial_features, remove_spatial_index
+from Tracing import span, traced
 
 
-# Kayıt klasörünü tanımla
+# Kayıt klasörü ve ham veri yolu
 OUTPUT_DIR = '../data/processed_data'
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
-
-print("Kütüphaneler başarıyla yüklendi. Kayıt klasörü:", OUTPUT_DIR)
-start_time = time.time()
-
-# 1. VERİ YÜKLEME
-
-print("\n Veri Yükleniyor...")
-file_path = '../data/housing.csv'
-try:
-    df = pd.read_csv(file_path)
-except FileNotFoundError:
-    print(f"HATA: Dosya '{file_path}' bulunamadı. Lütfen yolu kontrol edin.")
-    exit()
-
-# Sütun isimlerini netleştirme
-df.columns = [
+FILE_PATH = '../data/housing.csv'
+
+# Eğitilmiş ön işleme dönüşümünün kaydedildiği dosya
+PREPROCESSING_FILE = 'preprocessing.pkl'
+# Akış modunun öğrenilmiş istatistikleri (Streaming_Processing.py)
+STREAMING_META_FILE = 'streaming_meta.json'
+# Her iki modun da yazdığı ortak meta (aykırı değer sınırı vb.); sonraki adımlar yalnızca bunu okur
+PREPROCESSING_META_FILE = 'preprocessing_meta.json'
+# Modlara özel dosyalar: bir mod çalıştığında diğerinin eski dosyası silinir
+MODE_FILES = {'memory': PREPROCESSING_FILE, 'stream': STREAMING_META_FILE}
+
+# Sütun isimleri ve hedef değişken
+COLUMN_NAMES = [
     'Longitude', 'Latitude', 'Housing_Median_Age', 'Total_Rooms',
     'Total_Bedrooms', 'Population', 'Households', 'Median_Income',
     'Median_House_Value', 'Ocean_Proximity'
 ]
-
-# Hedef değişken (Y) ve Bağımsız değişkenler (X)
-X = df.drop('Median_House_Value', axis=1)
-y = df['Median_House_Value']
-
-print(f"Veri Seti Boyutu: {df.shape}")
-print(f"Toplam Örnek Sayısı: {len(df)}")
-
-
-# 2. VERİ ÖN İŞLEME AŞAMASI
-
-print("\nBölüm 2: Eksik Veri Doldurma ve Özellik Dönüşümü")
-
-# Kategorik ve Sayısal Sütunları Tanımlama
-numerical_features = X.select_dtypes(include=[np.number]).columns.tolist()
-categorical_features = ['Ocean_Proximity']
-print(f"Ham Sayısal Özellik Sayısı: {len(numerical_features)}")
-print(f"Ham Kategorik Özellik Sayısı: {len(categorical_features)}")
-
-# Özellik Dönüşümleri için Pipeline Hazırlama
-num_pipeline = Pipeline([
-    ('imputer', SimpleImputer(strategy="median")),
-    ('scaler', StandardScaler())
-])
-
-cat_pipeline = Pipeline([
-    ('encoder', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
-])
-
-# Tüm dönüşümleri birleştirme
-preprocessor = ColumnTransformer([
-    ('num', num_pipeline, numerical_features),
-    ('cat', cat_pipeline, categorical_features)
-], remainder='passthrough')
-
-# Veri setine dönüştürmeyi uygula
-X_processed = preprocessor.fit_transform(X)
-feature_names = preprocessor.get_feature_names_out()
-X_processed_df = pd.DataFrame(X_processed, columns=feature_names, index=X.index)
-
-print("\n--- Özellik Dönüşümü Sonucu ---")
-print(f"One-Hot Encoding Sonrası Toplam Özellik Sayısı (Aykırı Değer Öncesi): {X_processed_df.shape[1]}")
-
-
-# 3. AYKIRI DEĞER (OUTLIER) ANALİZİ VE İŞLENMESİ
-
-print("\nBölüm 3: Aykırı Değer Analizi ve İşlenmesi")
-
-# Hedef değişkende (y) aykırı değerleri tespit etme
-Q1 = y.quantile(0.25)
-Q3 = y.quantile(0.75)
-IQR = Q3 - Q1
-upper_bound = Q3 + 1.5 * IQR
-
-outlier_indices = y[y > upper_bound].index
-outlier_count = len(outlier_indices)
-initial_size = len(X)
-
-print(f"Tespit Edilen Aykırı Değer Sayısı (Hedef Değişken > Üst Sınır): {outlier_count}")
-print(f"Aykırı Değer Oranı: {(outlier_count / initial_size) * 100:.2f}%")
-
-# Aykırı değerleri veri setinden çıkarma
-X_clean = X_processed_df.drop(outlier_indices)
-y_clean = y.drop(outlier_indices)
-
-print(f"Aykırı Değerler Çıkarıldıktan Sonra Kalan Örnek Sayısı: {len(X_clean)}")
-
-
-# 4. ÖZELLİK SEÇİMİ (Feature Selection) - Korelasyon Analizi
-
-print("\nBölüm 4: Özellik Seçimi (Filtre Yöntemi)")
-
-# Bağımsız değişkenleri ve hedef değişkeni birleştirerek korelasyon hesapla
-df_corr = pd.concat([X_clean, y_clean], axis=1)
-correlations = df_corr.corr()['Median_House_Value'].abs().sort_values(ascending=False)
-correlations_features = correlations.drop('Median_House_Value')
-
-print("--- Hedef Değişken İle İlk 5 Korelasyonu Yüksek Özellik ---")
-print(correlations_features.head(5).to_string())
-
-# Korelasyonu düşük olan özelliklerin listesini çıkar (Eşik: |r| < 0.05)
-low_corr_features = correlations_features[correlations_features < 0.05].index.tolist()
-
-# Özellik seçimini uygulama: Düşük korelasyonlu özellikleri modelden çıkar
-X_selected = X_clean.drop(columns=low_corr_features)
-
-print(f"\nKorelasyon Eşiği (< 0.05) Altında Kalan Özellik Sayısı: {len(low_corr_features)}")
-print(f"Çıkarılan Özellikler: {low_corr_features}")
-print(f"Ön İşleme ve Özellik Seçimi Sonrası Nihai Özellik Sayısı: {X_selected.shape[1]}")
-
-
-# 5. VERİ SETİNİN BÖLÜNMESİ (TRAIN-VALIDATION-TEST: 70-15-15)
-
-print("\nBölüm 5: Veri Setinin Train-Validation-Test Olarak Ayrılması")
-
-# 5.1. Önce Test setini ayır (%15)
-test_size_split = 0.15
-X_temp, X_test, y_temp, y_test = train_test_split(
-    X_selected, y_clean, test_size=test_size_split, random_state=42
-)
-
-# 5.2. Kalan X_temp (%85) içinden Validation setini ayır (%15 / %85 ≈ %17.65)
-validation_split = 0.15 / (1 - 0.15)
-X_train, X_val, y_train, y_val = train_test_split(
-    X_temp, y_temp, test_size=validation_split, random_state=42
-)
-
-# Kontrol ve Çıktılar
-total_samples = len(X_clean)
-print(f"\n--- Sonuç: Veri Seti Oranları ---")
-print(f"Eğitim Seti (Train) Boyutu: {X_train.shape} | Oran: {len(X_train)/total_samples:.2%} (%%70.00)")
-print(f"Doğrulama Seti (Validation) Boyutu: {X_val.shape} | Oran: {len(X_val)/total_samples:.2%} (%%15.00)")
-print(f"Test Seti (Test) Boyutu: {X_test.shape} | Oran: {len(X_test)/total_samples:.2%} (%%15.00)")
-
-
-# 6. VERİLERİ KAYDETME
-
-# Verileri belirlenen klasöre kaydet
-X_train.to_pickle(os.path.join(OUTPUT_DIR, "X_train.pkl"))
-X_val.to_pickle(os.path.join(OUTPUT_DIR, "X_val.pkl"))
-X_test.to_pickle(os.path.join(OUTPUT_DIR, "X_test.pkl"))
-y_train.to_pickle(os.path.join(OUTPUT_DIR, "y_train.pkl"))
-y_val.to_pickle(os.path.join(OUTPUT_DIR, "y_val.pkl"))
-y_test.to_pickle(os.path.join(OUTPUT_DIR, "y_test.pkl"))
-
-end_time = time.time()
-elapsed_time = end_time - start_time
-print(f"\n[INFO] Ön İşleme Süresi: {elapsed_time:.4f} saniye")
-print(f"\nÖn İşleme tamamlandı ve veriler '{OUTPUT_DIR}' klasörüne kaydedildi.")
\ No newline at end of file
+TARGET_COLUMN = 'Median_House_Value'
+CATEGORICAL_FEATURES = ['Ocean_Proximity']
+
+# Ön işleme parametreleri
+IQR_MULTIPLIER = 1.5
+CORR_THRESHOLD = 0.05
+# İsteğe bağlı filtreler (None: kapalı); sınırlı boyutlu bir alt örnek üzerinde hesaplanır
+MI_THRESHOLD = None
+REDUNDANCY_THRESHOLD = None
+TEST_SIZE = 0.15
+VAL_SIZE = 0.15
+RANDOM_STATE = 42
+
+# Uzamsal komşuluk özellikleri (Train koordinatları üzerinde KD-ağacı); varsayılan olarak kapalı
+SPATIAL_FEATURES = False
+
+
+def save_preprocessing_meta(output_dir, mode, upper_bound, input_columns, feature_names, selected_features):
+    """
+    preprocessing.pkl sözlüğünün sklearn nesnesi dışındaki alanlarını (ham girdi sütunları, dönüşüm çıktısı
+    ve seçilen özellikler, aykırı değer sınırı) her iki mod için aynı biçimde yazar ve diğer modun eski
+    dosyasını siler (eski aykırı değer sınırı okunmasın).
+    """
+    meta = {
+        'mode': mode,
+        'upper_bound': float(upper_bound),
+        'input_columns': [str(c) for c in input_columns],
+        'feature_names': [str(c) for c in feature_names],
+        'selected_features': [str(c) for c in selected_features]
+    }
+    with open(os.path.join(output_dir, PREPROCESSING_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    for other, file_name in MODE_FILES.items():
+        path = os.path.join(output_dir, file_name)
+        if other != mode and os.path.exists(path):
+            os.remove(path)
+
+
+def load_preprocessing_meta(data_path):
+    with open(os.path.join(data_path, PREPROCESSING_META_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+@traced('preprocessing')
+def run_preprocessing(file_path=FILE_PATH, output_dir=OUTPUT_DIR, dtype=np.float64,
+                      mi_threshold=MI_THRESHOLD, redundancy_threshold=REDUNDANCY_THRESHOLD, compact=False,
+                      spatial=SPATIAL_FEATURES):
+    """
+    Ham konut verisini yükler, ön işler, özellik seçimi yapar ve
+    Train/Validation/Test setlerini kaydeder.
+    compact=True: özellikler float32, one-hot sütunları uint8, hedef float32 olarak saklanır.
+    spatial=True: Train koordinatlarından k-en yakın komşu özellikleri eklenir ve indeks kaydedilir.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    print("Kütüphaneler başarıyla yüklendi. Kayıt klasörü:", output_dir)
+    start_time = time.time()
+
+    # 1. VERİ YÜKLEME
+
+    print("\n Veri Yükleniyor...")
+    try:
+        with span('preprocessing.read_csv') as s:
+            df = pd.read_csv(file_path)
+            s.set(rows=len(df))
+    except FileNotFoundError:
+        print(f"HATA: Dosya '{file_path}' bulunamadı. Lütfen yolu kontrol edin.")
+        return
+
+    # Sütun isimlerini netleştirme
+    df.columns = COLUMN_NAMES
+
+    # Hedef değişken (Y) ve Bağımsız değişkenler (X)
+    X = df.drop(TARGET_COLUMN, axis=1)
+    y = df[TARGET_COLUMN]
+
+    print(f"Veri Seti Boyutu: {df.shape}")
+    print(f"Toplam Örnek Sayısı: {len(df)}")
+
+
+    # 2. VERİ ÖN İŞLEME AŞAMASI
+
+    print("\nBölüm 2: Eksik Veri Doldurma ve Özellik Dönüşümü")
+
+    # Kategorik ve Sayısal Sütunları Tanımlama
+    numerical_features = X.select_dtypes(include=[np.number]).columns.tolist()
+    categorical_features = CATEGORICAL_FEATURES
+    print(f"Ham Sayısal Özellik Sayısı: {len(numerical_features)}")
+    print(f"Ham Kategorik Özellik Sayısı: {len(categorical_features)}")
+
+    # Özellik Dönüşümleri için Pipeline Hazırlama
+    num_pipeline = Pipeline([
+        ('imputer', SimpleImputer(strategy="median")),
+        ('scaler', StandardScaler())
+    ])
+
+    cat_pipeline = Pipeline([
+        ('encoder', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+    ])
+
+    # Tüm dönüşümleri birleştirme
+    preprocessor = ColumnTransformer([
+        ('num', num_pipeline, numerical_features),
+        ('cat', cat_pipeline, categorical_features)
+    ], remainder='passthrough')
+
+    # Veri setine dönüştürmeyi uygula
+    with span('preprocessing.transform', rows=len(X)):
+        X_processed = preprocessor.fit_transform(X)
+    feature_names = preprocessor.get_feature_names_out()
+    X_processed_df = pd.DataFrame(X_processed, columns=feature_names, index=X.index)
+
+    print("\n--- Özellik Dönüşümü Sonucu ---")
+    print(f"One-Hot Encoding Sonrası Toplam Özellik Sayısı (Aykırı Değer Öncesi): {X_processed_df.shape[1]}")
+
+
+    # 3. AYKIRI DEĞER (OUTLIER) ANALİZİ VE İŞLENMESİ
+
+    print("\nBölüm 3: Aykırı Değer Analizi ve İşlenmesi")
+
+    # Hedef değişkende (y) aykırı değerleri tespit etme
+    Q1 = y.quantile(0.25)
+    Q3 = y.quantile(0.75)
+    IQR = Q3 - Q1
+    upper_bound = Q3 + IQR_MULTIPLIER * IQR
+
+    outlier_indices = y[y > upper_bound].index
+    outlier_count = len(outlier_indices)
+    initial_size = len(X)
+
+    print(f"Tespit Edilen Aykırı Değer Sayısı (Hedef Değişken > Üst Sınır): {outlier_count}")
+    print(f"Aykırı Değer Oranı: {(outlier_count / initial_size) * 100:.2f}%")
+
+    # Aykırı değerleri veri setinden çıkarma
+    with span('preprocessing.outliers', rows=len(X_processed_df)):
+        X_clean = X_processed_df.drop(outlier_indices)
+        y_clean = y.drop(outlier_indices)
+
+    print(f"Aykırı Değerler Çıkarıldıktan Sonra Kalan Örnek Sayısı: {len(X_clean)}")
+
+
+    # 4. ÖZELLİK SEÇİMİ (Feature Selection) - Korelasyon Analizi
+
+    print("\nBölüm 4: Özellik Seçimi (Filtre Yöntemi)")
+
+    # Yalnızca özellik-hedef korelasyonları parça parça hesaplanır (birleştirilmiş kopya ve p x p matris yok)
+    with span('preprocessing.feature_selection', rows=len(X_clean)):
+        selection = fit_selection(X_clean, y_clean, corr_threshold=CORR_THRESHOLD, mi_threshold=mi_threshold,
+                                  redundancy_threshold=redundancy_threshold, random_state=RANDOM_STATE)
+    correlations_features = pd.Series(
+        {name: score['abs_corr'] for name, score in selection['scores'].items()}
+    ).sort_values(ascending=False)
+
+    print("--- Hedef Değişken İle İlk 5 Korelasyonu Yüksek Özellik ---")
+    print(correlations_features.head(5).to_string())
+
+    # Korelasyonu düşük (|r| < 0.05) ve varsa MI/fazlalık filtrelerine takılan özellikler
+    low_corr_features = [name for name, reason in selection['dropped'].items() if reason['filter'] == 'correlation']
+    dropped_features = list(selection['dropped'])
+
+    # Özellik seçimini uygulama: Elenen özellikleri modelden çıkar
+    X_selected = X_clean[selection['selected']]
+
+    print(f"\nKorelasyon Eşiği (< {CORR_THRESHOLD}) Altında Kalan Özellik Sayısı: {len(low_corr_features)}")
+    if len(dropped_features) > len(low_corr_features):
+        print(f"MI / Fazlalık Filtreleriyle Elenen Özellik Sayısı: {len(dropped_features) - len(low_corr_features)} "
+              f"(alt örnek: {selection['sample_rows']} satır)")
+    print(f"Çıkarılan Özellikler: {dropped_features}")
+    print(f"Ön İşleme ve Özellik Seçimi Sonrası Nihai Özellik Sayısı: {X_selected.shape[1]}")
+
+
+    # 5. VERİ SETİNİN BÖLÜNMESİ (TRAIN-VALIDATION-TEST: 70-15-15)
+
+    print("\nBölüm 5: Veri Setinin Train-Validation-Test Olarak Ayrılması")
+
+    # 5.1. Önce Test setini ayır (%15)
+    with span('preprocessing.split', rows=len(X_selected)):
+        X_temp, X_test, y_temp, y_test = train_test_split(
+            X_selected, y_clean, test_size=TEST_SIZE, random_state=RANDOM_STATE
+        )
+
+        # 5.2. Kalan X_temp (%85) içinden Validation setini ayır (%15 / %85 ≈ %17.65)
+        validation_split = VAL_SIZE / (1 - TEST_SIZE)
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_temp, y_temp, test_size=validation_split, random_state=RANDOM_STATE
+        )
+
+    # Kontrol ve Çıktılar
+    total_samples = len(X_clean)
+    print("\n--- Sonuç: Veri Seti Oranları ---")
+    print(f"Eğitim Seti (Train) Boyutu: {X_train.shape} | Oran: {len(X_train)/total_samples:.2%} (%%70.00)")
+    print(f"Doğrulama Seti (Validation) Boyutu: {X_val.shape} | Oran: {len(X_val)/total_samples:.2%} (%%15.00)")
+    print(f"Test Seti (Test) Boyutu: {X_test.shape} | Oran: {len(X_test)/total_samples:.2%} (%%15.00)")
+
+
+    # 6. VERİLERİ KAYDETME
+
+    # Verileri belirlenen klasöre sütunsal depo (memmap) formatında kaydet
+    groups = onehot_groups(X_selected.columns, categorical_features)
+    target_dtype = np.float64
+    if compact:
+        dtype, target_dtype = compact_dtypes(X_selected.columns, groups), np.float32
+    with span('preprocessing.write_splits', rows=len(X_selected)):
+        write_splits(output_dir, X_train, X_val, X_test, y_train, y_val, y_test, dtype=dtype,
+                     target_dtype=target_dtype, categorical_groups=groups)
+
+    # Eğitilmiş dönüşümü ve seçilen özellikleri kaydet (yeni ham satırları dönüştürmek için)
+    preprocessing = {
+        'preprocessor': preprocessor,
+        'input_columns': X.columns.tolist(),
+        'feature_names': feature_names.tolist(),
+        'selected_features': X_selected.columns.tolist(),
+        'upper_bound': upper_bound
+    }
+    joblib.dump(preprocessing, os.path.join(output_dir, PREPROCESSING_FILE))
+    save_preprocessing_meta(output_dir, 'memory', upper_bound, preprocessing['input_columns'],
+                            preprocessing['feature_names'], preprocessing['selected_features'])
+
+    # Seçim skorları ve çıkarılma nedenleri
+    save_selection(selection, output_dir)
+
+    # Aynı dönüşümün dizi tabanlı (derlenmiş) hali; çıkarımda sklearn çağrı zinciri olmadan kullanılır
+    CompiledTransform.from_preprocessing(preprocessing).save(os.path.join(output_dir, COMPILED_TRANSFORM_FILE))
+
+    # 7. UZAMSAL ÖZELLİKLER (isteğe bağlı)
+    if spatial:
+        run_spatial_features(output_dir, file_path, COLUMN_NAMES)
+    else:
+        remove_spatial_index(output_dir)
+
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+    print(f"\n[INFO] Ön İşleme Süresi: {elapsed_time:.4f} saniye")
+    print(f"\nÖn İşleme tamamlandı ve veriler '{output_dir}' klasörüne kaydedildi.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Konut verisi ön işleme")
+    parser.add_argument('--stream', action='store_true',
+                        help="Veriyi parçalar halinde okuyan, sınırlı bellekli akış modunu kullan")
+    parser.add_argument('--chunksize', type=int, default=100_000,
+                        help="Akış modunda bir parçadaki satır sayısı")
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64',
+                        help="Kaydedilecek özellik sütunlarının veri tipi")
+    parser.add_argument('--compact', action='store_true',
+                        help="Kompakt temsil: float32 özellikler, uint8 one-hot sütunları, float32 hedef")
+    parser.add_argument('--spatial', action='store_true', default=SPATIAL_FEATURES,
+                        help="Boylam/enlem üzerinde KD-ağacı ile k-en yakın komşu özelliklerini ekle")
+    parser.add_argument('--mi-threshold', type=float, default=MI_THRESHOLD,
+                        help="Karşılıklı bilgisi bu değerin altında kalan özellikleri çıkar (varsayılan: kapalı)")
+    parser.add_argument('--redundancy-threshold', type=float, default=REDUNDANCY_THRESHOLD,
+                        help="Daha güçlü bir özellikle |r| değeri bu eşiği aşan özellikleri çıkar (varsayılan: kapalı)")
+    args = parser.parse_args()
+
+    if args.stream:
+        from Streaming_Processing import run_streaming_preprocessing
+        run_streaming_preprocessing(FILE_PATH, OUTPUT_DIR, chunksize=args.chunksize, dtype=args.dtype,
+                                    mi_threshold=args.mi_threshold, redundancy_threshold=args.redundancy_threshold,
+                                    compact=args.compact, spatial=args.spatial)
+    else:
+        run_preprocessing(dtype=args.dtype, mi_threshold=args.mi_threshold,
+                          redundancy_threshold=args.redundancy_threshold, compact=args.compact,
+                          spatial=args.spatial)
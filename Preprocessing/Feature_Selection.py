@@ -0,0 +1,182 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+
+
+# Seçilen özellikler, skorları ve çıkarılma nedenleri bu dosyaya yazılır
+SELECTION_FILE = 'feature_selection.json'
+
+# Hedef korelasyonu satır parçaları halinde hesaplanır (akış modundaki ikinci geçişle aynı özet)
+CHUNK_ROWS = 100_000
+
+# Karşılıklı bilgi (MI) ve özellik-özellik korelasyonu bir alt örnek üzerinde hesaplanır;
+# alt örneğin boyutu hem satır sayısı hem de bellek bütçesi ile sınırlıdır.
+MAX_SAMPLE_ROWS = 20_000
+SAMPLE_MEMORY_BUDGET = 64 * 1024 ** 2  # bayt
+
+
+class RunningCorrelation:
+    """Her özellik ile hedef arasındaki Pearson korelasyonu için birleştirilebilir ortak-moment özeti."""
+
+    def __init__(self, n_features):
+        self.n = 0.0
+        self.mean_x = np.zeros(n_features)
+        self.mean_y = 0.0
+        self.m2_x = np.zeros(n_features)
+        self.m2_y = 0.0
+        self.c_xy = np.zeros(n_features)
+
+    def update(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        n_b = float(len(y))
+        if n_b == 0:
+            return
+        mean_x = X.mean(axis=0)
+        mean_y = float(y.mean())
+        Xc = X - mean_x
+        yc = y - mean_y
+        self._merge(n_b, mean_x, mean_y, (Xc ** 2).sum(axis=0), float(yc @ yc), Xc.T @ yc)
+
+    def _merge(self, n_b, mean_x_b, mean_y_b, m2_x_b, m2_y_b, c_xy_b):
+        n = self.n + n_b
+        dx = mean_x_b - self.mean_x
+        dy = mean_y_b - self.mean_y
+        w = self.n * n_b / n
+        self.mean_x = self.mean_x + dx * n_b / n
+        self.mean_y = self.mean_y + dy * n_b / n
+        self.m2_x = self.m2_x + m2_x_b + dx ** 2 * w
+        self.m2_y = self.m2_y + m2_y_b + dy ** 2 * w
+        self.c_xy = self.c_xy + c_xy_b + dx * dy * w
+        self.n = n
+
+    def merge(self, other):
+        if other.n > 0:
+            self._merge(other.n, other.mean_x, other.mean_y, other.m2_x, other.m2_y, other.c_xy)
+
+    def correlations(self):
+        # Varyansı sıfır olan özellikler için pandas.corr gibi NaN döner
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.c_xy / np.sqrt(self.m2_x * self.m2_y)
+
+
+# SKORLAR
+
+def target_correlations(X, y, chunk_rows=CHUNK_ROWS):
+    """
+    Yalnızca özellik-hedef korelasyonlarını hesaplar (p x p matris ve veri kopyası oluşturmadan).
+    Satırlar parça parça özete eklenir; bellek kullanımı parça boyutu ile sınırlıdır.
+    """
+    X = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+    y = np.asarray(y, dtype=np.float64)
+    corr = RunningCorrelation(X.shape[1])
+    for start in range(0, len(y), chunk_rows):
+        corr.update(X[start:start + chunk_rows], y[start:start + chunk_rows])
+    return np.abs(corr.correlations())
+
+
+def sample_size(n_rows, n_features, max_rows=MAX_SAMPLE_ROWS, memory_budget=SAMPLE_MEMORY_BUDGET):
+    """Alt örnek satır sayısı: satır sınırı ve (özellikler + hedef) float64 matrisinin bellek bütçesi."""
+    return int(min(n_rows, max_rows, memory_budget // (8 * (n_features + 1))))
+
+
+def draw_sample(X, y, random_state=42, max_rows=MAX_SAMPLE_ROWS, memory_budget=SAMPLE_MEMORY_BUDGET):
+    """Bellekteki veriden sınırlı boyutlu, tekrarsız rastgele alt örnek çeker."""
+    X = X.to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)
+    size = sample_size(len(X), X.shape[1], max_rows, memory_budget)
+    rows = np.sort(np.random.default_rng(random_state).choice(len(X), size=size, replace=False))
+    return np.asarray(X[rows], dtype=np.float64), np.asarray(y, dtype=np.float64)[rows]
+
+
+def mutual_information(X_sample, y_sample, random_state=42):
+    """Alt örnek üzerinde özellik-hedef karşılıklı bilgisi (one-hot sütunları ayrık kabul edilir)."""
+    from sklearn.feature_selection import mutual_info_regression
+
+    discrete = np.array([np.isin(np.unique(col), (0.0, 1.0)).all() for col in X_sample.T])
+    return mutual_info_regression(X_sample, y_sample, discrete_features=discrete, random_state=random_state)
+
+
+def redundancy_filter(X_sample, candidates, scores, threshold):
+    """
+    Açgözlü fazlalık filtresi: adaylar hedef skoruna göre sıralanır; daha önce tutulan bir özellikle
+    |r| > threshold olan özellik çıkarılır. Döndürülen: {çıkarılan indeks: (tutulan indeks, |r|)}.
+    """
+    if len(candidates) < 2:
+        return {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = np.abs(np.corrcoef(X_sample[:, candidates], rowvar=False))
+
+    order = sorted(range(len(candidates)), key=lambda i: -np.nan_to_num(scores[candidates[i]]))
+    kept, dropped = [], {}
+    for i in order:
+        partner = next((k for k in kept if corr[i, k] > threshold), None)
+        if partner is None:
+            kept.append(i)
+        else:
+            dropped[candidates[i]] = (candidates[partner], float(corr[i, partner]))
+    return dropped
+
+
+# SEÇİM
+
+def select_features(feature_names, correlations, sample=None, corr_threshold=0.05, mi_threshold=None,
+                    redundancy_threshold=None, random_state=42):
+    """
+    Filtreleri sırayla uygular: |r| < corr_threshold, MI < mi_threshold, ardından fazlalık filtresi.
+    MI ve fazlalık filtreleri yalnızca eşik verilirse ve alt örnek (X_sample, y_sample) varsa çalışır.
+    Özgün sütun sırası korunur.
+    """
+    feature_names = list(feature_names)
+    correlations = np.asarray(correlations, dtype=np.float64)
+    dropped = {}
+
+    # 1. Hedef korelasyonu (NaN korelasyonlu sütunlar, pandas karşılaştırmasında olduğu gibi tutulur)
+    for j in np.flatnonzero(correlations < corr_threshold):
+        dropped[feature_names[j]] = {'filter': 'correlation', 'abs_corr': float(correlations[j])}
+
+    # 2. Karşılıklı bilgi
+    mi = None
+    if sample is not None and (mi_threshold is not None or redundancy_threshold is not None):
+        mi = mutual_information(sample[0], sample[1], random_state)
+        if mi_threshold is not None:
+            for j in np.flatnonzero(mi < mi_threshold):
+                dropped.setdefault(feature_names[j], {'filter': 'mutual_information', 'mutual_info': float(mi[j])})
+
+    # 3. Fazlalık (özellik-özellik korelasyonu); çiftlerden hedefle daha ilişkili olan tutulur
+    if sample is not None and redundancy_threshold is not None:
+        candidates = [j for j, name in enumerate(feature_names) if name not in dropped]
+        scores = correlations if mi is None else mi
+        for j, (k, r) in redundancy_filter(sample[0], candidates, scores, redundancy_threshold).items():
+            dropped[feature_names[j]] = {'filter': 'redundancy', 'redundant_with': feature_names[k], 'abs_corr': r}
+
+    scores = {name: {'abs_corr': float(correlations[j])} for j, name in enumerate(feature_names)}
+    if mi is not None:
+        for j, name in enumerate(feature_names):
+            scores[name]['mutual_info'] = float(mi[j])
+
+    return {
+        'selected': [name for name in feature_names if name not in dropped],
+        'dropped': dropped,
+        'scores': scores,
+        'params': {'corr_threshold': corr_threshold, 'mi_threshold': mi_threshold,
+                   'redundancy_threshold': redundancy_threshold, 'random_state': random_state},
+        'sample_rows': 0 if sample is None else int(len(sample[1]))
+    }
+
+
+def fit_selection(X, y, corr_threshold=0.05, mi_threshold=None, redundancy_threshold=None, random_state=42):
+    """Bellekteki veri için: parçalı hedef korelasyonu + gerekirse sınırlı alt örnekte MI/fazlalık filtreleri."""
+    correlations = target_correlations(X, y)
+    sample = None
+    if mi_threshold is not None or redundancy_threshold is not None:
+        sample = draw_sample(X, y, random_state)
+    return select_features(X.columns, correlations, sample, corr_threshold, mi_threshold,
+                           redundancy_threshold, random_state)
+
+
+def save_selection(selection, output_dir):
+    path = os.path.join(output_dir, SELECTION_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(selection, f, ensure_ascii=False, indent=2)
+    return path
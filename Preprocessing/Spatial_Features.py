@@ -0,0 +1,207 @@
+import pandas as pd
+import numpy as np
+import time
+import joblib
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from sklearn.neighbors import KDTree
+
+from Split_Store import META_FILE, DATA_FILE, open_store, load_split, create_store, write_split_rows, SPLIT_NAMES
+from Tracing import traced
+
+
+# Uzamsal komşuluk özellikleri: Train setindeki bölgelerin koordinatları üzerine bir kez KD-ağacı kurulur.
+# Koordinatlar birim küre üzerindeki 3B vektörlere çevrilir; bu uzaydaki Öklid (kiriş) mesafesi
+# büyük daire mesafesiyle monoton olduğu için en yakın komşular haversine ile aynıdır ve KD-ağacı kullanılabilir.
+
+SPATIAL_INDEX_FILE = 'spatial_index.pkl'
+EARTH_RADIUS_KM = 6371.0088
+
+K_NEIGHBORS = 10
+RADIUS_KM = 5.0
+LEAF_SIZE = 40
+
+# Sorgular bu boyutta partilere bölünür ve iş parçacıklarına dağıtılır (KDTree sorguları GIL'i bırakır)
+BATCH_ROWS = 10_000
+# Ham CSV okuma ve depoya yazma bu boyutta satır parçalarıyla yapılır (akış modunun parça boyutu)
+CHUNK_ROWS = 100_000
+
+COORDINATE_COLUMNS = ['Longitude', 'Latitude']
+
+FEATURE_NAMES = ['spatial__knn_median_value', 'spatial__knn_mean_distance_km', 'spatial__count_within_radius']
+
+
+def to_unit_vectors(longitude, latitude):
+    lon = np.radians(np.asarray(longitude, dtype=np.float64))
+    lat = np.radians(np.asarray(latitude, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0.0, 1.0))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(km / (2 * EARTH_RADIUS_KM))
+
+
+class SpatialIndex:
+    """
+    Train koordinatları üzerindeki KD-ağacı ve Train hedef değerleri.
+    Yalnızca Train hedefleri saklanır; Validation/Test ve yeni satırlar bu indeksi sorgular.
+    Train satırları kendilerini dışarıda bırakarak (leave-one-out) sorgulanır, böylece
+    bir satırın özelliği kendi hedef değerini içermez.
+    """
+
+    def __init__(self, k=K_NEIGHBORS, radius_km=RADIUS_KM, leaf_size=LEAF_SIZE):
+        self.k = k
+        self.radius_km = radius_km
+        self.leaf_size = leaf_size
+
+    def fit(self, longitude, latitude, y):
+        self.tree_ = KDTree(to_unit_vectors(longitude, latitude), leaf_size=self.leaf_size)
+        self.targets_ = np.asarray(y, dtype=np.float64)
+        return self
+
+    @property
+    def feature_names(self):
+        return list(FEATURE_NAMES)
+
+    def _query_batch(self, points, exclude=None):
+        """Bir parti nokta için (komşu medyan hedefi, ortalama mesafe km, yarıçap içindeki bölge sayısı)."""
+        n = len(points)
+        dist, ind = self.tree_.query(points, k=self.k + (exclude is not None))
+        counts = self.tree_.query_radius(points, r=km_to_chord(self.radius_km), count_only=True).astype(np.float64)
+
+        if exclude is not None:
+            # Her satırdan kendi indeksini çıkar; eşit mesafeler yüzünden sonuçta yoksa en uzak komşuyu çıkar
+            is_self = ind == exclude[:, None]
+            is_self[~is_self.any(axis=1), -1] = True
+            keep = ~is_self
+            dist = dist[keep].reshape(n, self.k)
+            ind = ind[keep].reshape(n, self.k)
+            counts -= 1  # Satırın kendisi (mesafe 0) her zaman yarıçap içindedir
+
+        return np.column_stack([
+            np.median(self.targets_[ind], axis=1),
+            chord_to_km(dist).mean(axis=1),
+            counts
+        ])
+
+    def features(self, longitude, latitude, exclude=None, n_jobs=None, batch_rows=BATCH_ROWS):
+        """
+        Noktaları partiler halinde paralel sorgular. exclude: her satırın indeksteki konumu
+        (Train seti için leave-one-out), None ise hiçbir nokta dışarıda bırakılmaz.
+        """
+        points = to_unit_vectors(longitude, latitude)
+        starts = range(0, len(points), batch_rows)
+
+        def run(start):
+            part = None if exclude is None else np.asarray(exclude[start:start + batch_rows])
+            return self._query_batch(points[start:start + batch_rows], part)
+
+        n_jobs = n_jobs or os.cpu_count() or 1
+        if n_jobs == 1 or len(starts) <= 1:
+            blocks = [run(start) for start in starts]
+        else:
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                blocks = list(executor.map(run, starts))
+        return np.vstack(blocks) if blocks else np.empty((0, len(FEATURE_NAMES)))
+
+    def transform_frame(self, df, n_jobs=1):
+        """Ham satırlar (Longitude/Latitude sütunlarıyla) için özellik tablosu; çıkarım yolunda kullanılır."""
+        values = self.features(df['Longitude'].to_numpy(), df['Latitude'].to_numpy(), n_jobs=n_jobs)
+        return pd.DataFrame(values, columns=FEATURE_NAMES, index=df.index)
+
+
+def load_raw_coordinates(raw_path, rows, column_names=None, chunk_rows=CHUNK_ROWS):
+    """
+    Ham CSV'nin yalnızca Longitude/Latitude sütunlarını isimleriyle ve parça parça tek geçişte okur;
+    rows (depo satırlarının ham CSV satır numaraları) sırasıyla (satır x 2) koordinat dizisi döndürür.
+    column_names: ham başlığın yerine kullanılacak sütun isimleri (ön işlemedeki COLUMN_NAMES).
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    order = np.argsort(rows, kind='stable')
+    sorted_rows = rows[order]
+    coords = np.full((len(rows), 2), np.nan)
+
+    names = {'header': 0, 'names': column_names} if column_names is not None else {}
+    position = 0
+    for chunk in pd.read_csv(raw_path, usecols=COORDINATE_COLUMNS, chunksize=chunk_rows, **names):
+        a, b = np.searchsorted(sorted_rows, [position, position + len(chunk)])
+        values = chunk[COORDINATE_COLUMNS].to_numpy(dtype=np.float64)
+        coords[order[a:b]] = values[sorted_rows[a:b] - position]
+        position += len(chunk)
+
+    if np.isnan(coords).any():
+        raise ValueError(f"'{raw_path}' deponun bazı satırlarının koordinatlarını içermiyor.")
+    return coords
+
+
+def remove_spatial_index(data_path):
+    """Uzamsal özellikler kapalıyken eski indeksi siler; aksi halde çıkarım yolu fazladan sütun üretir."""
+    path = os.path.join(data_path, SPATIAL_INDEX_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+@traced('preprocessing.spatial')
+def run_spatial_features(data_path, raw_path, column_names=None, k=K_NEIGHBORS, radius_km=RADIUS_KM, n_jobs=None,
+                         chunk_rows=CHUNK_ROWS):
+    """
+    Train koordinatlarından indeksi kurar, üç set için komşuluk özelliklerini satır parçaları halinde
+    hesaplayıp bölünme deposuna sütun olarak ekler ve indeksi çıkarım için kaydeder.
+    Setler belleğe alınmaz; tepe bellek parça boyutu ve Train koordinatlarıyla sınırlıdır.
+    """
+    print("\nBölüm 7: Uzamsal Komşuluk Özellikleri (KD-Ağacı)")
+    start_time = time.time()
+
+    store = open_store(data_path)
+    meta = store['meta']
+    # Önceki bir çalıştırmadan kalan uzamsal sütunlar yeniden hesaplanır
+    base_columns = [c for c in meta['feature_names'] if c not in FEATURE_NAMES]
+    column_dtypes = {c['name']: np.dtype(c['dtype']) for c in meta['columns']}
+
+    coords = load_raw_coordinates(raw_path, store['index'], column_names, chunk_rows)
+    train_start, train_end = meta['splits']['train']
+    index = SpatialIndex(k, radius_km).fit(coords[train_start:train_end, 0], coords[train_start:train_end, 1],
+                                           store['target'][train_start:train_end])
+
+    # Yeni depo geçici klasöre parça parça yazılır ve dosyalar atomik olarak değiştirilir (açık memmap'ler bozulmaz)
+    float_dtype = np.float32 if np.dtype(np.float32) in column_dtypes.values() else np.float64
+    dtypes = {c: column_dtypes[c] for c in base_columns}
+    dtypes.update({c: float_dtype for c in FEATURE_NAMES})
+    tmp_dir = os.path.join(data_path, f'.spatial_tmp_{os.getpid()}')
+    split_sizes = {name: b - a for name, (a, b) in meta['splits'].items()}
+    augmented = create_store(
+        tmp_dir, base_columns + FEATURE_NAMES, split_sizes, dtype=dtypes, target_name=meta['target']['name'],
+        target_dtype=np.dtype(meta['target']['dtype']), categorical_groups=meta.get('categorical_groups')
+    )
+
+    for name in SPLIT_NAMES:
+        a, b = meta['splits'][name]
+        for start in range(0, b - a, chunk_rows):
+            rows = slice(a + start, min(a + start + chunk_rows, b))
+            exclude = np.arange(start, start + rows.stop - rows.start) if name == 'train' else None
+            values = index.features(coords[rows, 0], coords[rows, 1], exclude=exclude, n_jobs=n_jobs)
+            X_block = np.column_stack([store['columns'][c][rows] for c in base_columns] + [values])
+            write_split_rows(augmented, name, start, X_block, store['target'][rows], store['index'][rows])
+        print(f"{name} için {b - a} satır sorgulandı (k={k}, r={radius_km} km"
+              f"{', leave-one-out' if name == 'train' else ''})")
+
+    augmented['raw'].flush()
+    del augmented, store
+    for file_name in (DATA_FILE, META_FILE):
+        os.replace(os.path.join(tmp_dir, file_name), os.path.join(data_path, file_name))
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    joblib.dump(index, os.path.join(data_path, SPATIAL_INDEX_FILE))
+
+    print("--- Train Setinde Uzamsal Özelliklerin Hedef İle Korelasyonu ---")
+    train_spatial, y_train = load_split(open_store(data_path), 'train', columns=FEATURE_NAMES)
+    print(train_spatial.corrwith(y_train.astype(np.float64)).abs().to_string())
+    print(f"[INFO] Uzamsal indeks '{SPATIAL_INDEX_FILE}' olarak kaydedildi "
+          f"({time.time() - start_time:.4f} saniye).")
+    return index
@@ -0,0 +1,203 @@
+import pandas as pd
+import numpy as np
+import json
+import os
+
+
+# Sütunsal (columnar) bölünme deposu:
+#   splits_meta.json -> özellik isimleri, veri tipleri, sütun ofsetleri ve set satır aralıkları
+#   splits_data.bin  -> her sütun (özellikler, hedef, indeks) için tek parça (contiguous) dizi
+# Satırlar train | val | test sırasıyla saklanır; her set, her sütunda ardışık bir aralıktır.
+# Dosya np.memmap ile açıldığı için birden fazla model süreci aynı sayfaları kopyalamadan paylaşır.
+
+META_FILE = 'splits_meta.json'
+DATA_FILE = 'splits_data.bin'
+SPLIT_NAMES = ['train', 'val', 'test']
+STORE_VERSION = 1
+ALIGNMENT = 64
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def onehot_groups(feature_names, categorical_features):
+    """One-hot sütunlarını kaynak kategorik sütuna göre gruplar: {'cat__Ocean_Proximity': [...]}"""
+    groups = {}
+    for feature in categorical_features:
+        columns = [name for name in feature_names if name.startswith(f'cat__{feature}_')]
+        if columns:
+            groups[f'cat__{feature}'] = columns
+    return groups
+
+
+def compact_dtypes(feature_names, categorical_groups):
+    """Kompakt temsil: one-hot sütunları uint8, diğer özellikler float32."""
+    onehot = {name for columns in categorical_groups.values() for name in columns}
+    return {name: np.uint8 if name in onehot else np.float32 for name in feature_names}
+
+
+def collapse_onehot(X, categorical_groups, dtype=np.uint8):
+    """
+    Her one-hot bloğunu tek bir tamsayı kod sütununa indirger (ağaç modelleri için).
+    Bloğun hiçbir sütunu 1 değilse (seçimde çıkarılmış veya bilinmeyen kategori) kod len(blok) olur.
+    Kod sütunu bloğun ilk sütununun yerine yazılır.
+    """
+    X = X.copy(deep=False)
+    for code_name, columns in categorical_groups.items():
+        columns = [name for name in columns if name in X.columns]
+        if not columns:
+            continue
+        block = X[columns].to_numpy()
+        code = np.where(block.any(axis=1), block.argmax(axis=1), len(columns)).astype(dtype)
+        position = X.columns.get_loc(columns[0])
+        X = X.drop(columns=columns)
+        X.insert(position, code_name, code)
+    return X
+
+
+def create_store(output_dir, feature_names, split_sizes, dtype=np.float64,
+                 target_name='Median_House_Value', target_dtype=np.float64, categorical_groups=None):
+    """
+    Boş bir depo oluşturur ve yazılabilir olarak açar.
+    split_sizes: {'train': n, 'val': n, 'test': n}
+    categorical_groups: one-hot blokları; meta veriye yazılır (collapse_onehot ve Compact_Dtype_Report kullanır)
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    n_rows = int(sum(split_sizes[name] for name in SPLIT_NAMES))
+    splits = {}
+    start = 0
+    for name in SPLIT_NAMES:
+        splits[name] = [start, start + int(split_sizes[name])]
+        start += int(split_sizes[name])
+
+    # Sütun başına veri tipi verilebilir; tek tip verilirse tüm özelliklere uygulanır
+    if isinstance(dtype, dict):
+        dtypes = [np.dtype(dtype[name]) for name in feature_names]
+    else:
+        dtypes = [np.dtype(dtype)] * len(feature_names)
+
+    offset = 0
+    columns = []
+    for name, col_dtype in zip(feature_names, dtypes):
+        columns.append({'name': name, 'dtype': col_dtype.str, 'offset': offset})
+        offset = _align(offset + n_rows * col_dtype.itemsize)
+
+    target = {'name': target_name, 'dtype': np.dtype(target_dtype).str, 'offset': offset}
+    offset = _align(offset + n_rows * np.dtype(target_dtype).itemsize)
+    index = {'dtype': np.dtype(np.int64).str, 'offset': offset}
+    offset = offset + n_rows * np.dtype(np.int64).itemsize
+
+    meta = {
+        'version': STORE_VERSION,
+        'n_rows': n_rows,
+        'splits': splits,
+        'feature_names': list(feature_names),
+        'columns': columns,
+        'target': target,
+        'index': index,
+        'categorical_groups': categorical_groups or {},
+        'data_size': offset
+    }
+
+    with open(os.path.join(output_dir, DATA_FILE), 'wb') as f:
+        f.truncate(max(offset, 1))
+    with open(os.path.join(output_dir, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    return open_store(output_dir, mode='r+')
+
+
+def open_store(data_path, mode='r'):
+    """
+    Depoyu tek bir np.memmap eşlemesi ile açar ve her sütunu bu eşleme
+    üzerinde kopyasız bir görünüm (view) olarak döndürür.
+    """
+    with open(os.path.join(data_path, META_FILE), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+
+    n_rows = meta['n_rows']
+    raw = np.memmap(os.path.join(data_path, DATA_FILE), dtype=np.uint8, mode=mode)
+
+    def column_view(offset, dtype):
+        dtype = np.dtype(dtype)
+        return raw[offset:offset + n_rows * dtype.itemsize].view(dtype)
+
+    return {
+        'meta': meta,
+        'raw': raw,
+        'columns': {c['name']: column_view(c['offset'], c['dtype']) for c in meta['columns']},
+        'target': column_view(meta['target']['offset'], meta['target']['dtype']),
+        'index': column_view(meta['index']['offset'], meta['index']['dtype'])
+    }
+
+
+def write_split_rows(store, split, start, X_block, y_block, index_block=None):
+    """Bir setin `start` satırından itibaren bir satır bloğunu sütunlara yazar."""
+    a = store['meta']['splits'][split][0] + start
+    b = a + len(y_block)
+    X_block = np.asarray(X_block)
+    for j, name in enumerate(store['meta']['feature_names']):
+        store['columns'][name][a:b] = X_block[:, j]
+    store['target'][a:b] = y_block
+    if index_block is None:
+        index_block = np.arange(a, b)
+    store['index'][a:b] = index_block
+
+
+def write_splits(output_dir, X_train, X_val, X_test, y_train, y_val, y_test, dtype=np.float64,
+                 target_dtype=np.float64, categorical_groups=None):
+    """Bellekteki Train/Validation/Test setlerini depoya yazar."""
+    data = {'train': (X_train, y_train), 'val': (X_val, y_val), 'test': (X_test, y_test)}
+    store = create_store(
+        output_dir, X_train.columns.tolist(),
+        {name: len(data[name][1]) for name in SPLIT_NAMES},
+        dtype=dtype, target_name=y_train.name or 'Median_House_Value',
+        target_dtype=target_dtype, categorical_groups=categorical_groups
+    )
+    for name in SPLIT_NAMES:
+        X, y = data[name]
+        write_split_rows(store, name, 0, X.to_numpy(), y.to_numpy(), X.index.to_numpy())
+    store['raw'].flush()
+    return store['meta']
+
+
+def _load_pickles(data_path):
+    """Eski formatta (altı ayrı pickle) kaydedilmiş setleri yükler."""
+    return (
+        pd.read_pickle(os.path.join(data_path, "X_train.pkl")),
+        pd.read_pickle(os.path.join(data_path, "X_val.pkl")),
+        pd.read_pickle(os.path.join(data_path, "X_test.pkl")),
+        pd.read_pickle(os.path.join(data_path, "y_train.pkl")),
+        pd.read_pickle(os.path.join(data_path, "y_val.pkl")),
+        pd.read_pickle(os.path.join(data_path, "y_test.pkl"))
+    )
+
+
+def load_split(store, split, columns=None):
+    """Açık bir depodan tek bir seti (X, y) kopyasız DataFrame/Series olarak döndürür."""
+    meta = store['meta']
+    a, b = meta['splits'][split]
+    columns = meta['feature_names'] if columns is None else columns
+    index = pd.Index(store['index'][a:b])
+    X = pd.DataFrame({name: store['columns'][name][a:b] for name in columns}, index=index, copy=False)
+    y = pd.Series(store['target'][a:b], index=index, name=meta['target']['name'], copy=False)
+    return X, y
+
+
+def load_splits(data_path="../data/processed_data/"):
+    """
+    X_train, X_val, X_test, y_train, y_val, y_test döndürür.
+    Sütunsal depo varsa np.memmap ile açılır, yoksa eski pickle dosyaları okunur.
+    Dosyalar bulunamazsa FileNotFoundError fırlatır.
+    """
+    if not os.path.exists(os.path.join(data_path, META_FILE)):
+        return _load_pickles(data_path)
+
+    store = open_store(data_path)
+    X_train, y_train = load_split(store, 'train')
+    X_val, y_val = load_split(store, 'val')
+    X_test, y_test = load_split(store, 'test')
+    return X_train, X_val, X_test, y_train, y_val, y_test
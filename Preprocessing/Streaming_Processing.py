@@ -0,0 +1,356 @@
+import pandas as pd
+import numpy as np
+import time
+import json
+import os
+
+from Data_Processing import (
+    COLUMN_NAMES, TARGET_COLUMN, CATEGORICAL_FEATURES, IQR_MULTIPLIER,
+    CORR_THRESHOLD, MI_THRESHOLD, REDUNDANCY_THRESHOLD, TEST_SIZE, VAL_SIZE, RANDOM_STATE, SPATIAL_FEATURES,
+    STREAMING_META_FILE, save_preprocessing_meta
+)
+from Split_Store import create_store, write_split_rows, onehot_groups, compact_dtypes
+from Compiled_Transform import CompiledTransform, COMPILED_TRANSFORM_FILE
+# Birleştirilebilir korelasyon özeti özellik seçimi modülündedir
+from Feature_Selection import RunningCorrelation, select_features, save_selection, sample_size
+from Spatial_Features import run_spatial_features, remove_spatial_index
+from Tracing import span, traced
+
+
+NUMERICAL_FEATURES = [c for c in COLUMN_NAMES if c != TARGET_COLUMN and c not in CATEGORICAL_FEATURES]
+SPLIT_NAMES = ['train', 'val', 'test']
+
+
+# BİRLEŞTİRİLEBİLİR (MERGEABLE) İSTATİSTİKLER
+
+def _compress(means, weights, size):
+    """Ağırlıklı merkezleri, kümülatif ağırlığa göre en fazla `size` eşit ağırlıklı gruba indirger."""
+    order = np.argsort(means, kind='mergesort')
+    means, weights = means[order], weights[order]
+    if len(means) <= size:
+        return means, weights
+
+    cum = np.cumsum(weights)
+    groups = np.minimum(((cum - weights / 2) / cum[-1] * size).astype(np.int64), size - 1)
+    group_weights = np.bincount(groups, weights=weights, minlength=size)
+    group_sums = np.bincount(groups, weights=means * weights, minlength=size)
+    mask = group_weights > 0
+    return group_sums[mask] / group_weights[mask], group_weights[mask]
+
+
+class QuantileSketch:
+    """
+    Sabit boyutlu, birleştirilebilir yaklaşık kantil özeti.
+    Bellek kullanımı veri boyutundan bağımsızdır (en fazla `size` merkez tutulur).
+    """
+
+    def __init__(self, size=2048):
+        self.size = size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self._absorb(values, np.ones(len(values)))
+
+    def merge(self, other):
+        if other.weights.size == 0:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._absorb(other.means, other.weights)
+
+    def _absorb(self, means, weights):
+        self.means, self.weights = _compress(
+            np.concatenate([self.means, means]),
+            np.concatenate([self.weights, weights]),
+            self.size
+        )
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    def quantile(self, q):
+        """Doğrusal enterpolasyon ile yaklaşık q kantilini döndürür."""
+        if self.weights.size == 0:
+            return np.nan
+        cum = np.cumsum(self.weights)
+        centers = np.concatenate([[0.0], cum - self.weights / 2, [cum[-1]]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        return float(np.interp(q * cum[-1], centers, values))
+
+
+class RunningMoments:
+    """Sütun bazında sayı, ortalama ve M2 (kareler toplamı) tutan birleştirilebilir moment özeti."""
+
+    def __init__(self, n_columns):
+        self.n = np.zeros(n_columns)
+        self.mean = np.zeros(n_columns)
+        self.m2 = np.zeros(n_columns)
+
+    def update(self, values):
+        """NaN değerleri atlayarak bir veri parçasını (satır x sütun) özete ekler."""
+        values = np.asarray(values, dtype=np.float64)
+        mask = ~np.isnan(values)
+        n_b = mask.sum(axis=0).astype(np.float64)
+        sum_b = np.where(mask, values, 0.0).sum(axis=0)
+        mean_b = np.divide(sum_b, n_b, out=np.zeros_like(sum_b), where=n_b > 0)
+        m2_b = (np.where(mask, values - mean_b, 0.0) ** 2).sum(axis=0)
+        self.merge_arrays(n_b, mean_b, m2_b)
+
+    def merge_arrays(self, n_b, mean_b, m2_b):
+        """Chan vd. paralel varyans formülü ile iki özeti birleştirir."""
+        n = self.n + n_b
+        safe_n = np.where(n > 0, n, 1.0)
+        delta = mean_b - self.mean
+        self.mean = self.mean + delta * n_b / safe_n
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.n * n_b / safe_n
+        self.n = n
+
+    def merge(self, other):
+        self.merge_arrays(other.n, other.mean, other.m2)
+
+    @property
+    def var(self):
+        # StandardScaler ile uyumlu olarak popülasyon varyansı (ddof=0)
+        return np.divide(self.m2, self.n, out=np.zeros_like(self.m2), where=self.n > 0)
+
+
+# PARÇA (CHUNK) İŞLEMLERİ
+
+def iter_chunks(file_path, chunksize):
+    """CSV dosyasını sütun isimleri netleştirilmiş parçalar halinde okur."""
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        chunk.columns = COLUMN_NAMES
+        yield chunk
+
+
+def transform_chunk(chunk, stats):
+    """Öğrenilmiş istatistiklerle bir parçaya imputer + scaler + one-hot dönüşümünü uygular."""
+    num = chunk[NUMERICAL_FEATURES].to_numpy(dtype=np.float64)
+    num = np.where(np.isnan(num), stats['medians'], num)
+    num = (num - stats['means']) / stats['scales']
+
+    # Bilinmeyen kategoriler tüm sütunlarda 0 olur (handle_unknown='ignore')
+    cat = chunk[CATEGORICAL_FEATURES[0]].to_numpy(dtype=object)
+    onehot = (cat[:, None] == np.asarray(stats['categories'], dtype=object)[None, :]).astype(np.float64)
+    return np.hstack([num, onehot])
+
+
+def assign_splits(rng, n_rows):
+    """Her satırı sabit tohumlu üreteçle train (0), val (1) veya test (2) setine atar."""
+    u = rng.random(n_rows)
+    return np.where(u < TEST_SIZE, 2, np.where(u < TEST_SIZE + VAL_SIZE, 1, 0))
+
+
+@traced('streaming.stats_pass')
+def fit_streaming_stats(file_path, chunksize=100_000, sketch_size=2048):
+    """
+    İlk geçiş: imputer medyanları, scaler momentleri, one-hot kategorileri
+    ve hedef değişken IQR kantillerini parça parça öğrenir.
+    """
+    moments = RunningMoments(len(NUMERICAL_FEATURES))
+    sketches = [QuantileSketch(sketch_size) for _ in NUMERICAL_FEATURES]
+    target_sketch = QuantileSketch(sketch_size)
+    categories = set()
+    n_rows = 0
+
+    for chunk in iter_chunks(file_path, chunksize):
+        num = chunk[NUMERICAL_FEATURES].to_numpy(dtype=np.float64)
+        moments.update(num)
+        for j, sketch in enumerate(sketches):
+            sketch.update(num[:, j])
+        target_sketch.update(chunk[TARGET_COLUMN].to_numpy(dtype=np.float64))
+        # Eksik kategori (NaN) listeye alınmaz ve bilinmeyen kategori gibi sıfır satırı olur; bellek içi
+        # moddaki OneHotEncoder ise NaN'ı ayrı bir kategori (..._nan sütunu) olarak öğrenir
+        categories.update(chunk[CATEGORICAL_FEATURES[0]].dropna().unique().tolist())
+        n_rows += len(chunk)
+
+    medians = np.array([s.quantile(0.5) for s in sketches])
+
+    # Eksik değerler medyan ile dolduğu için scaler momentlerine (n_eksik, medyan, 0) grubunu ekle
+    moments.merge_arrays(n_rows - moments.n, medians, np.zeros_like(medians))
+    scales = np.sqrt(moments.var)
+    scales[scales == 0] = 1.0
+
+    q1 = target_sketch.quantile(0.25)
+    q3 = target_sketch.quantile(0.75)
+
+    categories = sorted(categories)
+    feature_names = [f'num__{c}' for c in NUMERICAL_FEATURES] + \
+                    [f'cat__{CATEGORICAL_FEATURES[0]}_{c}' for c in categories]
+
+    return {
+        'n_rows': n_rows,
+        'medians': medians,
+        'means': moments.mean.copy(),
+        'scales': scales,
+        'categories': categories,
+        'feature_names': feature_names,
+        'q1': q1,
+        'q3': q3,
+        'upper_bound': q3 + IQR_MULTIPLIER * (q3 - q1)
+    }
+
+
+@traced('streaming.correlation_pass')
+def fit_streaming_correlations(file_path, stats, chunksize=100_000, sample_rows=0):
+    """
+    İkinci geçiş: aykırı değerler çıkarıldıktan sonra her özelliğin hedef ile
+    korelasyonunu ve bölünme boyutlarını parça parça hesaplar.
+    sample_rows > 0 ise MI/fazlalık filtreleri için en fazla bu kadar satırlık bir alt örnek de toplanır.
+    """
+    corr = RunningCorrelation(len(stats['feature_names']))
+    split_counts = np.zeros(len(SPLIT_NAMES), dtype=np.int64)
+    rng = np.random.default_rng(RANDOM_STATE)
+    n_outliers = 0
+
+    # Her satır p = sample_rows / n_rows olasılıkla seçilir; ayrı üreteç bölünme atamasını değiştirmez
+    sample_rng = np.random.default_rng([RANDOM_STATE, 1])
+    sample_p = min(1.0, sample_rows / max(stats['n_rows'], 1))
+    sample_X, sample_y, n_sampled = [], [], 0
+
+    for chunk in iter_chunks(file_path, chunksize):
+        y = chunk[TARGET_COLUMN].to_numpy(dtype=np.float64)
+        clean = ~(y > stats['upper_bound'])
+        n_outliers += int((~clean).sum())
+
+        X_t = transform_chunk(chunk, stats)
+        corr.update(X_t[clean], y[clean])
+        split_counts += np.bincount(assign_splits(rng, int(clean.sum())), minlength=len(SPLIT_NAMES))
+
+        if sample_p > 0 and n_sampled < sample_rows:
+            take = (sample_rng.random(len(y)) < sample_p) & clean
+            rows = np.flatnonzero(take)[:sample_rows - n_sampled]
+            sample_X.append(X_t[rows])
+            sample_y.append(y[rows])
+            n_sampled += len(rows)
+
+    sample = (np.vstack(sample_X), np.concatenate(sample_y)) if n_sampled > 0 else None
+    return np.abs(corr.correlations()), split_counts, n_outliers, sample
+
+
+@traced('preprocessing.streaming')
+def run_streaming_preprocessing(file_path, output_dir, chunksize=100_000, dtype=np.float64,
+                                mi_threshold=MI_THRESHOLD, redundancy_threshold=REDUNDANCY_THRESHOLD, compact=False,
+                                spatial=SPATIAL_FEATURES):
+    """
+    Ön işlemeyi veriyi belleğe tamamen almadan, parça parça üç geçişte uygular.
+    Tepe bellek kullanımı veri boyutu ile değil parça boyutu ile sınırlıdır.
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    print(f"--- Akış (Streaming) Modunda Ön İşleme Başlatılıyor (Parça Boyutu: {chunksize}) ---")
+    start_time = time.time()
+
+    # 1. GEÇİŞ: MEDYAN, MOMENT, KATEGORİ VE KANTİLLER
+
+    if not os.path.exists(file_path):
+        print(f"HATA: Dosya '{file_path}' bulunamadı. Lütfen yolu kontrol edin.")
+        return
+
+    stats = fit_streaming_stats(file_path, chunksize)
+    print(f"Toplam Örnek Sayısı: {stats['n_rows']}")
+    print(f"One-Hot Encoding Sonrası Toplam Özellik Sayısı: {len(stats['feature_names'])}")
+    print(f"Aykırı Değer Üst Sınırı (Yaklaşık): {stats['upper_bound']:,.2f}")
+
+    # 2. GEÇİŞ: KORELASYONLAR VE BÖLÜNME BOYUTLARI
+
+    use_sample = mi_threshold is not None or redundancy_threshold is not None
+    sample_rows = sample_size(stats['n_rows'], len(stats['feature_names'])) if use_sample else 0
+    correlations, split_counts, n_outliers, sample = fit_streaming_correlations(
+        file_path, stats, chunksize, sample_rows
+    )
+    correlations_features = pd.Series(correlations, index=stats['feature_names']).sort_values(ascending=False)
+
+    print(f"Tespit Edilen Aykırı Değer Sayısı: {n_outliers}")
+    print("--- Hedef Değişken İle İlk 5 Korelasyonu Yüksek Özellik ---")
+    print(correlations_features.head(5).to_string())
+
+    selection = select_features(stats['feature_names'], correlations, sample, corr_threshold=CORR_THRESHOLD,
+                                mi_threshold=mi_threshold, redundancy_threshold=redundancy_threshold,
+                                random_state=RANDOM_STATE)
+    selected_idx = [i for i, name in enumerate(stats['feature_names']) if name not in selection['dropped']]
+    selected_names = [stats['feature_names'][i] for i in selected_idx]
+    print(f"Çıkarılan Özellikler: {list(selection['dropped'])}")
+    print(f"Nihai Özellik Sayısı: {len(selected_names)}")
+
+    # 3. GEÇİŞ: DÖNÜŞTÜRME VE SETLERE YAZMA
+
+    # Bölünme boyutları önceden bilindiği için depo diskte önceden ayrılır ve parça parça doldurulur
+    groups = onehot_groups(selected_names, CATEGORICAL_FEATURES)
+    target_dtype = np.float64
+    if compact:
+        dtype, target_dtype = compact_dtypes(selected_names, groups), np.float32
+    store = create_store(
+        output_dir, selected_names,
+        {name: int(split_counts[s]) for s, name in enumerate(SPLIT_NAMES)},
+        dtype=dtype, target_name=TARGET_COLUMN, target_dtype=target_dtype, categorical_groups=groups
+    )
+    cursors = np.zeros(len(SPLIT_NAMES), dtype=np.int64)
+
+    rng = np.random.default_rng(RANDOM_STATE)
+    row_offset = 0
+    with span('streaming.write_pass', rows=int(split_counts.sum())):
+        for chunk in iter_chunks(file_path, chunksize):
+            y = chunk[TARGET_COLUMN].to_numpy(dtype=np.float64)
+            clean = ~(y > stats['upper_bound'])
+            X_t = transform_chunk(chunk, stats)[clean][:, selected_idx]
+            rows = np.arange(row_offset, row_offset + len(chunk))[clean]
+            row_offset += len(chunk)
+            y = y[clean]
+            splits = assign_splits(rng, len(y))
+
+            for s, name in enumerate(SPLIT_NAMES):
+                mask = splits == s
+                write_split_rows(store, name, int(cursors[s]), X_t[mask], y[mask], rows[mask])
+                cursors[s] += int(mask.sum())
+
+        store['raw'].flush()
+
+    metadata = {
+        'feature_names': selected_names,
+        'split_sizes': {name: int(split_counts[s]) for s, name in enumerate(SPLIT_NAMES)},
+        'medians': stats['medians'].tolist(),
+        'means': stats['means'].tolist(),
+        'scales': stats['scales'].tolist(),
+        'categories': stats['categories'],
+        'upper_bound': stats['upper_bound'],
+        'correlations': correlations_features.to_dict()
+    }
+    with open(os.path.join(output_dir, STREAMING_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    save_preprocessing_meta(output_dir, 'stream', stats['upper_bound'], NUMERICAL_FEATURES + CATEGORICAL_FEATURES,
+                            stats['feature_names'], selected_names)
+    save_selection(selection, output_dir)
+
+    # Akış modunda öğrenilen istatistikler de aynı derlenmiş dönüşüm formatında kaydedilir
+    compiled = CompiledTransform.from_stats(
+        NUMERICAL_FEATURES, stats['medians'], stats['means'], stats['scales'],
+        CATEGORICAL_FEATURES[0], stats['categories'], stats['feature_names'], selected_names
+    )
+    compiled.save(os.path.join(output_dir, COMPILED_TRANSFORM_FILE))
+
+    # Uzamsal özellikler (isteğe bağlı); ham koordinatlar deponun ham satır indeksleriyle eşlenir
+    if spatial:
+        run_spatial_features(output_dir, file_path, COLUMN_NAMES, chunk_rows=chunksize)
+    else:
+        remove_spatial_index(output_dir)
+
+    total_samples = int(split_counts.sum())
+    print("\n--- Sonuç: Veri Seti Oranları ---")
+    for s, name in enumerate(SPLIT_NAMES):
+        print(f"{name} Boyutu: {int(split_counts[s])} | Oran: {split_counts[s] / max(total_samples, 1):.2%}")
+
+    elapsed_time = time.time() - start_time
+    print(f"\n[INFO] Akış Modunda Ön İşleme Süresi: {elapsed_time:.4f} saniye")
+    print(f"Ön İşleme tamamlandı ve veriler '{output_dir}' klasörüne kaydedildi.")
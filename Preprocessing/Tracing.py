@@ -0,0 +1,305 @@
+import json
+import time
+import os
+import sys
+import atexit
+import threading
+import functools
+import argparse
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows: tepe RSS ölçümü yapılmaz
+    resource = None
+
+
+# İç içe geçebilen izleme aralıkları (span). Her aralık duvar ve CPU süresini, tepe bellek kullanımını
+# ve (verilirse) satır sayısını kaydeder. İzleme ortam değişkeniyle açılır:
+#   HOUSING_TRACE=trace.jsonl python Data_Processing.py
+# Kapalıyken span() paylaşılan boş bir bağlam yöneticisi döndürür; maliyeti tek bir koşul kontrolüdür.
+# Ortam değişkeni alt süreçlere geçtiği için işçi süreçler de aralık toplar ve bunları sonuçlarıyla
+# birlikte ana sürece döndürür (worker_spans / absorb); dosyaya yalnızca ana süreç yazar.
+
+TRACE_ENV = 'HOUSING_TRACE'
+MEMORY_ENV = 'HOUSING_TRACE_MEMORY'  # '1': tracemalloc ile aralık başına tepe Python/NumPy ayırması
+ROOT_ENV = 'HOUSING_TRACE_ROOT_PID'
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class _NullSpan:
+    """İzleme kapalıyken kullanılan, hiçbir şey yapmayan aralık."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Aralık sürerken öznitelik ekler (ör. rows=len(df))."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].id if stack else None
+        self.depth = len(stack)
+        self.id = self.tracer._next_id()
+        stack.append(self)
+
+        if self.tracer.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack[:-1]:
+                stack[-2]._child_peak = max(stack[-2]._child_peak, peak)
+            self._alloc_start = current
+            self._child_peak = 0
+            tracemalloc.reset_peak()
+
+        self._start = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        record = {
+            'name': self.name,
+            'id': self.id,
+            'parent': self.parent,
+            'depth': self.depth,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'start': self._start,
+            'wall': wall,
+            'cpu': cpu,
+            'peak_rss_kb': _peak_rss_kb()
+        }
+        if self.tracer.memory:
+            # Alt aralıklar tepe sayacını sıfırladığı için onların tepeleri ayrıca tutulur
+            _, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, self._child_peak)
+            record['peak_alloc_bytes'] = max(0, peak - self._alloc_start)
+            stack = self.tracer._stack()
+            if len(stack) > 1:
+                stack[-2]._child_peak = max(stack[-2]._child_peak, peak)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        record.update(self.attrs)
+
+        self.tracer._stack().pop()
+        self.tracer._record(record)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.path = None
+        self.is_root = False
+        self.spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._counter = 0
+
+    def configure(self, path=None, memory=None):
+        """Ortam değişkenlerinden (veya verilen değerlerden) izlemeyi açar; ilk açan süreç ana süreçtir."""
+        path = path or os.environ.get(TRACE_ENV)
+        if not path:
+            return
+        self.enabled = True
+        self.path = path
+        os.environ[TRACE_ENV] = path
+        if memory is None:
+            memory = os.environ.get(MEMORY_ENV) == '1'
+        self.memory = memory
+        if memory:
+            os.environ[MEMORY_ENV] = '1'
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+        root_pid = os.environ.get(ROOT_ENV)
+        if root_pid is None or root_pid == str(os.getpid()):
+            os.environ[ROOT_ENV] = str(os.getpid())
+            if not self.is_root:
+                self.is_root = True
+                atexit.register(self.flush)
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _next_id(self):
+        with self._lock:
+            self._counter += 1
+            return f'{os.getpid()}-{self._counter}'
+
+    def _record(self, record):
+        with self._lock:
+            self.spans.append(record)
+
+    def current_id(self):
+        stack = self._stack()
+        return stack[-1].id if stack else None
+
+    def _after_fork(self):
+        # fork ile oluşan işçi, ana sürecin aralıklarını ve açık aralık yığınını devralmamalı
+        self.spans = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.is_root = False
+
+    def drain(self):
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+    def flush(self):
+        """Biriken aralıkları JSON satırları olarak izleme dosyasının sonuna ekler."""
+        if not self.is_root:
+            return
+        spans = self.drain()
+        if not spans or not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for record in spans:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+
+
+TRACER = Tracer()
+TRACER.configure()
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=TRACER._after_fork)
+
+
+# GENEL ARAYÜZ
+
+def enable(path, memory=False):
+    """İzlemeyi program içinden açar (ortam değişkeni alt süreçlere de aktarılır)."""
+    TRACER.configure(path, memory)
+
+
+def span(name, **attrs):
+    """İç içe kullanılabilen izleme aralığı: `with span('preprocessing.read_csv') as s: ...; s.set(rows=n)`"""
+    if not TRACER.enabled:
+        return _NULL_SPAN
+    return Span(TRACER, name, attrs)
+
+
+def traced(name):
+    """Fonksiyonun tamamını bir aralıkla saran dekoratör."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled:
+                return fn(*args, **kwargs)
+            with Span(TRACER, name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def worker_spans():
+    """
+    İşçi süreçte biriken aralıkları döndürür ve temizler (sonuçla birlikte ana sürece gönderilir).
+    Ana süreçte (ör. n_jobs=1) aralıklar zaten kayıtlı olduğu için boş liste döner.
+    """
+    if not TRACER.enabled or TRACER.is_root:
+        return []
+    return TRACER.drain()
+
+
+def absorb(spans):
+    """İşçi süreçlerden dönen aralıkları güncel aralığın altına bağlayarak ana izlemeye ekler."""
+    if not TRACER.enabled or not spans:
+        return
+    parent = TRACER.current_id()
+    base_depth = len(TRACER._stack())
+    worker_ids = {record['id'] for record in spans}
+    for record in spans:
+        record = dict(record)
+        if record['parent'] not in worker_ids:
+            record['parent'] = parent
+        record['depth'] = record['depth'] + base_depth
+        TRACER._record(record)
+
+
+# DIŞA AKTARMA
+
+def load_spans(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def to_chrome_trace(spans):
+    """Chrome trace (chrome://tracing, Perfetto) formatında tam süreli ('X') olaylar."""
+    events = []
+    for record in spans:
+        args = {k: v for k, v in record.items() if k not in ('name', 'pid', 'tid', 'start', 'wall')}
+        events.append({
+            'name': record['name'],
+            'ph': 'X',
+            'ts': record['start'] * 1e6,
+            'dur': record['wall'] * 1e6,
+            'pid': record['pid'],
+            'tid': record['tid'],
+            'args': args
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def summarize(spans):
+    """Aralık adına göre toplam/ortalama duvar ve CPU süresi, en büyük tepe bellek ve satır sayısı."""
+    summary = {}
+    for record in spans:
+        row = summary.setdefault(record['name'], {'count': 0, 'wall': 0.0, 'cpu': 0.0,
+                                                  'peak_rss_kb': 0, 'peak_alloc_bytes': 0, 'rows': 0})
+        row['count'] += 1
+        row['wall'] += record['wall']
+        row['cpu'] += record['cpu']
+        row['peak_rss_kb'] = max(row['peak_rss_kb'], record.get('peak_rss_kb') or 0)
+        row['peak_alloc_bytes'] = max(row['peak_alloc_bytes'], record.get('peak_alloc_bytes') or 0)
+        row['rows'] += record.get('rows') or 0
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSONL izleme dosyasını özetler ve Chrome trace formatına çevirir")
+    parser.add_argument('trace', help="HOUSING_TRACE ile üretilen JSONL dosyası")
+    parser.add_argument('--chrome', default=None, help="Chrome trace çıktısı (ör. trace.json)")
+    args = parser.parse_args()
+
+    spans = load_spans(args.trace)
+    print(f"{'Aralık':<40} {'Adet':>6} {'Duvar (s)':>10} {'CPU (s)':>10} {'Tepe RSS (MB)':>14} {'Satır':>10}")
+    for name, row in sorted(summarize(spans).items(), key=lambda item: -item[1]['wall']):
+        print(f"{name:<40} {row['count']:>6} {row['wall']:>10.4f} {row['cpu']:>10.4f} "
+              f"{row['peak_rss_kb'] / 1024:>14.1f} {row['rows']:>10}")
+
+    if args.chrome:
+        with open(args.chrome, 'w', encoding='utf-8') as f:
+            json.dump(to_chrome_trace(spans), f)
+        print(f"\n[INFO] Chrome trace '{args.chrome}' olarak kaydedildi (chrome://tracing veya Perfetto ile açılabilir).")
@@ -0,0 +1,87 @@
+import pandas as pd
+import numpy as np
+import time
+import joblib
+import os
+import argparse
+
+from Data_Processing import FILE_PATH, OUTPUT_DIR, PREPROCESSING_FILE, COLUMN_NAMES
+from Compiled_Transform import CompiledTransform, COMPILED_TRANSFORM_FILE
+
+
+BATCH_SIZES = [1, 100, 100_000]
+
+
+def sklearn_transform(preprocessing, df):
+    """Referans yol: ColumnTransformer.transform + özellik seçimi (sütun düşürme)."""
+    X = preprocessing['preprocessor'].transform(df[preprocessing['input_columns']])
+    X = pd.DataFrame(X, columns=preprocessing['feature_names'], index=df.index)
+    return X[preprocessing['selected_features']].to_numpy()
+
+
+def time_call(fn, min_time=0.5, max_repeats=1000):
+    """Bir ısınma çağrısından sonra fonksiyonu en az min_time saniye tekrar çalıştırır; medyan süreyi döndürür."""
+    fn()
+    times = []
+    total_start = time.perf_counter()
+    while len(times) < max_repeats and (time.perf_counter() - total_start < min_time or len(times) < 3):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), len(times)
+
+
+def run_benchmark(file_path=FILE_PATH, output_dir=OUTPUT_DIR, batch_sizes=BATCH_SIZES, min_time=0.5):
+    """Derlenmiş dönüşümü preprocessor.transform ile farklı parti boyutlarında karşılaştırır."""
+    try:
+        preprocessing = joblib.load(os.path.join(output_dir, PREPROCESSING_FILE))
+        raw = pd.read_csv(file_path)
+    except FileNotFoundError as e:
+        print(f"HATA: Gerekli dosya bulunamadı. Önce Data_Processing.py çalıştırılmalı. Hata: {e}")
+        return
+
+    raw.columns = COLUMN_NAMES
+    compiled_path = os.path.join(output_dir, COMPILED_TRANSFORM_FILE)
+    if os.path.exists(compiled_path):
+        compiled = CompiledTransform.load(compiled_path)
+    else:
+        compiled = CompiledTransform.from_preprocessing(preprocessing)
+
+    # Büyük partiler için ham veri tekrarlanır (satır sırası karıştırılır)
+    rng = np.random.default_rng(42)
+    results = {}
+    for batch_size in batch_sizes:
+        rows = rng.integers(0, len(raw), size=batch_size)
+        batch = raw.iloc[rows].reset_index(drop=True)
+
+        # Doğruluk kontrolü: iki yol aynı matrisi üretmeli
+        max_abs_diff = float(np.max(np.abs(sklearn_transform(preprocessing, batch) - compiled.transform(batch))))
+
+        sklearn_time, sklearn_repeats = time_call(lambda: sklearn_transform(preprocessing, batch), min_time)
+        compiled_time, compiled_repeats = time_call(lambda: compiled.transform(batch), min_time)
+
+        results[batch_size] = {
+            'sklearn (ms)': sklearn_time * 1000,
+            'Derlenmiş (ms)': compiled_time * 1000,
+            'Hızlanma (x)': sklearn_time / compiled_time,
+            'Derlenmiş Satır/s': batch_size / compiled_time,
+            'Tekrar': min(sklearn_repeats, compiled_repeats),
+            'En Büyük Fark': max_abs_diff
+        }
+        print(f"Parti Boyutu {batch_size}: sklearn {sklearn_time * 1000:.3f} ms | "
+              f"derlenmiş {compiled_time * 1000:.3f} ms | fark {max_abs_diff:.2e}")
+
+    summary = pd.DataFrame(results).T
+    summary.index.name = 'Parti Boyutu'
+    print("\n--- Dönüşüm Karşılaştırması (medyan süre) ---")
+    print(summary.to_string(float_format=lambda v: f"{v:,.4f}"))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Derlenmiş dönüşüm ile preprocessor.transform karşılaştırması")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=BATCH_SIZES)
+    parser.add_argument('--min-time', type=float, default=0.5, help="Her ölçüm için en az tekrar süresi (saniye)")
+    args = parser.parse_args()
+
+    run_benchmark(batch_sizes=args.batch_sizes, min_time=args.min_time)
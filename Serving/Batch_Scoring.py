@@ -0,0 +1,224 @@
+import pandas as pd
+import numpy as np
+import time
+import queue
+import threading
+import os
+import sys
+import argparse
+import joblib
+from concurrent.futures import ProcessPoolExecutor
+from threadpoolctl import threadpool_limits
+
+# Model sınıfları/artefaktları Modelling, dönüşüm ve izleme yardımcıları Preprocessing klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelling'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Compiled_Transform import CompiledTransform
+from Model_Artifacts import load_model
+from Tracing import span, traced, worker_spans, absorb
+from Inference_Server import RAW_TO_COLUMN
+
+
+# Büyük ham CSV dosyaları için toplu (gece) skorlama:
+#   okuyucu (ana iş parçacığı, pd.read_csv parçaları) -> süreç havuzu (dönüşüm + tahmin) -> yazıcı (iş parçacığı)
+# Havuzdaki iş sayısı ve yazıcı kuyruğu max_inflight ile sınırlıdır; okuyucu kuyruk dolunca bekler.
+# Bellekte aynı anda en fazla max_inflight parça bulunduğu için kullanım dosya boyutundan bağımsızdır.
+# Yazıcı sonuçları gönderilme sırasıyla beklediği için tahminler girdi sırasıyla yazılır.
+
+MODEL_DIR = '../Modelling/models'
+TRANSFORM_PATH = '../data/processed_data/compiled_transform.npz'
+SPATIAL_INDEX_PATH = '../data/processed_data/spatial_index.pkl'
+CHUNK_ROWS = 100_000
+PREDICTION_COLUMN = 'prediction'
+# Okuyucu dolu kuyrukta bu aralıklarla yazıcının hâlâ çalıştığını kontrol eder
+PUT_TIMEOUT = 0.5
+
+# İşçi süreçteki dönüşüm ve model (süreç başına bir kez yüklenir)
+_STATE = None
+
+
+def _init_worker(model_dir, model_key, transform_path, spatial_path):
+    """
+    Dönüşümü ve modeli bir kez yükler. Model artefaktı varsa diziler memmap ile açılır ve
+    tüm işçiler aynı sayfaları paylaşır. Paralellik süreç seviyesinde olduğu için BLAS tek iş parçacığıdır.
+    """
+    global _STATE
+    threadpool_limits(limits=1)
+    model = load_model(model_dir, model_key)
+    if hasattr(model, 'get_params') and 'n_jobs' in model.get_params(deep=False):
+        model.set_params(n_jobs=1)
+    _STATE = {
+        'transform': CompiledTransform.load(transform_path),
+        'spatial': joblib.load(spatial_path) if spatial_path and os.path.exists(spatial_path) else None,
+        'model': model
+    }
+
+
+def _score_chunk(chunk):
+    """Bir parçayı dönüştürüp tahmin eder; tahminleri ve aşama sürelerini döndürür."""
+    start = time.perf_counter()
+    with span('batch_scoring.transform', rows=len(chunk)):
+        X = _STATE['transform'].transform_frame(chunk)
+        if _STATE['spatial'] is not None:
+            X = pd.concat([X, _STATE['spatial'].transform_frame(chunk)], axis=1)
+    transform_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with span('batch_scoring.predict', rows=len(chunk)):
+        predictions = np.asarray(_STATE['model'].predict(X), dtype=np.float64)
+    predict_time = time.perf_counter() - start
+    return predictions, transform_time, predict_time, worker_spans()
+
+
+def _writer(output_path, jobs, stats, id_column):
+    """
+    Gönderilme sırasıyla sonuçları bekler ve çıktı dosyasına ekler; None işareti ile biter.
+    Bir parça başarısız olursa hata kaydedilir ve okuyucu takılmasın diye kuyruk boşaltılmaya devam edilir.
+    Yazmanın kendisi başarısız olursa (ör. disk dolu) hata kaydedilir ve iş parçacığı biter; okuyucu
+    bunu kuyruğa zaman aşımıyla eklerken fark eder (_put).
+    """
+    try:
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            header = True
+            while True:
+                job = jobs.get()
+                if job is None:
+                    break
+                ids, future = job
+                if stats['error'] is not None:
+                    future.cancel()
+                    continue
+                try:
+                    predictions, transform_time, predict_time, spans = future.result()
+                except Exception as e:
+                    stats['error'] = e
+                    continue
+                absorb(spans)
+
+                start = time.perf_counter()
+                out = pd.DataFrame({PREDICTION_COLUMN: predictions})
+                if id_column is not None:
+                    out.insert(0, id_column, ids)
+                out.to_csv(f, header=header, index=False)
+                header = False
+                stats['write'] += time.perf_counter() - start
+                stats['transform'] += transform_time
+                stats['predict'] += predict_time
+                stats['rows'] += len(predictions)
+    except BaseException as e:
+        if stats['error'] is None:
+            stats['error'] = e
+
+
+def _put(jobs, item, writer):
+    """Kuyruğa zaman aşımıyla ekler; yazıcı iş parçacığı sonlanmışsa False döndürür (okuyucu takılmaz)."""
+    while writer.is_alive():
+        try:
+            jobs.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+@traced('batch_scoring')
+def run_batch_scoring(input_path, output_path, model_key='gbr', model_dir=MODEL_DIR, transform_path=TRANSFORM_PATH,
+                      spatial_path=SPATIAL_INDEX_PATH, chunk_rows=CHUNK_ROWS, n_workers=None, max_inflight=None,
+                      id_column=None):
+    """
+    input_path'teki ham satırları parça parça skorlayıp tahminleri girdi sırasıyla output_path'e yazar.
+    id_column verilirse bu girdi sütunu tahminlerin yanına kopyalanır.
+    Aşama başına süre ve saniyedeki satır sayısını içeren tabloyu döndürür.
+    """
+    if not os.path.exists(input_path):
+        print(f"HATA: Dosya '{input_path}' bulunamadı. Lütfen yolu kontrol edin.")
+        return
+    n_workers = n_workers or os.cpu_count() or 1
+    max_inflight = max_inflight or 2 * n_workers
+    transform = CompiledTransform.load(transform_path)
+    # Kimlik sütunu ham (küçük harfli) isimle de verilebilir
+    id_source = RAW_TO_COLUMN.get(id_column, id_column) if id_column is not None else None
+
+    print(f"--- Toplu Skorlama Başlatılıyor (Model: {model_key}, İşçi: {n_workers}, Parça: {chunk_rows} satır) ---")
+
+    # Yazım tamamlanmadan çıktı yolunda yarım dosya görünmez
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    stats = {'read': 0.0, 'transform': 0.0, 'predict': 0.0, 'write': 0.0, 'rows': 0, 'error': None}
+    jobs = queue.Queue(maxsize=max_inflight)
+    writer = threading.Thread(target=_writer, args=(tmp_path, jobs, stats, id_column), daemon=True)
+
+    wall_start = time.time()
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(model_dir, model_key, transform_path, spatial_path)) as executor:
+        writer.start()
+        try:
+            reader = pd.read_csv(input_path, chunksize=chunk_rows)
+            while True:
+                start = time.perf_counter()
+                chunk = next(reader, None)
+                if chunk is None:
+                    break
+                chunk = chunk.rename(columns=RAW_TO_COLUMN)
+                missing = [c for c in transform.input_columns if c not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Girdi dosyasında eksik sütunlar: {missing}")
+                ids = chunk[id_source].to_numpy() if id_source is not None else None
+                stats['read'] += time.perf_counter() - start
+                if stats['error'] is not None:
+                    break
+
+                # Kuyruk doluysa (max_inflight parça beklemede) okuyucu burada bekler; yazıcı hata verip
+                # sonlanmışsa okuma durur ve yazıcının hatası aşağıda yeniden fırlatılır
+                future = executor.submit(_score_chunk, chunk)
+                if not _put(jobs, (ids, future), writer):
+                    future.cancel()
+                    break
+        except BaseException as e:
+            if stats['error'] is None:
+                stats['error'] = e
+            raise
+        finally:
+            _put(jobs, None, writer)
+            writer.join()
+            # Yazıcı erken sonlandıysa kuyrukta kalan işler iptal edilir (havuz onları beklemez)
+            while True:
+                try:
+                    job = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is not None:
+                    job[1].cancel()
+            if stats['error'] is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    wall_time = time.time() - wall_start
+
+    if stats['error'] is not None:
+        raise stats['error']
+    os.replace(tmp_path, output_path)
+
+    rows = stats['rows']
+    summary = pd.DataFrame({
+        'Süre (s)': {'okuma': stats['read'], 'dönüşüm': stats['transform'], 'tahmin': stats['predict'],
+                     'yazma': stats['write'], 'toplam (duvar)': wall_time},
+    })
+    summary['Satır/s'] = rows / summary['Süre (s)'].clip(lower=1e-12)
+    print(f"\n{rows:,} satır skorlandı -> '{output_path}'")
+    print("\n--- Aşama Bazında Verim (dönüşüm/tahmin süreleri işçiler üzerinden toplanmıştır) ---")
+    print(summary.to_string(float_format=lambda v: f"{v:,.2f}"))
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Büyük ham CSV dosyalarını sınırlı bellekle toplu skorlar")
+    parser.add_argument('input', help="Ham konut satırları (housing.csv sütunlarıyla)")
+    parser.add_argument('output', help="Tahmin çıktısı (CSV)")
+    parser.add_argument('--model', default='gbr', help="Kullanılacak model (model_<anahtar>.pkl)")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS)
+    parser.add_argument('--workers', type=int, default=None, help="İşçi süreç sayısı (varsayılan: tüm çekirdekler)")
+    parser.add_argument('--max-inflight', type=int, default=None,
+                        help="Aynı anda bellekte tutulan en fazla parça (varsayılan: 2 x işçi)")
+    parser.add_argument('--id-column', default=None, help="Tahminlerin yanına kopyalanacak girdi sütunu")
+    args = parser.parse_args()
+
+    run_batch_scoring(args.input, args.output, model_key=args.model, chunk_rows=args.chunk_rows,
+                      n_workers=args.workers, max_inflight=args.max_inflight, id_column=args.id_column)
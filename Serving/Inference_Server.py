@@ -0,0 +1,434 @@
+import pandas as pd
+import numpy as np
+import asyncio
+import json
+import time
+import joblib
+import os
+import sys
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Kaydedilmiş modellerin sınıfları (ör. FoldEnsembleRegressor, BinnedRegressor) Modelling klasöründedir
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Modelling'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Preprocessing'))
+from Compiled_Transform import CompiledTransform
+from Model_Artifacts import ModelArtifact, model_path, serving_lock
+
+
+MODEL_DIR = '../Modelling/models'
+PREPROCESSING_PATH = '../data/processed_data/compiled_transform.npz'
+# Ön işleme uzamsal özelliklerle çalıştırıldıysa kaydedilen KD-ağacı indeksi (yoksa kullanılmaz)
+SPATIAL_INDEX_PATH = '../data/processed_data/spatial_index.pkl'
+
+# Ham CSV sütun isimleri (ör. 'median_income') proje isimlerine (ör. 'Median_Income') eşlenir
+COLUMN_NAMES = [
+    'Longitude', 'Latitude', 'Housing_Median_Age', 'Total_Rooms',
+    'Total_Bedrooms', 'Population', 'Households', 'Median_Income',
+    'Median_House_Value', 'Ocean_Proximity'
+]
+RAW_TO_COLUMN = {name.lower(): name for name in COLUMN_NAMES}
+
+HTTP_STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+               500: 'Internal Server Error'}
+
+# Bu boyutu aşan istek gövdeleri okunmadan reddedilir (413)
+MAX_BODY_BYTES = 10 * 2 ** 20
+
+
+class PredictionError(Exception):
+    """Doğrulanmış bir istek için model/dönüşüm tarafında oluşan hata (sunucu hatası, 500)."""
+
+
+# MODEL KAYIT DEFTERİ (YÜKLEME VE SICAK YENİDEN YÜKLEME)
+
+class ModelRegistry:
+    """
+    Ön işleme dönüşümünü ve modelleri başlangıçta bir kez yükler.
+    Dosyalar değişirse (değişen dosya kümesinin imzaları iki kontrol boyunca sabit kaldıktan sonra)
+    değişenlerin hepsi birlikte yüklenir ve nesne sözlüğü tek adımda değiştirilir. Kontroller yazıcıların
+    serving_lock kilidi bırakılmışken yapılır; birlikte yazılan dosyalar birlikte yüklenir.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, preprocessing_path=PREPROCESSING_PATH, model_keys=('lr', 'rf', 'gbr'),
+                 spatial_path=SPATIAL_INDEX_PATH):
+        self.model_dir = model_dir
+        self.paths = {'preprocessing': preprocessing_path}
+        if spatial_path and os.path.exists(spatial_path):
+            self.paths['spatial'] = spatial_path
+        # Güncel artefaktı olan modeller meta + memmap yükünden açılır; servis süreçleri ağaç dizilerini paylaşır
+        for key in model_keys:
+            self.paths[key] = model_path(model_dir, key)
+        self.objects = {}
+        self.signatures = {}
+        self.versions = {name: 0 for name in self.paths}
+        self._pending = {}
+
+    @staticmethod
+    def _signature(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load(self, name):
+        path = self.paths[name]
+        if name == 'preprocessing':
+            return CompiledTransform.load(path)
+        if path.endswith('.meta.json'):
+            artifact = ModelArtifact(path)
+            artifact.model  # ilk isteği beklemeden eşle
+            return artifact
+        return joblib.load(path)
+
+    def _load_group(self, names):
+        """Verilen dosyaları yükler ve nesneleri, imzaları ve sürümleri tek adımda değiştirir."""
+        signatures = {name: self._signature(self.paths[name]) for name in names}
+        loaded = {name: self._load(name) for name in names}
+        self.objects = {**self.objects, **loaded}
+        self.signatures = {**self.signatures, **signatures}
+        self.versions = {**self.versions, **{name: self.versions[name] + 1 for name in names}}
+
+    def load_all(self):
+        with serving_lock(self.model_dir, shared=True):
+            self._load_group(list(self.paths))
+
+    def reload_changed(self):
+        """Değişmiş ve yazımı tamamlanmış dosyaları birlikte yeniden yükler; yüklenenlerin isimlerini döndürür."""
+        with serving_lock(self.model_dir, shared=True, blocking=False) as acquired:
+            if not acquired:
+                return []  # Bir yazıcı dosyaları değiştiriyor; sonraki kontrolde denenir
+            changed = {}
+            for name, path in self.paths.items():
+                try:
+                    signature = self._signature(path)
+                except FileNotFoundError:
+                    continue
+                if signature != self.signatures.get(name):
+                    changed[name] = signature
+            # Kilit kullanmayan yazıcılar için: değişen kümenin imzaları bir kontrol boyunca sabit kalmalı
+            if changed != self._pending:
+                self._pending = changed
+                return []
+            self._pending = {}
+            if changed:
+                self._load_group(list(changed))
+            return list(changed)
+
+    @property
+    def model_keys(self):
+        return [name for name in self.paths if name not in ('preprocessing', 'spatial')]
+
+    def transform(self, df, objects=None):
+        """
+        Ham satırlara derlenmiş (dizi tabanlı) dönüşümü ve özellik seçimini uygular.
+        Uzamsal indeks yüklüyse Train komşularından hesaplanan özellikler sona eklenir.
+        """
+        objects = self.objects if objects is None else objects
+        X = objects['preprocessing'].transform_frame(df)
+        if 'spatial' in objects:
+            X = pd.concat([X, objects['spatial'].transform_frame(df)], axis=1)
+        return X
+
+    def predict(self, key, df):
+        objects = self.objects  # dönüşüm ve model aynı yükleme grubundan alınır
+        try:
+            return np.asarray(objects[key].predict(self.transform(df, objects)), dtype=np.float64)
+        except Exception as e:
+            # İstek kuyruğa girmeden doğrulandığı için buradaki hatalar sunucu tarafındadır
+            raise PredictionError(f"{type(e).__name__}: {e}") from e
+
+
+def coerce_request(df, cat_column):
+    """
+    İstek satırlarını kuyruğa girmeden önce doğrular: sayısal sütunlar float64'e çevrilir (boş değerler NaN
+    olur ve medyanla doldurulur), kategorik sütun metne çevrilir. Çevrilemeyen değer ValueError (400) üretir.
+    """
+    df = df.copy()
+    for column in df.columns:
+        if column not in COLUMN_NAMES:
+            continue
+        if column == cat_column:
+            # Bilinmeyen kategoriler (ve boş değer) sıfır one-hot satırına düşer
+            df[column] = [None if v is None else str(v) for v in df[column]]
+            continue
+        try:
+            df[column] = pd.to_numeric(df[column], errors='raise').astype(np.float64)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"'{column}' sütunu sayısal olmalı: {e}") from None
+    return df
+
+
+# ÇIKARIM SERVİSİ (MİKRO-GRUPLAMA VE İSTATİSTİKLER)
+
+class InferenceService:
+    """
+    Eşzamanlı istekleri kısa bir pencere içinde (max_wait_ms) toplayıp model başına
+    tek bir vektörize predict çağrısına dönüştüren asyncio HTTP/JSON servisi.
+    """
+
+    def __init__(self, registry, default_model='gbr', max_batch_rows=1024, max_wait_ms=5.0,
+                 reload_interval=2.0, stats_window=60.0, max_body_bytes=MAX_BODY_BYTES):
+        self.registry = registry
+        self.max_body_bytes = max_body_bytes
+        self.default_model = default_model
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000
+        self.reload_interval = reload_interval
+        self.stats_window = stats_window
+
+        # predict ve yeniden yükleme aynı tek iş parçacığında sırayla çalışır
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.queue = None
+        self._tasks = []
+
+        self.start_time = time.time()
+        self.latencies = deque(maxlen=10_000)
+        self.recent = deque()
+        self.counters = {'requests': 0, 'rows': 0, 'batches': 0, 'errors': 0, 'reloads': 0}
+
+    async def start(self, host='127.0.0.1', port=8000):
+        self.queue = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self.executor, self.registry.load_all)
+        self._tasks = [asyncio.create_task(self._batch_loop()), asyncio.create_task(self._reload_loop())]
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    # MİKRO-GRUPLAMA
+
+    async def _collect_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        n_rows = len(batch[0][1])
+        deadline = loop.time() + self.max_wait
+        while n_rows < self.max_batch_rows:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            n_rows += len(item[1])
+        return batch
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+
+            groups = {}
+            for key, df, future in batch:
+                groups.setdefault(key, []).append((df, future))
+
+            for key, items in groups.items():
+                frames = [df for df, _ in items]
+                combined = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+                try:
+                    predictions = await loop.run_in_executor(self.executor, self.registry.predict, key, combined)
+                except Exception as e:
+                    if len(items) == 1:
+                        _, future = items[0]
+                        if not future.done():
+                            future.set_exception(e)
+                    else:
+                        # Hatalı istek grubun geri kalanını düşürmesin: istekler tek tek yeniden denenir
+                        await self._predict_each(key, items)
+                    continue
+
+                self.counters['batches'] += 1
+                offsets = np.cumsum([0] + [len(df) for df in frames])
+                for (_, future), a, b in zip(items, offsets[:-1], offsets[1:]):
+                    if not future.done():
+                        future.set_result(predictions[a:b].tolist())
+
+    async def _predict_each(self, key, items):
+        loop = asyncio.get_running_loop()
+        for df, future in items:
+            try:
+                predictions = await loop.run_in_executor(self.executor, self.registry.predict, key, df)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            self.counters['batches'] += 1
+            if not future.done():
+                future.set_result(predictions.tolist())
+
+    async def _reload_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                reloaded = await loop.run_in_executor(self.executor, self.registry.reload_changed)
+            except Exception as e:
+                print(f"HATA: Model yeniden yüklenemedi: {e}")
+                continue
+            if reloaded:
+                self.counters['reloads'] += len(reloaded)
+                print(f"[INFO] Yeniden yüklendi: {reloaded} | Sürümler: {self.registry.versions}")
+
+    # İSTEK İŞLEME
+
+    async def predict(self, payload):
+        if isinstance(payload, dict) and 'rows' in payload:
+            rows, model_key = payload['rows'], payload.get('model', self.default_model)
+        else:
+            rows, model_key = payload, self.default_model
+        if isinstance(rows, dict):
+            rows = [rows]
+
+        if model_key not in self.registry.model_keys:
+            raise ValueError(f"Bilinmeyen model: {model_key}")
+        df = pd.DataFrame(rows).rename(columns=RAW_TO_COLUMN)
+        transform = self.registry.objects['preprocessing']
+        missing = [c for c in transform.input_columns if c not in df.columns]
+        if missing or len(df) == 0:
+            raise ValueError(f"Eksik sütunlar veya boş istek: {missing}")
+        df = coerce_request(df, transform.cat_column)
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((model_key, df, future))
+        predictions = await future
+        return {'predictions': predictions, 'model': model_key, 'version': self.registry.versions[model_key]}
+
+    def stats(self):
+        now = time.time()
+        while self.recent and self.recent[0][0] < now - self.stats_window:
+            self.recent.popleft()
+        window = min(self.stats_window, max(now - self.start_time, 1e-9))
+        latencies_ms = np.array(self.latencies) * 1000 if self.latencies else np.array([np.nan])
+
+        return {
+            'uptime_s': now - self.start_time,
+            'counters': self.counters,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies_ms, 50)),
+                'p99': float(np.percentile(latencies_ms, 99)),
+                'mean': float(np.mean(latencies_ms))
+            },
+            'throughput': {
+                'requests_per_s': len(self.recent) / window,
+                'rows_per_s': sum(n for _, n in self.recent) / window
+            },
+            'mean_batch_rows': self.counters['rows'] / max(self.counters['batches'], 1),
+            'versions': self.registry.versions
+        }
+
+    async def _route(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/stats':
+            return 200, self.stats()
+        if method == 'POST' and path == '/predict':
+            start_time = time.perf_counter()
+            try:
+                result = await self.predict(json.loads(body or b'null'))
+            except PredictionError as e:
+                self.counters['errors'] += 1
+                return 500, {'error': str(e)}
+            except (ValueError, KeyError, TypeError) as e:
+                self.counters['errors'] += 1
+                return 400, {'error': str(e)}
+            except Exception as e:
+                self.counters['errors'] += 1
+                return 500, {'error': str(e)}
+
+            n_rows = len(result['predictions'])
+            self.latencies.append(time.perf_counter() - start_time)
+            self.recent.append((time.time(), n_rows))
+            self.counters['requests'] += 1
+            self.counters['rows'] += n_rows
+            return 200, result
+        return 404, {'error': f'{method} {path} bulunamadı'}
+
+    async def _handle_connection(self, reader, writer):
+        """Minimal HTTP/1.1 (keep-alive destekli) istek ayrıştırıcı."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length', 0))
+                except ValueError:
+                    length = -1
+                if not 0 <= length <= self.max_body_bytes:
+                    # Gövde okunmadığı için bağlantı yanıttan sonra kapatılır
+                    self.counters['errors'] += 1
+                    status = 413 if length > self.max_body_bytes else 400
+                    await self._respond(writer, status, {'error': f"Geçersiz veya çok büyük Content-Length "
+                                                                  f"(en fazla {self.max_body_bytes} bayt)"}, False)
+                    break
+                body = await reader.readexactly(length)
+
+                status, payload = await self._route(method, path.split('?', 1)[0], body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {HTTP_STATUS[status]}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+
+async def serve(host, port, **kwargs):
+    registry = ModelRegistry(model_keys=kwargs.pop('model_keys'))
+    service = InferenceService(registry, **kwargs)
+    server = await service.start(host, port)
+    print(f"[INFO] Çıkarım servisi http://{host}:{port} adresinde çalışıyor (POST /predict, GET /stats).")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kaydedilmiş modeller için mikro-gruplamalı HTTP/JSON çıkarım servisi")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--models', nargs='+', default=['lr', 'rf', 'gbr'])
+    parser.add_argument('--default-model', default='gbr')
+    parser.add_argument('--max-batch-rows', type=int, default=1024)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0)
+    parser.add_argument('--reload-interval', type=float, default=2.0)
+    parser.add_argument('--max-body-mb', type=float, default=MAX_BODY_BYTES / 2 ** 20,
+                        help="Bu boyutu aşan istek gövdeleri 413 ile reddedilir")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, model_keys=args.models, default_model=args.default_model,
+                          max_batch_rows=args.max_batch_rows, max_wait_ms=args.max_wait_ms,
+                          reload_interval=args.reload_interval, max_body_bytes=int(args.max_body_mb * 2 ** 20)))
+    except FileNotFoundError as e:
+        print(f"HATA: Model veya ön işleme dosyası bulunamadı. Önce eğitim betiklerini çalıştırın. Hata: {e}")
+    except KeyboardInterrupt:
+        pass
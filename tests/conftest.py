@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Betikler klasörlerini sys.path üzerinden birbirine bağlar; testler de aynı klasörleri ekler
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ('Preprocessing', 'Modelling', 'Serving', 'Pipeline'):
+    path = os.path.join(ROOT, folder)
+    if path not in sys.path:
+        sys.path.append(path)
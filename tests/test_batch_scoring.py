@@ -0,0 +1,81 @@
+import errno
+import os
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from Compiled_Transform import CompiledTransform
+from Batch_Scoring import run_batch_scoring
+
+
+NUM_COLUMNS = ['Median_Income', 'Housing_Median_Age']
+CATEGORIES = ['INLAND', 'NEAR BAY']
+
+
+@pytest.fixture
+def scoring_files(tmp_path):
+    model_dir = str(tmp_path / 'models')
+    os.makedirs(model_dir)
+    feature_names = NUM_COLUMNS + [f'Ocean_Proximity_{c}' for c in CATEGORIES]
+    transform = CompiledTransform.from_stats(NUM_COLUMNS, [3.0, 20.0], [3.0, 20.0], [1.0, 10.0],
+                                             'Ocean_Proximity', CATEGORIES, feature_names, feature_names)
+    transform_path = str(tmp_path / 'compiled_transform.npz')
+    transform.save(transform_path)
+
+    rng = np.random.default_rng(0)
+    n = 500
+    rows = pd.DataFrame({'row_id': np.arange(n), 'Median_Income': rng.gamma(4.0, 1.0, n),
+                         'Housing_Median_Age': rng.integers(1, 53, n),
+                         'Ocean_Proximity': rng.choice(CATEGORIES, n)})
+    input_path = str(tmp_path / 'input.csv')
+    rows.to_csv(input_path, index=False)
+
+    X = transform.transform_frame(rows)
+    model = LinearRegression().fit(X, 2 * rows['Median_Income'] + (rows['Ocean_Proximity'] == 'INLAND'))
+    joblib.dump(model, os.path.join(model_dir, 'model_lr.pkl'))
+    return tmp_path, model_dir, transform_path, input_path, model.predict(X)
+
+
+def score(tmp_path, model_dir, transform_path, input_path, **kwargs):
+    return run_batch_scoring(input_path, str(tmp_path / 'scores.csv'), model_key='lr', model_dir=model_dir,
+                             transform_path=transform_path, spatial_path=None, chunk_rows=37, n_workers=2,
+                             id_column='row_id', **kwargs)
+
+
+def test_predictions_are_written_in_input_order(scoring_files):
+    tmp_path, model_dir, transform_path, input_path, expected = scoring_files
+    score(tmp_path, model_dir, transform_path, input_path)
+
+    out = pd.read_csv(tmp_path / 'scores.csv')
+    np.testing.assert_array_equal(out['row_id'], np.arange(len(expected)))
+    np.testing.assert_allclose(out['prediction'], expected, rtol=1e-10)
+
+
+def test_writer_failure_stops_reader_and_is_reraised(scoring_files, monkeypatch):
+    tmp_path, model_dir, transform_path, input_path, _ = scoring_files
+
+    def disk_full(*args, **kwargs):
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    # Yazıcı ilk parçada ölür; kuyruk tek yerlik olduğundan eski kodda okuyucu put'ta sonsuza dek beklerdi
+    monkeypatch.setattr(pd.DataFrame, 'to_csv', disk_full)
+    result = {}
+
+    def target():
+        try:
+            score(tmp_path, model_dir, transform_path, input_path, max_inflight=1)
+        except BaseException as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+
+    assert not thread.is_alive()
+    assert isinstance(result.get('error'), OSError) and result['error'].errno == errno.ENOSPC
+    # Ne çıktı ne de yarım geçici dosya kalır
+    assert not any(name.startswith('scores.csv') for name in os.listdir(tmp_path))
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from Compiled_Transform import CompiledTransform
+from Data_Processing import COLUMN_NAMES, TARGET_COLUMN, CATEGORICAL_FEATURES
+
+CATEGORIES = ['<1H OCEAN', 'INLAND', 'ISLAND', 'NEAR BAY', 'NEAR OCEAN']
+NUMERICAL = [c for c in COLUMN_NAMES if c != TARGET_COLUMN and c not in CATEGORICAL_FEATURES]
+
+
+def make_rows(rng, n, categories=CATEGORIES, nan_rate=0.1):
+    X = pd.DataFrame({c: rng.normal(100, 30, n) for c in NUMERICAL})
+    X = X.mask(rng.random(X.shape) < nan_rate)
+    X['Ocean_Proximity'] = rng.choice(categories, n)
+    return X
+
+
+def fit_preprocessing(X, selected_features):
+    """Data_Processing.py ile aynı ColumnTransformer ve kaydedilen sözlük."""
+    preprocessor = ColumnTransformer([
+        ('num', Pipeline([('imputer', SimpleImputer(strategy="median")), ('scaler', StandardScaler())]), NUMERICAL),
+        ('cat', Pipeline([('encoder', OneHotEncoder(handle_unknown='ignore', sparse_output=False))]),
+         CATEGORICAL_FEATURES)
+    ], remainder='passthrough').fit(X)
+    return {
+        'preprocessor': preprocessor,
+        'input_columns': X.columns.tolist(),
+        'feature_names': preprocessor.get_feature_names_out().tolist(),
+        'selected_features': selected_features
+    }
+
+
+def sklearn_transform(preprocessing, rows):
+    out = pd.DataFrame(preprocessing['preprocessor'].transform(rows), columns=preprocessing['feature_names'])
+    return out[preprocessing['selected_features']].to_numpy()
+
+
+def test_matches_column_transformer_with_selection_mask(tmp_path):
+    rng = np.random.default_rng(0)
+    # Seçim sırası çıktı sırasından farklı; bir sayısal ve bir one-hot sütunu seçimde çıkarılmış
+    selected = ['cat__Ocean_Proximity_INLAND', 'num__Median_Income', 'num__Longitude', 'num__Total_Rooms',
+                'cat__Ocean_Proximity_NEAR BAY', 'num__Latitude', 'cat__Ocean_Proximity_<1H OCEAN',
+                'num__Housing_Median_Age', 'num__Households', 'cat__Ocean_Proximity_ISLAND', 'num__Population']
+    preprocessing = fit_preprocessing(make_rows(rng, 500), selected)
+    compiled = CompiledTransform.from_preprocessing(preprocessing)
+
+    rows = make_rows(rng, 200, categories=CATEGORIES + ['UNSEEN'], nan_rate=0.2)
+    rows.iloc[0, :len(NUMERICAL)] = np.nan
+    expected = sklearn_transform(preprocessing, rows)
+    np.testing.assert_allclose(compiled.transform(rows), expected, rtol=1e-12, atol=1e-12)
+    assert list(compiled.transform_frame(rows).columns) == selected
+
+    # Bilinmeyen kategori tüm one-hot sütunlarında sıfır olur
+    unseen = (rows['Ocean_Proximity'] == 'UNSEEN').to_numpy()
+    onehot = [j for j, name in enumerate(selected) if name.startswith('cat__')]
+    assert unseen.any()
+    assert not compiled.transform(rows)[np.ix_(unseen, onehot)].any()
+
+    path = str(tmp_path / 'compiled_transform.npz')
+    compiled.save(path)
+    np.testing.assert_array_equal(CompiledTransform.load(path).transform(rows), compiled.transform(rows))
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
+from CV_Engine import FoldEnsembleRegressor
+from Compiled_Trees import CompiledForest
+
+
+def make_data(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 4)), columns=['a', 'b', 'c', 'd'])
+    y = X['a'] ** 2 - X['b'] + X['c'] * X['d'] + rng.normal(0, 0.1, n)
+    return X, y
+
+
+@pytest.mark.parametrize('model', [
+    RandomForestRegressor(n_estimators=10, max_depth=8, random_state=0),
+    GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0),
+])
+@pytest.mark.parametrize('float32_thresholds', [False, True])
+def test_predictions_match_sklearn(model, float32_thresholds):
+    X, y = make_data()
+    model.fit(X, y)
+    compiled = CompiledForest.from_model(model, float32_thresholds=float32_thresholds)
+
+    X_new, _ = make_data(seed=1)
+    np.testing.assert_allclose(compiled.predict(X_new), model.predict(X_new), rtol=1e-10, atol=1e-10)
+    # Eşiğe tam eşit değerler de sklearn ile aynı dala gitmeli
+    root = model.estimators_.ravel()[0].tree_
+    thresholds = X_new.copy()
+    thresholds[X.columns[root.feature[0]]] = root.threshold[0]
+    np.testing.assert_allclose(compiled.predict(thresholds), model.predict(thresholds), rtol=1e-10, atol=1e-10)
+
+
+def test_fold_ensemble_and_save_load_round_trip(tmp_path):
+    X, y = make_data()
+    ensemble = FoldEnsembleRegressor([
+        RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y),
+        GradientBoostingRegressor(n_estimators=20, random_state=0).fit(X, y),
+    ])
+    compiled = CompiledForest.from_model(ensemble)
+    np.testing.assert_allclose(compiled.predict(X), ensemble.predict(X), rtol=1e-10, atol=1e-10)
+
+    path = str(tmp_path / 'compiled.npz')
+    compiled.save(path)
+    loaded = CompiledForest.load(path)
+    np.testing.assert_array_equal(loaded.predict(X), compiled.predict(X))
+    assert loaded.feature_names == ['a', 'b', 'c', 'd']
@@ -0,0 +1,30 @@
+import numpy as np
+from sklearn.base import clone
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import cross_val_score
+
+from CV_Engine import get_folds, cross_validate_model, FoldEnsembleRegressor
+
+
+def make_data(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 3))
+    return X, X @ np.array([1.0, -2.0, 0.5]) + rng.normal(0, 0.1, n)
+
+
+def test_fit_reproduces_cross_validation_models():
+    X, y = make_data()
+    folds = get_folds(len(y), n_splits=5)
+    cv_results = cross_validate_model(LinearRegression(), X, y, folds, keep_models=True)
+    ensemble = FoldEnsembleRegressor(cv_results['models'])
+
+    refit = clone(ensemble).fit(X, y)
+    assert isinstance(refit, FoldEnsembleRegressor)
+    np.testing.assert_allclose(refit.predict(X), ensemble.predict(X))
+
+
+def test_works_with_sklearn_meta_tools():
+    X, y = make_data()
+    ensemble = FoldEnsembleRegressor([LinearRegression() for _ in range(3)])
+    scores = cross_val_score(ensemble, X, y, cv=4)
+    assert scores.shape == (4,) and np.all(scores > 0.9)
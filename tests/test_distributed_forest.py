@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from Split_Store import write_splits
+from Distributed_Forest import fit_distributed
+
+FOREST_PARAMS = {'max_depth': 6, 'min_samples_leaf': 2}
+
+
+def make_store(path, n=240, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 4)), columns=['a', 'b', 'c', 'd'])
+    y = pd.Series(2 * X['a'] - X['b'] * X['c'] + rng.normal(0, 0.1, n), name='Median_House_Value')
+    parts = [slice(0, 160), slice(160, 200), slice(200, n)]
+    write_splits(str(path), *(X.iloc[p] for p in parts), *(y.iloc[p] for p in parts))
+    return X.iloc[parts[0]], y.iloc[parts[0]], X.iloc[parts[1]]
+
+
+def test_merged_forest_matches_single_node_fit_after_worker_crashes(tmp_path):
+    X_train, y_train, X_val = make_store(tmp_path)
+    n_workers, n_shards = 2, 4
+
+    # İlk denemede en az bir parçanın işçisi kesin çöksün; yeniden denemeler için bütçe geniş
+    first_draws = [np.random.default_rng([shard_id, 0]).random() for shard_id in range(n_shards)]
+    failure_rate = min(first_draws) + 1e-9
+
+    forest, info = fit_distributed(str(tmp_path), n_workers=n_workers, n_estimators=8, random_state=7,
+                                   forest_params=FOREST_PARAMS, shards_per_worker=n_shards // n_workers,
+                                   max_retries=20, failure_rate=failure_rate, n_jobs=1)
+    assert info['retries'] > 0 and info['n_trees'] == 8
+
+    reference = RandomForestRegressor(n_estimators=8, random_state=7, n_jobs=1, **FOREST_PARAMS).fit(X_train, y_train)
+    np.testing.assert_array_equal(forest.predict(X_val), reference.predict(X_val))
+    np.testing.assert_array_equal(forest.feature_importances_, reference.feature_importances_)
+    np.testing.assert_allclose(list(info['feature_importances'].values()), reference.feature_importances_,
+                               rtol=1e-12)
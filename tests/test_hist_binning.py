@@ -0,0 +1,22 @@
+import numpy as np
+from sklearn.metrics import mean_squared_error
+
+from Hist_Binning import compute_bin_edges, apply_bins, fit_with_early_stopping
+
+
+def test_early_stopping_returns_model_at_best_iteration():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1200, 4))
+    y = X[:, 0] * 3 + np.sin(X[:, 1] * 2) + rng.normal(0, 1.0, len(X))
+    edges = compute_bin_edges(X[:800])
+    X_train, X_val = apply_bins(X[:800], edges), apply_bins(X[800:], edges)
+
+    model, n_iter, best_iteration, history = fit_with_early_stopping(
+        X_train, y[:800], X_val, y[800:], max_iter=400, step=10, patience=3, learning_rate=0.3, random_state=0
+    )
+
+    assert best_iteration < n_iter
+    assert model.n_iter_ == best_iteration
+    # Kesilen model, büyütme sırasında en iyi adımda ölçülen Validation MSE değerini verir
+    best_loss = dict(history)[best_iteration]
+    assert np.isclose(mean_squared_error(y[800:], model.predict(X_val)), best_loss, rtol=1e-10)
@@ -0,0 +1,90 @@
+import json
+import os
+import zlib
+from concurrent.futures import Future
+
+import Hyperparameter_Search as hs
+
+
+BUDGET = {'n_rows': 300, 'n_estimators': 10, 'cv': 3}
+PARAMS = {'max_depth': 12, 'max_features': 0.5, 'min_samples_leaf': 3}
+
+
+def test_trial_key_changes_with_fixed_params(monkeypatch):
+    key = hs.trial_key('rf', PARAMS, BUDGET)
+    assert hs.trial_key('rf', PARAMS, BUDGET) == key
+
+    fixed = {**hs.SEARCH_SPACES['rf']['fixed'], 'random_state': 7}
+    monkeypatch.setitem(hs.SEARCH_SPACES['rf'], 'fixed', fixed)
+    assert hs.trial_key('rf', PARAMS, BUDGET) != key
+
+
+def test_trial_key_changes_with_estimator_and_sklearn_version(monkeypatch):
+    key = hs.trial_key('rf', PARAMS, BUDGET)
+
+    monkeypatch.setitem(hs.ESTIMATORS, 'rf', hs.GradientBoostingRegressor)
+    assert hs.trial_key('rf', PARAMS, BUDGET) != key
+    monkeypatch.undo()
+
+    monkeypatch.setattr(hs.sklearn, '__version__', '0.0.0')
+    assert hs.trial_key('rf', PARAMS, BUDGET) != key
+
+
+# SUCCESSIVE HALVING VE ÖNBELLEKTEN DEVAM
+
+class InlineExecutor:
+    """Denemeleri aynı süreçte çalıştırıp tamamlanmış Future döndüren küçük havuz."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def fake_trial(calls):
+    def run(model_key, params, budget):
+        calls.append((json.dumps(params, sort_keys=True), budget['n_rows']))
+        # Skor parametre ve bütçeye bağlı, deterministik; sıralama kademeden kademeye değişir
+        score = zlib.crc32(json.dumps([params, budget], sort_keys=True).encode('utf-8')) / 2 ** 32
+        return {'model': model_key, 'params': params, 'budget': budget, 'mean_score': score}
+    return run
+
+
+def search(tmp_path):
+    return hs.successive_halving('rf', InlineExecutor(), 'f' * 64, 900, eta=3, min_fraction=1 / 9, cv=3,
+                                 cache_dir=str(tmp_path / 'search_cache'))
+
+
+def test_top_third_survives_and_budget_grows(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(hs, '_run_trial', fake_trial(calls))
+    best, history = search(tmp_path)
+
+    rungs = [[t for t in history if t['rung'] == r] for r in range(3)]
+    assert [len(r) for r in rungs] == [27, 9, 3]
+    assert len(history) == len(calls) == 39
+    assert [(r[0]['budget']['n_rows'], r[0]['budget']['n_estimators']) for r in rungs] == [(100, 11), (300, 33),
+                                                                                           (900, 100)]
+    for lower, upper in zip(rungs, rungs[1:]):
+        top = sorted(lower, key=lambda t: t['mean_score'], reverse=True)[:len(upper)]
+        assert sorted(json.dumps(t['params'], sort_keys=True) for t in top) == \
+            sorted(json.dumps(t['params'], sort_keys=True) for t in upper)
+    winner = max(rungs[2], key=lambda t: t['mean_score'])
+    assert (best['params'], best['mean_score']) == (winner['params'], winner['mean_score'])
+
+
+def test_second_run_resumes_from_cache_without_fits(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(hs, '_run_trial', fake_trial(calls))
+    best, history = search(tmp_path)
+    n_first = len(calls)
+
+    best_again, history_again = search(tmp_path)
+    assert len(calls) == n_first
+    assert best_again == best
+    assert [(t['params'], t['rung']) for t in history_again] == [(t['params'], t['rung']) for t in history]
+
+
+def test_cache_dir_is_anchored_to_module():
+    module_dir = os.path.dirname(os.path.abspath(hs.__file__))
+    assert hs.CACHE_DIR == os.path.join(module_dir, 'models', 'search_cache')
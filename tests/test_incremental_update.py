@@ -0,0 +1,151 @@
+import os
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
+from Compiled_Transform import CompiledTransform, COMPILED_TRANSFORM_FILE
+from Streaming_Processing import RunningMoments, QuantileSketch, NUMERICAL_FEATURES
+from Data_Processing import COLUMN_NAMES, TARGET_COLUMN, save_preprocessing_meta
+from Split_Store import write_splits
+from Model_Artifacts import save_artifact, load_model
+from Incremental_Update import LinearSufficientStats, update_state, evaluate, run_incremental_update
+
+
+CATEGORIES = ['<1H OCEAN', 'INLAND', 'NEAR BAY', 'NEAR OCEAN']
+
+
+def make_raw(rng, n, shift=0.0):
+    """housing.csv sütunlarıyla sentetik satırlar; Housing_Median_Age tamsayı değerlidir."""
+    income = rng.gamma(4.0, 1.0, n) + shift
+    df = pd.DataFrame({
+        'Longitude': rng.uniform(-124, -114, n),
+        'Latitude': rng.uniform(32, 42, n),
+        'Housing_Median_Age': rng.integers(1, 53, n).astype(np.float64),
+        'Total_Rooms': rng.integers(100, 6000, n).astype(np.float64),
+        'Total_Bedrooms': rng.integers(20, 1200, n).astype(np.float64),
+        'Population': rng.integers(50, 4000, n).astype(np.float64),
+        'Households': rng.integers(20, 1100, n).astype(np.float64),
+        'Median_Income': income,
+        'Median_House_Value': 40_000 * income + rng.normal(0, 20_000, n),
+        'Ocean_Proximity': rng.choice(CATEGORIES, n)
+    })
+    return df[COLUMN_NAMES]
+
+
+FEATURE_NAMES = NUMERICAL_FEATURES + [f'Ocean_Proximity_{c}' for c in CATEGORIES]
+
+
+def fit_transform_stats(raw):
+    num = raw[NUMERICAL_FEATURES].to_numpy(dtype=np.float64)
+    medians, means, scales = np.median(num, axis=0), num.mean(axis=0), num.std(axis=0)
+    return CompiledTransform.from_stats(NUMERICAL_FEATURES, medians, means, scales, 'Ocean_Proximity',
+                                        CATEGORIES, FEATURE_NAMES, FEATURE_NAMES)
+
+
+def make_state(raw, tmp_path, upper_bound=np.inf):
+    num = raw[NUMERICAL_FEATURES].to_numpy(dtype=np.float64)
+    feature_names = FEATURE_NAMES
+    transform = fit_transform_stats(raw)
+
+    X = transform.transform_frame(raw)
+    y = raw[TARGET_COLUMN].to_numpy()
+    forest = RandomForestRegressor(n_estimators=10, min_samples_leaf=2, random_state=0).fit(X, y)
+    rf_path = str(tmp_path / 'model_rf.pkl')
+    joblib.dump(forest, rf_path)
+
+    state = {
+        'version': 0,
+        'ref_transform': transform,
+        'transform': transform,
+        'moments': RunningMoments(len(transform.num_columns)),
+        'sketches': [QuantileSketch(256) for _ in transform.num_columns],
+        'upper_bound': upper_bound,
+        'lr_stats': LinearSufficientStats(len(feature_names)),
+        'rf_path': rf_path,
+        'n_raw_rows': len(raw),
+        'n_kept_rows': len(raw)
+    }
+    state['moments'].update(num)
+    for j, sketch in enumerate(state['sketches']):
+        sketch.update(num[:, j])
+    state['lr_stats'].update(X.to_numpy(), y)
+    return state, forest
+
+
+def test_zero_new_trees_keeps_forest_predictions(tmp_path):
+    rng = np.random.default_rng(0)
+    state, forest = make_state(make_raw(rng, 4000), tmp_path)
+    val_raw = make_raw(rng, 3050)
+    X_val = state['ref_transform'].transform_frame(val_raw)
+    y_val = val_raw[TARGET_COLUMN].to_numpy()
+    before = forest.predict(X_val)
+
+    # Ölçek istatistiklerini belirgin biçimde kaydıran bir parti
+    _, model_rf, _ = update_state(state, make_raw(rng, 3000, shift=2.0), n_new_trees=0, n_jobs=1)
+    assert not np.allclose(state['transform'].num_means, state['ref_transform'].num_means)
+
+    np.testing.assert_array_equal(model_rf.predict(X_val), before)
+    assert evaluate(model_rf, state, X_val, y_val, reference=True)['R2'] == \
+        evaluate(forest, state, X_val, y_val, reference=True)['R2']
+
+
+def test_stats_use_all_rows_and_counts_are_separate(tmp_path):
+    rng = np.random.default_rng(1)
+    state, _ = make_state(make_raw(rng, 2000), tmp_path, upper_bound=300_000)
+    batch = make_raw(rng, 500)
+    n_outliers = int(np.sum(batch[TARGET_COLUMN] > 300_000))
+    assert n_outliers > 0
+
+    n_before = state['moments'].n.copy()
+    _, _, n_kept = update_state(state, batch, n_new_trees=0, n_jobs=1)
+    # Ölçek istatistikleri, tam eğitimdeki gibi aykırı değerler çıkarılmadan önceki tüm satırlarla güncellenir
+    np.testing.assert_array_equal(state['moments'].n, n_before + len(batch))
+    assert n_kept == len(batch) - n_outliers
+    assert state['n_raw_rows'] == 2500 and state['n_kept_rows'] == 2000 + n_kept
+
+
+def test_promote_keeps_gbr_and_served_transform_consistent(tmp_path):
+    rng = np.random.default_rng(2)
+    raw = make_raw(rng, 1500)
+    data_path, model_dir = str(tmp_path / 'data'), str(tmp_path / 'models')
+    os.makedirs(data_path)
+    os.makedirs(model_dir)
+    raw_path = str(tmp_path / 'housing.csv')
+    raw.to_csv(raw_path, index=False)
+
+    transform = fit_transform_stats(raw)
+    transform.save(os.path.join(data_path, COMPILED_TRANSFORM_FILE))
+    save_preprocessing_meta(data_path, 'memory', np.inf, [c for c in COLUMN_NAMES if c != TARGET_COLUMN],
+                            FEATURE_NAMES, FEATURE_NAMES)
+    X, y = transform.transform_frame(raw), raw[TARGET_COLUMN].rename(TARGET_COLUMN)
+    parts = [slice(0, 1000), slice(1000, 1250), slice(1250, 1500)]
+    write_splits(data_path, *(X.iloc[p] for p in parts), *(y.iloc[p] for p in parts))
+
+    joblib.dump(RandomForestRegressor(n_estimators=5, random_state=0).fit(X.iloc[parts[0]], y.iloc[parts[0]]),
+                os.path.join(model_dir, 'model_rf.pkl'))
+    gbr = GradientBoostingRegressor(n_estimators=20, random_state=0).fit(X.iloc[parts[0]], y.iloc[parts[0]])
+    joblib.dump(gbr, os.path.join(model_dir, 'model_gbr.pkl'))
+    save_artifact(gbr, model_dir, 'gbr')
+
+    def serve(key, rows):
+        served = CompiledTransform.load(os.path.join(data_path, COMPILED_TRANSFORM_FILE))
+        return load_model(model_dir, key).predict(served.transform_frame(rows))
+
+    rows = make_raw(rng, 200)
+    gbr_before = serve('gbr', rows)
+
+    batch_path = str(tmp_path / 'batch.csv')
+    make_raw(rng, 800, shift=2.0).to_csv(batch_path, index=False)
+    state, _ = run_incremental_update(batch_path, data_path, raw_path, model_dir, n_new_trees=2, promote=True,
+                                      n_jobs=1)
+    assert not np.allclose(state['transform'].num_means, transform.num_means)
+
+    np.testing.assert_array_equal(serve('gbr', rows), gbr_before)
+    # Servis edilen LR referans uzayda, sürümlenmiş LR güncel dönüşümün uzayında aynı tahmini verir
+    versioned_lr = joblib.load(os.path.join(model_dir, 'model_lr_v1.pkl'))
+    np.testing.assert_allclose(serve('lr', rows), versioned_lr.predict(state['transform'].transform_frame(rows)),
+                               rtol=1e-8, atol=1e-6)
+    versioned_rf = joblib.load(os.path.join(model_dir, 'model_rf_v1.pkl'))
+    np.testing.assert_allclose(serve('rf', rows), versioned_rf.predict(transform.transform_frame(rows)), rtol=1e-10)
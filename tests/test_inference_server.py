@@ -0,0 +1,175 @@
+import asyncio
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+
+from Compiled_Transform import CompiledTransform
+from Model_Artifacts import save_artifact, serving_lock
+from Inference_Server import InferenceService, ModelRegistry
+
+
+NUM_COLUMNS = ['Median_Income', 'Housing_Median_Age']
+CATEGORIES = ['INLAND', 'NEAR BAY']
+
+
+class SumModel:
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64).sum(axis=1)
+
+
+class FakeRegistry:
+    """Dosya okumadan ModelRegistry arayüzünü sağlayan küçük kayıt defteri."""
+
+    def __init__(self):
+        feature_names = NUM_COLUMNS + [f'Ocean_Proximity_{c}' for c in CATEGORIES]
+        transform = CompiledTransform.from_stats(NUM_COLUMNS, [3.0, 20.0], [3.0, 20.0], [1.0, 10.0],
+                                                 'Ocean_Proximity', CATEGORIES, feature_names, feature_names)
+        self.objects = {'preprocessing': transform, 'gbr': SumModel()}
+        self.versions = {'preprocessing': 1, 'gbr': 1}
+        self.model_keys = ['gbr']
+
+    def load_all(self):
+        pass
+
+    def predict(self, key, df):
+        X = self.objects['preprocessing'].transform_frame(df)
+        return np.asarray(self.objects[key].predict(X), dtype=np.float64)
+
+
+async def _route_concurrently(bodies, registry=None):
+    service = InferenceService(registry or FakeRegistry(), max_wait_ms=50.0)
+    service.queue = asyncio.Queue()
+    batch_task = asyncio.create_task(service._batch_loop())
+    try:
+        return await asyncio.gather(*(service._route('POST', '/predict', body) for body in bodies))
+    finally:
+        batch_task.cancel()
+        service.executor.shutdown(wait=False)
+
+
+def test_bad_row_does_not_fail_batch_neighbours():
+    good = b'{"median_income": 4.0, "housing_median_age": 30, "ocean_proximity": "INLAND"}'
+    bad = b'{"median_income": "abc", "housing_median_age": 30, "ocean_proximity": "INLAND"}'
+    (good_status, good_payload), (bad_status, bad_payload) = asyncio.run(_route_concurrently([good, bad]))
+
+    assert good_status == 200
+    np.testing.assert_allclose(good_payload['predictions'], [1.0 + 1.0 + 1.0])
+    assert bad_status == 400
+    assert 'Median_Income' in bad_payload['error']
+
+
+def test_numeric_strings_are_coerced():
+    body = b'{"median_income": "4.0", "housing_median_age": null, "ocean_proximity": "ISLAND"}'
+    [(status, payload)] = asyncio.run(_route_concurrently([body]))
+
+    # Boş yaş medyanla (20 -> 0.0) doldurulur, bilinmeyen kategori sıfır satırıdır
+    assert status == 200
+    np.testing.assert_allclose(payload['predictions'], [1.0])
+
+
+# GERÇEK KAYIT DEFTERİ (GEÇİCİ MODELS KLASÖRÜ)
+
+def make_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'Median_Income': rng.gamma(4.0, 1.0, n), 'Housing_Median_Age': rng.integers(1, 53, n),
+                         'Ocean_Proximity': rng.choice(CATEGORIES, n)})
+
+
+def save_model(model, model_dir, key):
+    joblib.dump(model, os.path.join(model_dir, f'model_{key}.pkl'))
+    save_artifact(model, model_dir, key)
+
+
+@pytest.fixture
+def registry_files(tmp_path):
+    model_dir = str(tmp_path / 'models')
+    os.makedirs(model_dir)
+    transform_path = str(tmp_path / 'compiled_transform.npz')
+    FakeRegistry().objects['preprocessing'].save(transform_path)
+
+    transform = CompiledTransform.load(transform_path)
+    rows = make_rows(300)
+    X, y = transform.transform_frame(rows), 2 * rows['Median_Income'] + (rows['Ocean_Proximity'] == 'INLAND')
+    models = {'lr': LinearRegression().fit(X, y), 'gbr': GradientBoostingRegressor(n_estimators=20).fit(X, y)}
+    for key, model in models.items():
+        save_model(model, model_dir, key)
+    return model_dir, transform_path, transform, models, X, y
+
+
+def make_registry(model_dir, transform_path):
+    registry = ModelRegistry(model_dir, transform_path, model_keys=('lr', 'gbr'), spatial_path=None)
+    registry.load_all()
+    return registry
+
+
+def test_real_registry_serves_saved_models(registry_files):
+    model_dir, transform_path, transform, models, _, _ = registry_files
+    registry = make_registry(model_dir, transform_path)
+    rows = make_rows(50, seed=1)
+    for key, model in models.items():
+        np.testing.assert_allclose(registry.predict(key, rows), model.predict(transform.transform_frame(rows)),
+                                   rtol=1e-10)
+
+    body = b'[{"median_income": 4.0, "housing_median_age": 30, "ocean_proximity": "INLAND"}]'
+    [(status, payload)] = asyncio.run(_route_concurrently([body], registry))
+    assert status == 200 and payload['model'] == 'gbr' and len(payload['predictions']) == 1
+
+
+def test_reload_waits_for_writer_lock_and_swaps_group(registry_files):
+    pytest.importorskip('fcntl')
+    model_dir, transform_path, transform, models, X, y = registry_files
+    registry = make_registry(model_dir, transform_path)
+    rows = make_rows(20, seed=2)
+
+    with serving_lock(model_dir):
+        save_model(LinearRegression().fit(X, -y), model_dir, 'lr')
+        save_model(GradientBoostingRegressor(n_estimators=5).fit(X, -y), model_dir, 'gbr')
+        # Yazıcı kilidi tutarken hiçbir dosya yüklenmez
+        assert registry.reload_changed() == []
+    # İlk kontrol değişen kümeyi kaydeder, ikinci kontrol kümeyi birlikte yükler
+    assert registry.reload_changed() == []
+    assert sorted(registry.reload_changed()) == ['gbr', 'lr']
+    assert registry.versions == {'preprocessing': 1, 'lr': 2, 'gbr': 2}
+    assert np.all(registry.predict('lr', rows) < 0)
+
+
+def test_model_failure_is_a_server_error(registry_files):
+    model_dir, transform_path, _, _, _, _ = registry_files
+    registry = make_registry(model_dir, transform_path)
+
+    class BrokenModel:
+        def predict(self, X):
+            raise ValueError("bozuk model")
+
+    registry.objects = {**registry.objects, 'gbr': BrokenModel()}
+    body = b'{"median_income": 4.0, "housing_median_age": 30, "ocean_proximity": "INLAND"}'
+    [(status, payload)] = asyncio.run(_route_concurrently([body], registry))
+    assert status == 500
+    assert 'bozuk model' in payload['error']
+
+
+def test_oversized_body_is_rejected_without_reading_it():
+    async def run():
+        service = InferenceService(FakeRegistry(), max_body_bytes=1024)
+        server = await asyncio.start_server(service._handle_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'POST /predict HTTP/1.1\r\nContent-Length: 1000000000\r\n\r\n')
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.executor.shutdown(wait=False)
+
+    response = asyncio.run(run())
+    assert response.startswith(b'HTTP/1.1 413 ')
+    assert b'Connection: close' in response
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+
+from CV_Engine import get_folds, cross_validate_model
+from Linear_Engine import CenteredGram, LinearFactorization, cross_validate_linear, ridge_path
+
+ALPHAS = [0.0, 0.1, 3.0, 100.0]
+
+
+def make_data(n=40, seed=0):
+    """Sayısal sütunlar + sabit terimle eşdoğrusal bir one-hot bloğu (ön işlenmiş setler gibi)."""
+    rng = np.random.default_rng(seed)
+    numeric = rng.normal(size=(n, 3)) * [1.0, 10.0, 0.1]
+    onehot = np.eye(3)[rng.integers(0, 3, n)]
+    X = np.hstack([numeric, onehot])
+    y = numeric @ [2.0, -0.3, 5.0] + onehot @ [1.0, 0.0, -1.0] + rng.normal(0, 0.5, n)
+    return X, y
+
+
+def make_model(alpha):
+    return LinearRegression() if alpha == 0 else Ridge(alpha=alpha)
+
+
+def factorize(X, y, chunk_rows=7):
+    gram = CenteredGram(X.shape[1])
+    for start in range(0, len(y), chunk_rows):
+        gram.update(X[start:start + chunk_rows], y[start:start + chunk_rows])
+    return LinearFactorization(gram)
+
+
+def test_ridge_path_coefficients_match_sklearn():
+    X, y = make_data()
+    coefs, intercepts = factorize(X, y).coefficients(ALPHAS)
+    for alpha, coef, intercept in zip(ALPHAS, coefs, intercepts):
+        model = make_model(alpha).fit(X, y)
+        np.testing.assert_allclose(coef, model.coef_, rtol=1e-7, atol=1e-9)
+        assert intercept == pytest.approx(model.intercept_, rel=1e-9)
+
+
+def test_closed_form_loo_matches_brute_force_refits():
+    X, y = make_data()
+    factorization = factorize(X, y)
+
+    for alpha in ALPHAS:
+        brute = np.empty(len(y))
+        for i in range(len(y)):
+            keep = np.arange(len(y)) != i
+            brute[i] = y[i] - make_model(alpha).fit(X[keep], y[keep]).predict(X[i:i + 1])[0]
+
+        # Tek satırlık parçalarla her satırın LOO artığının karesi ayrı ayrı elde edilir
+        closed = [factorization.leave_one_out([(X[i:i + 1], y[i:i + 1])], [alpha])['loo_mse'][0]
+                  for i in range(len(y))]
+        np.testing.assert_allclose(closed, brute ** 2, rtol=1e-7, atol=1e-10)
+
+        loo = factorization.leave_one_out([(X, y)], [alpha])
+        assert loo['loo_mse'][0] == pytest.approx(np.mean(brute ** 2), rel=1e-8)
+        assert loo['loo_r2'][0] == pytest.approx(1 - np.sum(brute ** 2) / np.sum((y - y.mean()) ** 2), rel=1e-8)
+
+    path = ridge_path(factorization, X, y, X, y, alphas=ALPHAS, chunk_rows=9)
+    np.testing.assert_allclose(path['loo_mse'], [factorization.leave_one_out([(X, y)], [a])['loo_mse'][0]
+                                                 for a in ALPHAS], rtol=1e-10)
+
+
+def test_cross_validation_matches_sklearn_refits():
+    X, y = make_data(n=60, seed=1)
+    folds = get_folds(len(y), n_splits=5)
+    closed = cross_validate_linear(X, y, folds, chunk_rows=11)
+    refit = cross_validate_model(LinearRegression(), X, y, folds)
+    np.testing.assert_allclose(closed['oof_predictions'], refit['oof_predictions'], rtol=1e-8, atol=1e-8)
+    np.testing.assert_allclose(closed['scores'], refit['scores'], rtol=1e-8)
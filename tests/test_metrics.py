@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error, mean_absolute_percentage_error
+
+from Metrics import calculate_metrics, bootstrap_metrics
+
+
+def make_predictions(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    # Büyük ve sabit bir seviye etrafında değerler (kareler toplamında sayısal kayıp olmamalı)
+    y_true = 200_000 + rng.normal(0, 50_000, n)
+    y_true[0] = 0.0  # MAPE'de sıfır gerçek değer sklearn ile aynı eşikle ele alınır
+    predictions = {
+        'good': y_true + rng.normal(0, 10_000, n),
+        'bad': y_true + rng.normal(0, 40_000, n)
+    }
+    return y_true, predictions
+
+
+def test_metrics_match_sklearn():
+    y_true, predictions = make_predictions()
+    for y_pred in predictions.values():
+        metrics = calculate_metrics(y_true, y_pred)
+        assert metrics['R2'] == pytest.approx(r2_score(y_true, y_pred), rel=1e-10)
+        assert metrics['RMSE'] == pytest.approx(np.sqrt(mean_squared_error(y_true, y_pred)), rel=1e-10)
+        assert metrics['MAE'] == pytest.approx(mean_absolute_error(y_true, y_pred), rel=1e-10)
+        assert metrics['MAPE'] == pytest.approx(mean_absolute_percentage_error(y_true, y_pred), rel=1e-10)
+        assert metrics['Residual_Quantiles'][0.5] == pytest.approx(np.median(y_pred - y_true))
+
+
+def test_bootstrap_is_reproducible_and_matches_explicit_resamples():
+    y_true, predictions = make_predictions()
+    first = bootstrap_metrics(y_true, predictions, n_boot=200, random_state=7)
+    assert first == bootstrap_metrics(y_true, predictions, n_boot=200, random_state=7)
+    assert first != bootstrap_metrics(y_true, predictions, n_boot=200, random_state=8)
+
+    # Aynı tohumla açıkça yeniden örneklenmiş setler üzerinde sklearn metrikleri
+    idx = np.random.default_rng(7).integers(0, len(y_true), size=(200, len(y_true)))
+    for key, y_pred in predictions.items():
+        r2 = [r2_score(y_true[i], y_pred[i]) for i in idx]
+        mae = [mean_absolute_error(y_true[i], y_pred[i]) for i in idx]
+        np.testing.assert_allclose(first[key]['R2'], np.quantile(r2, [0.025, 0.975]), rtol=1e-9)
+        np.testing.assert_allclose(first[key]['MAE'], np.quantile(mae, [0.025, 0.975]), rtol=1e-9)
+
+        point = calculate_metrics(y_true, y_pred)
+        for name in ('R2', 'RMSE', 'MAE', 'MAPE'):
+            low, high = first[key][name]
+            assert low <= point[name] <= high
+
+    assert first['good']['P_Best'] + first['bad']['P_Best'] == pytest.approx(1.0)
+    assert first['good']['P_Best'] > 0.9
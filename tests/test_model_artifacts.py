@@ -0,0 +1,60 @@
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor, HistGradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+
+from Model_Artifacts import ModelArtifact, save_artifact, load_model
+
+
+def make_data(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n, 4)), columns=['a', 'b', 'c', 'd'])
+    y = X['a'] ** 2 - X['b'] + X['c'] * X['d'] + rng.normal(0, 0.1, n)
+    return X, y
+
+
+@pytest.mark.parametrize('model, kind', [
+    (LinearRegression(), 'linear'),
+    (RandomForestRegressor(n_estimators=10, max_depth=8, random_state=0), 'forest'),
+    (GradientBoostingRegressor(n_estimators=30, random_state=0), 'forest'),
+    (HistGradientBoostingRegressor(max_iter=20, random_state=0), 'pickle'),
+])
+@pytest.mark.parametrize('compress', [False, True])
+def test_round_trip_predictions_match(tmp_path, model, kind, compress):
+    X, y = make_data()
+    model.fit(X, y)
+    meta = save_artifact(model, str(tmp_path), 'm', compress=compress)
+    assert meta['kind'] == kind
+
+    artifact = ModelArtifact.load(str(tmp_path), 'm')
+    X_new, _ = make_data(seed=1)
+    np.testing.assert_allclose(artifact.predict(X_new), model.predict(X_new), rtol=1e-10, atol=1e-10)
+    assert list(artifact.feature_names_in_) == ['a', 'b', 'c', 'd']
+
+
+def test_float32_values_stay_close(tmp_path):
+    X, y = make_data()
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    save_artifact(model, str(tmp_path), 'rf', float32_values=True)
+    np.testing.assert_allclose(ModelArtifact.load(str(tmp_path), 'rf').predict(X), model.predict(X), rtol=1e-5)
+
+
+def test_load_model_prefers_fresh_artifact(tmp_path):
+    X, y = make_data()
+    model_dir = str(tmp_path)
+    pickle_path = os.path.join(model_dir, 'model_lr.pkl')
+    joblib.dump(LinearRegression().fit(X, y), pickle_path)
+    save_artifact(joblib.load(pickle_path), model_dir, 'lr')
+    assert isinstance(load_model(model_dir, 'lr'), ModelArtifact)
+
+    # Pickle artefakttan sonra değişirse artefakt bayat sayılır
+    time.sleep(0.01)
+    joblib.dump(LinearRegression().fit(X, -y), pickle_path)
+    reloaded = load_model(model_dir, 'lr')
+    assert isinstance(reloaded, LinearRegression)
+    np.testing.assert_allclose(reloaded.predict(X), LinearRegression().fit(X, -y).predict(X))
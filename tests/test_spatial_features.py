@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from Data_Processing import COLUMN_NAMES
+from Split_Store import write_splits, load_splits
+from Spatial_Features import run_spatial_features, SpatialIndex, FEATURE_NAMES
+
+
+def make_raw(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    raw = pd.DataFrame({name: rng.normal(size=n) for name in COLUMN_NAMES})
+    raw['Longitude'] = rng.uniform(-124, -114, n)
+    raw['Latitude'] = rng.uniform(32, 42, n)
+    raw['Ocean_Proximity'] = 'INLAND'
+    return raw
+
+
+def make_store(path, raw):
+    # Depo satırları ham CSV'den karışık sırada seçilir; bazı ham satırlar (aykırı değerler) depoda yoktur
+    rows = np.random.default_rng(1).permutation(len(raw))[:360]
+    X = pd.DataFrame({'num__a': raw['Total_Rooms'], 'num__b': raw['Population']}).iloc[rows]
+    y = raw['Median_House_Value'].rename('Median_House_Value').iloc[rows]
+    parts = [slice(0, 240), slice(240, 300), slice(300, 360)]
+    write_splits(str(path), *(X.iloc[p] for p in parts), *(y.iloc[p] for p in parts))
+    return X.iloc[parts[0]], y.iloc[parts[0]]
+
+
+def test_chunked_features_match_single_pass(tmp_path):
+    raw = make_raw()
+    # Ham başlık farklı yazılmış olsa da sütunlar isimle (COLUMN_NAMES) seçilir
+    raw_path = str(tmp_path / 'housing.csv')
+    raw.to_csv(raw_path, index=False, header=[c.lower() for c in COLUMN_NAMES])
+
+    chunked, single = tmp_path / 'chunked', tmp_path / 'single'
+    X_train, y_train = make_store(chunked, raw)
+    shutil.copytree(chunked, single)
+
+    run_spatial_features(str(chunked), raw_path, COLUMN_NAMES, k=5, n_jobs=1, chunk_rows=37)
+    run_spatial_features(str(single), raw_path, COLUMN_NAMES, k=5, n_jobs=1, chunk_rows=10_000)
+    # Yeniden çalıştırma uzamsal sütunları çoğaltmaz
+    run_spatial_features(str(single), raw_path, COLUMN_NAMES, k=5, n_jobs=1, chunk_rows=10_000)
+
+    for a, b in zip(load_splits(str(chunked)), load_splits(str(single))):
+        pd.testing.assert_frame_equal(pd.DataFrame(a), pd.DataFrame(b))
+
+    X_tr, X_val, _, y_tr, _, _ = load_splits(str(chunked))
+    assert list(X_tr.columns) == ['num__a', 'num__b'] + FEATURE_NAMES
+    pd.testing.assert_frame_equal(X_tr[['num__a', 'num__b']], X_train)
+
+    # İndeks yalnızca Train koordinatlarıyla kurulur; Validation satırları onu dışlama olmadan sorgular
+    coords = raw.loc[X_train.index]
+    index = SpatialIndex(k=5).fit(coords['Longitude'], coords['Latitude'], y_train)
+    val_coords = raw.loc[X_val.index]
+    np.testing.assert_allclose(X_val[FEATURE_NAMES].to_numpy(),
+                               index.features(val_coords['Longitude'], val_coords['Latitude'], n_jobs=1))
+    assert os.path.exists(os.path.join(str(chunked), 'spatial_index.pkl'))
@@ -0,0 +1,54 @@
+import os
+
+from Stage_Cache import source_closure, ROOT_DIR
+
+
+def _rel(paths):
+    return {os.path.relpath(p, ROOT_DIR) for p in paths}
+
+
+def test_closure_follows_repo_imports_only():
+    closure = _rel(source_closure(os.path.join(ROOT_DIR, 'Comparison', 'Comparison_And_Report.py')))
+
+    # Model_Artifacts.py üzerinden dolaylı importlar ve her aşamanın kullandığı izleme modülü
+    for path in ('Modelling/Model_Artifacts.py', 'Modelling/CV_Engine.py', 'Modelling/Compiled_Trees.py',
+                 'Modelling/Linear_Engine.py', 'Preprocessing/Split_Store.py', 'Preprocessing/Tracing.py'):
+        assert path in closure
+    assert all(p.endswith('.py') for p in closure)
+
+
+def test_closure_includes_deferred_imports(tmp_path):
+    (tmp_path / 'helper.py').write_text('VALUE = 1\n')
+    (tmp_path / 'main.py').write_text('import os\n\ndef run():\n    from helper import VALUE\n    return VALUE\n')
+
+    closure = source_closure(str(tmp_path / 'main.py'))
+    assert sorted(os.path.basename(p) for p in closure) == ['helper.py', 'main.py']
+
+
+def test_restore_removes_optional_output_absent_from_run(tmp_path):
+    from Stage_Cache import StageCache
+
+    cache = StageCache(cache_dir=str(tmp_path / 'cache'))
+    output, optional = tmp_path / 'splits.json', tmp_path / 'spatial_index.pkl'
+    output.write_text('{}')
+
+    manifest = cache.store('preprocessing', 'k1', [str(output)], [str(optional)])
+    assert len(manifest['absent']) == 1
+
+    # Başka bir (uzamsal) çalıştırmadan kalan dosya, uzamsal olmayan girdinin geri yüklenmesinde silinir
+    optional.write_bytes(b'stale')
+    cache.restore(cache.lookup('k1'))
+    assert output.exists() and not optional.exists()
+
+
+def test_optional_output_is_cached_when_present(tmp_path):
+    from Stage_Cache import StageCache
+
+    cache = StageCache(cache_dir=str(tmp_path / 'cache'))
+    optional = tmp_path / 'spatial_index.pkl'
+    optional.write_bytes(b'index')
+
+    cache.store('preprocessing', 'k2', [], [str(optional)])
+    optional.unlink()
+    cache.restore(cache.lookup('k2'))
+    assert optional.read_bytes() == b'index'
@@ -0,0 +1,60 @@
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from Data_Processing import run_preprocessing, COLUMN_NAMES, PREPROCESSING_FILE, PREPROCESSING_META_FILE
+from Streaming_Processing import run_streaming_preprocessing, NUMERICAL_FEATURES
+from Compiled_Transform import CompiledTransform, COMPILED_TRANSFORM_FILE
+
+
+def write_csv(path, n=1000, seed=0):
+    """Sınırlı (aykırı değersiz) hedefli sentetik housing.csv; Total_Bedrooms'ta eksik değerler var."""
+    rng = np.random.default_rng(seed)
+    u = rng.random(n)
+    raw = pd.DataFrame({name: rng.normal(50, 10, n) for name in COLUMN_NAMES})
+    raw['Median_Income'] = 3 * u + rng.normal(0, 0.5, n)
+    raw['Housing_Median_Age'] = rng.integers(1, 53, n).astype(np.float64)
+    raw.loc[rng.random(n) < 0.05, 'Total_Bedrooms'] = np.nan
+    raw['Median_House_Value'] = 100_000 * u
+    raw['Ocean_Proximity'] = rng.choice(['<1H OCEAN', 'INLAND', 'NEAR BAY', 'NEAR OCEAN'], n)
+    raw.to_csv(path, index=False, header=[c.lower() for c in COLUMN_NAMES])
+
+
+def test_streaming_and_in_memory_fit_the_same_preprocessing(tmp_path):
+    csv_path = str(tmp_path / 'housing.csv')
+    write_csv(csv_path)
+    memory_dir, stream_dir = str(tmp_path / 'memory'), str(tmp_path / 'stream')
+    run_preprocessing(csv_path, memory_dir)
+    run_streaming_preprocessing(csv_path, stream_dir, chunksize=97)
+
+    preprocessing = joblib.load(os.path.join(memory_dir, PREPROCESSING_FILE))
+    num_pipeline = preprocessing['preprocessor'].named_transformers_['num']
+    encoder = preprocessing['preprocessor'].named_transformers_['cat'].named_steps['encoder']
+    with open(os.path.join(stream_dir, 'streaming_meta.json'), 'r', encoding='utf-8') as f:
+        streaming = json.load(f)
+
+    # Parça boyutu özet boyutunun altında kaldığı için medyanlar da kesin olmalı
+    np.testing.assert_allclose(streaming['medians'], num_pipeline.named_steps['imputer'].statistics_, rtol=1e-12)
+    np.testing.assert_allclose(streaming['means'], num_pipeline.named_steps['scaler'].mean_, rtol=1e-10)
+    np.testing.assert_allclose(streaming['scales'], num_pipeline.named_steps['scaler'].scale_, rtol=1e-10)
+    assert streaming['categories'] == encoder.categories_[0].tolist()
+
+    metas = []
+    for output_dir in (memory_dir, stream_dir):
+        with open(os.path.join(output_dir, PREPROCESSING_META_FILE), 'r', encoding='utf-8') as f:
+            metas.append(json.load(f))
+    assert metas[0]['feature_names'] == metas[1]['feature_names']
+    assert metas[0]['selected_features'] == metas[1]['selected_features']
+    assert metas[0]['input_columns'] == metas[1]['input_columns']
+
+    # İki modun derlenmiş dönüşümleri aynı satırları aynı özelliklere dönüştürür
+    rows = pd.read_csv(csv_path, nrows=50)
+    rows.columns = COLUMN_NAMES
+    memory_t, stream_t = (CompiledTransform.load(os.path.join(d, COMPILED_TRANSFORM_FILE))
+                          for d in (memory_dir, stream_dir))
+    assert memory_t.num_columns == stream_t.num_columns
+    np.testing.assert_allclose(stream_t.transform(rows), memory_t.transform(rows), rtol=1e-9, atol=1e-9)
+    assert set(NUMERICAL_FEATURES) >= set(stream_t.num_columns)